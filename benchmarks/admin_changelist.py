@@ -0,0 +1,101 @@
+"""Список постов и комментариев в админке: настройки по умолчанию против
+posts.admin.
+
+Наполняет временную SQLite-базу (по умолчанию миллион постов), строит
+поисковый индекс и открывает changelist_view напрямую: первая страница,
+поиск по слову и по автору. Печатает время и число запросов.
+
+    python benchmarks/admin_changelist.py --posts 1000000
+"""
+import argparse
+import io
+import os
+import statistics
+import tempfile
+import time
+
+from common import setup_django
+from search import WORDS, fill
+
+
+def naive_admins():
+    """posts.admin до масштабирования: search_fields по тексту, без
+    list_select_related, точный COUNT(*)."""
+    from django.contrib import admin
+
+    class PostAdmin(admin.ModelAdmin):
+        list_display = ("pk", "text", "pub_date", "author", "group")
+        search_fields = ("text", "author__username")
+        list_filter = ("pub_date",)
+
+    class CommentAdmin(admin.ModelAdmin):
+        list_display = ("text", "created", "post", "author")
+        search_fields = ("text", "author__username")
+        list_filter = ("created",)
+
+    return PostAdmin, CommentAdmin
+
+
+def measure(model_admin, request, repeat):
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+
+    times = []
+    for _ in range(repeat):
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            model_admin.changelist_view(request).render()
+            times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), len(queries)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--comments", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=3)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"), DEBUG=True)
+        from django.contrib import admin
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+        from django.test import RequestFactory
+
+        from posts import admin as posts_admin
+        from posts.models import Comment, Post
+
+        call_command("migrate", run_syncdb=True, verbosity=0)
+        started = time.perf_counter()
+        fill(args.posts, args.comments)
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        print(f"наполнение: {time.perf_counter() - started:.1f} с")
+
+        superuser = get_user_model().objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        naive_post, naive_comment = naive_admins()
+        configs = (
+            ("по умолчанию", {
+                Post: naive_post(Post, admin.site),
+                Comment: naive_comment(Comment, admin.site),
+            }),
+            ("posts.admin", {
+                Post: posts_admin.PostAdmin(Post, admin.site),
+                Comment: posts_admin.CommentAdmin(Comment, admin.site),
+            }),
+        )
+        factory = RequestFactory()
+        for model in (Post, Comment):
+            for params in ({}, {"q": WORDS[3]}, {"q": "bench"}):
+                request = factory.get("/admin/", params)
+                request.user = superuser
+                line = f"{model.__name__:8}{str(params):16}"
+                for name, admins in configs:
+                    ms, queries = measure(admins[model], request, args.repeat)
+                    line += f"  {name}: {ms:9.1f} мс, {queries:3} запр."
+                print(line)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,96 @@
+"""Скорость сериализации постов для JSON API.
+
+Сравнивает три способа получить JSON страницы постов:
+model_to_dict по объектам моделей (как пишут «в лоб»), встроенный
+django.core.serializers и проекцию values() из posts/api.py.
+
+    python benchmarks/api_serialization.py --posts 5000 --page 100
+"""
+import argparse
+import json
+import os
+import tempfile
+import time
+
+from common import setup_django
+
+
+def fill(posts):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from posts.models import Group, Post
+
+    call_command("migrate", verbosity=0)
+    author = get_user_model().objects.create_user(username="bench")
+    group = Group.objects.create(title="Группа", slug="bench", description="")
+    Post.objects.bulk_create(
+        Post(text="Текст поста " * 20, author=author, group=group)
+        for _ in range(posts)
+    )
+
+
+def naive(limit):
+    from django.core.serializers.json import DjangoJSONEncoder
+    from django.forms.models import model_to_dict
+
+    from posts.models import Post
+
+    rows = []
+    for post in Post.objects.select_related("author", "group")[:limit]:
+        item = model_to_dict(post)
+        item["author"] = post.author.username
+        item["group"] = post.group.slug if post.group else None
+        item["image"] = post.image.url if post.image else None
+        rows.append(item)
+    return json.dumps(rows, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def builtin(limit):
+    from django.core import serializers
+
+    from posts.models import Post
+
+    return serializers.serialize("json", Post.objects.all()[:limit])
+
+
+def projection(limit):
+    from django.core.serializers.json import DjangoJSONEncoder
+
+    from posts.api import POST
+    from posts.models import Post
+
+    names = list(POST.fields)
+    shape = POST.shaper(names)
+    rows = [shape(row) for row in POST.values(Post.objects.all(), names)
+            [:limit]]
+    return json.dumps(rows, cls=DjangoJSONEncoder, ensure_ascii=False)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=5000)
+    parser.add_argument("--page", type=int, default=100)
+    parser.add_argument("--repeat", type=int, default=50)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"))
+        fill(args.posts)
+        baseline = None
+        for name, func in (("model_to_dict", naive), ("serializers", builtin),
+                           ("values()", projection)):
+            func(args.page)
+            started = time.perf_counter()
+            for _ in range(args.repeat):
+                body = func(args.page)
+            elapsed = time.perf_counter() - started
+            rate = args.repeat * args.page / elapsed
+            baseline = baseline or rate
+            print(
+                f"{name:14} {rate:9.0f} постов/с  x{rate / baseline:4.1f}  "
+                f"{len(body.encode()) / 1024:6.1f} KiB на страницу"
+            )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,63 @@
+"""Удаление постов: QuerySet.delete() против posts.moderation.
+
+Наполняет временную SQLite-базу постами одного автора с комментариями
+и подписчиками, удаляет первую половину постов стандартным каскадом
+Django (сигналы на каждую строку), вторую — пачками delete_posts.
+
+    python benchmarks/bulk_delete.py --posts 20000
+"""
+import argparse
+import io
+import os
+import tempfile
+import time
+
+from common import setup_django
+from search import fill
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=20000)
+    parser.add_argument("--comments", type=int, default=20000)
+    parser.add_argument("--followers", type=int, default=20)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"),
+                     MODERATION_WORKERS=0)
+        from django.contrib.auth import get_user_model
+        from django.core.management import call_command
+
+        from posts import moderation, stats, timeline
+        from posts.models import Follow, Post
+
+        call_command("migrate", run_syncdb=True, verbosity=0)
+        fill(args.posts, args.comments)
+        User = get_user_model()
+        author = User.objects.get(username="bench")
+        Follow.objects.bulk_create(
+            Follow(
+                user=User.objects.create_user(username=f"reader{num}"),
+                author=author,
+            )
+            for num in range(args.followers)
+        )
+        timeline.rebuild_all()
+        stats.reconcile()
+        call_command("rebuild_search_index", stdout=io.StringIO())
+
+        ids = list(Post.objects.order_by("pk").values_list("pk", flat=True))
+        half = len(ids) // 2
+        started = time.perf_counter()
+        Post.objects.filter(pk__in=ids[:half]).delete()
+        default = time.perf_counter() - started
+        started = time.perf_counter()
+        moderation.start("delete_posts", ids[half:])
+        bulk = time.perf_counter() - started
+        print(f"{half} постов: QuerySet.delete() {default:.1f} с, "
+              f"delete_posts {bulk:.1f} с")
+        print(f"исправлено reconcile после обоих: {stats.reconcile()}")
+
+
+if __name__ == "__main__":
+    main()
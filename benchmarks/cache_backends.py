@@ -0,0 +1,111 @@
+"""Сравнение кэш-бэкендов при нескольких воркерах.
+
+Каждый воркер — отдельный процесс с тем же YATUBE_CACHE, что и в
+продакшене. Воркеры читают «страницы лент» с распределением Ципфа и
+при промахе кладут их в кэш. Отчёт: доля попаданий и рост RSS на
+воркер.
+
+    python benchmarks/cache_backends.py --workers 16 --requests 5000
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import shutil
+import tempfile
+import time
+
+from common import rss_mb, setup_django
+
+PAGE = "x" * 20000  # примерно столько весит отрендеренная лента
+
+
+def worker(profile, location, database, requests, keys, seed, queue):
+    os.environ["YATUBE_CACHE"] = profile
+    os.environ["YATUBE_CACHE_LOCATION"] = location
+    setup_django(database)
+    from django.core.cache import cache
+
+    rng = random.Random(seed)
+    weights = [1 / (rank + 1) for rank in range(keys)]
+    before = rss_mb()
+    hits = 0
+    started = time.perf_counter()
+    for key in rng.choices(range(keys), weights, k=requests):
+        if cache.get(f"bench-page:{key}") is not None:
+            hits += 1
+        else:
+            cache.set(f"bench-page:{key}", PAGE, 300)
+    queue.put((hits, rss_mb() - before, time.perf_counter() - started))
+
+
+def memcached_available(location):
+    try:
+        import memcache
+    except ImportError:
+        return False
+    return bool(memcache.Client([location]).get_stats())
+
+
+def run(profile, args, tmp):
+    location = os.path.join(tmp, profile)
+    database = os.path.join(tmp, "bench.sqlite3")
+    if profile == "memcached":
+        location = os.environ.get("YATUBE_CACHE_LOCATION", "127.0.0.1:11211")
+        if not memcached_available(location):
+            print(f"{profile:10} пропущен: нет сервера или python-memcached")
+            return
+    if profile == "db":
+        os.environ["YATUBE_CACHE"] = "db"
+        ctx = multiprocessing.get_context("spawn")
+        proc = ctx.Process(target=_create_cache_table, args=(database,))
+        proc.start()
+        proc.join()
+    ctx = multiprocessing.get_context("spawn")
+    queue = ctx.Queue()
+    procs = [
+        ctx.Process(target=worker, args=(
+            profile, location, database, args.requests, args.keys, seed, queue
+        ))
+        for seed in range(args.workers)
+    ]
+    for proc in procs:
+        proc.start()
+    results = [queue.get() for _ in procs]
+    for proc in procs:
+        proc.join()
+    hits = sum(result[0] for result in results)
+    total = args.requests * args.workers
+    rss = sum(result[1] for result in results) / len(results)
+    wall = max(result[2] for result in results)
+    print(
+        f"{profile:10} hit ratio {hits / total:6.1%}  "
+        f"RSS/воркер +{rss:6.1f} MB  {total / wall:8.0f} req/s"
+    )
+
+
+def _create_cache_table(database):
+    setup_django(database)
+    from django.core.management import call_command
+    call_command("createcachetable", verbosity=0)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--workers", type=int, default=8)
+    parser.add_argument("--requests", type=int, default=3000)
+    parser.add_argument("--keys", type=int, default=2000)
+    parser.add_argument(
+        "--profiles", nargs="+", default=["locmem", "file", "db", "memcached"]
+    )
+    args = parser.parse_args()
+    tmp = tempfile.mkdtemp(prefix="yatube-cache-bench-")
+    try:
+        for profile in args.profiles:
+            run(profile, args, tmp)
+    finally:
+        shutil.rmtree(tmp, ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
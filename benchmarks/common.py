@@ -0,0 +1,70 @@
+"""Общая часть бенчмарков: путь к проекту и настройка Django."""
+import os
+import resource
+import socket
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor
+from socketserver import ThreadingMixIn
+from wsgiref.simple_server import WSGIRequestHandler, WSGIServer, make_server
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def setup_django(database=None, **overrides):
+    """Поднимает Django с yatube.settings; database — путь к SQLite."""
+    if ROOT not in sys.path:
+        sys.path.insert(0, ROOT)
+    os.environ.setdefault("DJANGO_SETTINGS_MODULE", "yatube.settings")
+    from django.conf import settings
+    if database:
+        settings.DATABASES["default"]["NAME"] = database
+    for name, value in overrides.items():
+        setattr(settings, name, value)
+    import django
+    django.setup()
+
+
+def rss_mb():
+    """Пиковый RSS текущего процесса в мегабайтах (Linux: KiB)."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+class PooledWSGIServer(ThreadingMixIn, WSGIServer):
+    """wsgiref с фиксированным пулом, как gunicorn --threads."""
+    threads = 8
+
+    def process_request(self, request, client_address):
+        if not hasattr(self, "pool"):
+            self.pool = ThreadPoolExecutor(max_workers=self.threads)
+        self.pool.submit(
+            self.process_request_thread, request, client_address
+        )
+
+
+class QuietHandler(WSGIRequestHandler):
+    def log_message(self, *args):
+        pass
+
+
+def serve_wsgi(port, threads):
+    """Отдаёт Django на 127.0.0.1:port, пока процесс не остановят."""
+    from django.core.wsgi import get_wsgi_application
+
+    PooledWSGIServer.threads = threads
+    server = make_server(
+        "127.0.0.1", port, get_wsgi_application(),
+        server_class=PooledWSGIServer, handler_class=QuietHandler,
+    )
+    server.serve_forever()
+
+
+def wait_port(port, timeout=30):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(("127.0.0.1", port), 1).close()
+            return
+        except OSError:
+            time.sleep(0.1)
+    raise RuntimeError("сервер не поднялся")
@@ -0,0 +1,70 @@
+"""Сколько байт картинок весит одна страница ленты.
+
+До: каждая карточка — JPEG 960x339 от sorl.thumbnail (качество 95 по
+умолчанию), одинаковый для всех экранов. После: браузер выбирает из
+srcset копию нужной ширины в WebP. Картинки синтетические, но с шумом
+и градиентами, чтобы сжатие было похоже на фотографии.
+
+    python benchmarks/image_bytes.py --posts 10
+"""
+import argparse
+import random
+
+from common import setup_django
+
+# ширина карточки в CSS-пикселях * DPR типичных экранов
+VIEWPORTS = {
+    "mobile (360px @1x)": 360,
+    "mobile (360px @2x)": 720,
+    "tablet (768px @1x)": 768,
+    "desktop (960px @1x)": 960,
+}
+
+
+def photo(seed, size=(3024, 2016)):
+    from PIL import Image, ImageDraw, ImageFilter
+
+    rng = random.Random(seed)
+    image = Image.effect_noise(size, 40).convert("RGB")
+    draw = ImageDraw.Draw(image, "RGBA")
+    for _ in range(60):
+        x, y = rng.randrange(size[0]), rng.randrange(size[1])
+        radius = rng.randrange(50, 600)
+        color = tuple(rng.randrange(256) for _ in range(3)) + (120,)
+        draw.ellipse((x - radius, y - radius, x + radius, y + radius), color)
+    return image.filter(ImageFilter.GaussianBlur(2))
+
+
+def pick(widths, needed):
+    return next((width for width in widths if width >= needed), widths[-1])
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=10)
+    args = parser.parse_args()
+    setup_django()
+    from posts import thumbnails
+
+    images = [photo(seed) for seed in range(args.posts)]
+    before = sum(
+        len(thumbnails.render_variant(image, 960, "JPEG", {"quality": 95}))
+        for image in images
+    )
+    print(f"до:    {before / 1024:8.1f} KiB на страницу (любой экран)")
+    _, image_format, options = thumbnails.FORMATS[-1]
+    for viewport, needed in VIEWPORTS.items():
+        width = pick(thumbnails.WIDTHS, needed)
+        after = sum(
+            len(thumbnails.render_variant(image, width, image_format,
+                                          options))
+            for image in images
+        )
+        print(
+            f"после: {after / 1024:8.1f} KiB  {viewport:20} "
+            f"{image_format} {width}w  ({after / before:.0%} от прежнего)"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""Нагрузочный прогон страниц posts/urls.py с проверкой по эталону.
+
+Создаёт синтетический набор данных заданного размера (10k, 100k или 1m
+постов): пользователей и группы через mixer, посты, комментарии
+и подписки пачками. Популярность авторов убывает по закону Ципфа,
+число подписок и комментариев — с длинным хвостом, как в живой сети.
+Затем поднимает Django за локальным WSGI-сервером и гоняет по нему
+сценарии: главная (гость и пользователь), группа, профиль, пост,
+лента подписок, комментарий, подписка/отписка.
+
+Для каждого сценария печатает p50/p99 задержки и число SQL-запросов
+на запрос (из заголовка Server-Timing), для сервера — пиковый RSS.
+С --check сравнивает с эталоном benchmarks/baselines/load-<size>.json
+и завершается с кодом 1, если запросов стало больше или задержка/RSS
+выросли сильнее --tolerance. --save-baseline записывает эталон.
+
+    python benchmarks/load.py --size 10k --check
+    python benchmarks/load.py --size 1m --database /tmp/load-1m.sqlite3
+
+Набор на 1m строится долго (десятки минут, в основном ленты подписок):
+укажите --database, и следующий прогон возьмёт готовую базу.
+"""
+import argparse
+import http.client
+import itertools
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from bisect import bisect
+from concurrent.futures import ThreadPoolExecutor
+
+from common import ROOT, serve_wsgi, setup_django, wait_port
+
+SIZES = {"10k": 10_000, "100k": 100_000, "1m": 1_000_000}
+POSTS_PER_USER = 20
+GROUPS = 50
+BATCH = 5000
+# пользователи, от имени которых идут запросы с сессией
+SESSIONS = 50
+# постоянный CSRF-токен: cookie и заголовок совпадают
+CSRF_TOKEN = "b" * 32
+BASELINES = os.path.join(ROOT, "benchmarks", "baselines")
+
+
+def zipf_picker(rng, count, exponent=1.1):
+    """Выбор номера 0..count-1 с вероятностью ~ 1 / rank**exponent."""
+    ranks = list(range(count))
+    rng.shuffle(ranks)
+    cumulative = list(itertools.accumulate(
+        1 / (rank + 1) ** exponent for rank in range(count)
+    ))
+    total = cumulative[-1]
+    return lambda: ranks[bisect(cumulative, rng.random() * total)]
+
+
+def long_tail(rng, scale, cap):
+    """Целое с распределением Парето: чаще 0–1, изредка до cap."""
+    return min(int((rng.paretovariate(1.5) - 1) * scale), cap)
+
+
+def seed(posts, rng):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import transaction
+    from mixer.backend.django import mixer
+
+    from posts import stats, timeline
+    from posts.models import Comment, Follow, Group, Post
+    from posts.search import get_backend
+
+    call_command("migrate", verbosity=0)
+    User = get_user_model()
+    user_count = max(posts // POSTS_PER_USER, SESSIONS)
+    print(f"Пользователи: {user_count}, группы: {GROUPS}", flush=True)
+    with transaction.atomic():
+        mixer.cycle(user_count).blend(
+            User, username=mixer.sequence("user{0}"), is_active=True
+        )
+        mixer.cycle(GROUPS).blend(
+            Group, slug=mixer.sequence("group-{0}"),
+            title=mixer.sequence("Группа {0}"),
+        )
+    user_ids = list(User.objects.order_by("id").values_list("id", flat=True))
+    group_ids = list(Group.objects.values_list("id", flat=True))
+    sentences = [mixer.faker.sentence(nb_words=12) for _ in range(1000)]
+
+    def text(words):
+        return " ".join(rng.choice(sentences) for _ in range(words))
+
+    print(f"Посты: {posts}", flush=True)
+    for start in range(0, posts, BATCH):
+        with transaction.atomic():
+            Post.objects.bulk_create(
+                Post(
+                    text=text(rng.randint(1, 6)),
+                    author_id=rng.choice(user_ids),
+                    group_id=(rng.choice(group_ids)
+                              if rng.random() < 0.6 else None),
+                )
+                for _ in range(start, min(start + BATCH, posts))
+            )
+
+    print("Комментарии", flush=True)
+    popular_user = zipf_picker(rng, len(user_ids))
+    first_post = Post.objects.order_by("id").values_list(
+        "id", flat=True
+    ).first()
+    batch = []
+    for post_id in range(first_post, first_post + posts):
+        for _ in range(long_tail(rng, 2, 300)):
+            batch.append(Comment(
+                post_id=post_id,
+                author_id=user_ids[popular_user()],
+                text=text(1),
+            ))
+        if len(batch) >= BATCH:
+            Comment.objects.bulk_create(batch)
+            batch = []
+    Comment.objects.bulk_create(batch)
+
+    print("Подписки", flush=True)
+    popular_author = zipf_picker(rng, len(user_ids))
+    follows = []
+    for user_id in user_ids:
+        wanted = 1 + long_tail(rng, 8, 500)
+        authors = {user_ids[popular_author()] for _ in range(wanted)}
+        authors.discard(user_id)
+        follows.extend(
+            Follow(user_id=user_id, author_id=author_id)
+            for author_id in authors
+        )
+    Follow.objects.bulk_create(follows)
+
+    # bulk_create не шлёт сигналы: ленты, счётчики и поиск — отдельно
+    print("Ленты подписок, счётчики, поиск", flush=True)
+    timeline.rebuild_all()
+    stats.reconcile()
+    get_backend().rebuild()
+
+
+def create_sessions():
+    """Сессии первых SESSIONS пользователей: {username: sessionid}."""
+    from django.conf import settings
+    from django.contrib.auth import (
+        BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY, get_user_model
+    )
+    from django.contrib.sessions.backends.db import SessionStore
+
+    sessions = {}
+    users = get_user_model().objects.order_by("id")[:SESSIONS]
+    for user in users:
+        session = SessionStore()
+        session[SESSION_KEY] = str(user.pk)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        sessions[user.username] = session.session_key
+    return sessions
+
+
+def targets(rng, samples):
+    """Случайные, но воспроизводимые адреса для сценариев."""
+    from django.contrib.auth import get_user_model
+
+    from posts.models import Group, Post
+
+    usernames = list(get_user_model().objects.values_list(
+        "username", flat=True
+    ))
+    slugs = list(Group.objects.values_list("slug", flat=True))
+    last = Post.objects.order_by("-id").values_list("id", flat=True).first()
+    posts = []
+    while len(posts) < samples:
+        row = Post.objects.filter(id=rng.randint(1, last)).values_list(
+            "author__username", "id"
+        ).first()
+        if row:
+            posts.append(row)
+    return {"usernames": usernames, "slugs": slugs, "posts": posts}
+
+
+def scenarios(data, rng):
+    """Имя → функция, возвращающая (метод, путь, тело, залогинен ли)."""
+    def pick_post():
+        return rng.choice(data["posts"])
+
+    def follow_pair():
+        author = rng.choice(data["usernames"])
+        action = rng.choice(("follow", "unfollow"))
+        return "POST", f"/{author}/{action}/", "", True
+
+    return {
+        "index (гость)": lambda: ("GET", "/", None, False),
+        "index": lambda: ("GET", "/", None, True),
+        "group_post": lambda: (
+            "GET", f"/group/{rng.choice(data['slugs'])}/", None, True
+        ),
+        "profile": lambda: (
+            "GET", f"/{rng.choice(data['usernames'])}/", None, True
+        ),
+        "post_view": lambda: (
+            "GET", "/{}/{}/".format(*pick_post()), None, True
+        ),
+        "follow_index": lambda: ("GET", "/follow/", None, True),
+        "add_comment": lambda: (
+            "POST", "/{}/{}/comment/".format(*pick_post()),
+            "text=Нагрузочный+комментарий", True
+        ),
+        "follow/unfollow": follow_pair,
+    }
+
+
+def request(port, method, path, body, session):
+    headers = {"Host": "localhost", "Cookie": f"csrftoken={CSRF_TOKEN}"}
+    if session:
+        headers["Cookie"] += f"; sessionid={session}"
+    if method == "POST":
+        headers["X-CSRFToken"] = CSRF_TOKEN
+        headers["Content-Type"] = "application/x-www-form-urlencoded"
+    connection = http.client.HTTPConnection("127.0.0.1", port, timeout=60)
+    started = time.perf_counter()
+    connection.request(method, path, body=body and body.encode(),
+                       headers=headers)
+    response = connection.getresponse()
+    response.read()
+    elapsed = time.perf_counter() - started
+    connection.close()
+    if response.status >= 400:
+        raise RuntimeError(f"{method} {path}: {response.status}")
+    return elapsed, _queries(response.getheader("Server-Timing", ""))
+
+
+def _queries(server_timing):
+    for part in server_timing.split(","):
+        name, _, params = part.strip().partition(";")
+        if name == "db":
+            desc = params.split('desc="', 1)[1]
+            return int(desc.split(" ", 1)[0])
+    return 0
+
+
+def percentile(values, share):
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def peak_rss_mb(pid):
+    with open(f"/proc/{pid}/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return 0.0
+
+
+def drive(port, server_pid, args, rng):
+    data = targets(rng, 200)
+    sessions = list(create_sessions().values())
+    results = {}
+    for name, make in scenarios(data, rng).items():
+        calls = []
+        for _ in range(args.requests):
+            method, path, body, logged_in = make()
+            calls.append((method, path, body,
+                          rng.choice(sessions) if logged_in else None))
+        with ThreadPoolExecutor(args.concurrency) as pool:
+            # прогрев: первый запрос заполняет кэши процесса
+            request(port, *calls[0])
+            measured = list(pool.map(lambda call: request(port, *call),
+                                     calls))
+        latencies = [elapsed for elapsed, _ in measured]
+        queries = [count for _, count in measured]
+        results[name] = {
+            "p50_ms": round(percentile(latencies, 0.5) * 1000, 1),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 1),
+            "queries": round(sum(queries) / len(queries), 2),
+        }
+        row = results[name]
+        print(f"{name:16} p50 {row['p50_ms']:8.1f} мс  "
+              f"p99 {row['p99_ms']:8.1f} мс  "
+              f"запросов {row['queries']:6.2f}", flush=True)
+    results["rss_mb"] = round(peak_rss_mb(server_pid), 1)
+    print(f"RSS сервера: {results['rss_mb']:.1f} МБ")
+    return results
+
+
+def compare(results, baseline, tolerance):
+    """Список регрессий относительно эталона."""
+    problems = []
+    for name, row in results.items():
+        if name == "rss_mb" or name not in baseline:
+            continue
+        expected = baseline[name]
+        if row["queries"] > expected["queries"] + 0.5:
+            problems.append(f"{name}: запросов {row['queries']} "
+                            f"вместо {expected['queries']}")
+        if row["p99_ms"] > expected["p99_ms"] * (1 + tolerance):
+            problems.append(f"{name}: p99 {row['p99_ms']} мс "
+                            f"вместо {expected['p99_ms']}")
+    if "rss_mb" in baseline and \
+            results["rss_mb"] > baseline["rss_mb"] * (1 + tolerance):
+        problems.append(f"RSS {results['rss_mb']} МБ "
+                        f"вместо {baseline['rss_mb']}")
+    return problems
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--size", choices=SIZES, default="10k")
+    parser.add_argument("--database",
+                        help="файл базы; если он есть, набор не создаётся")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--db-profile", default="production",
+                        help="профиль базы из settings.DATABASE_PROFILES")
+    parser.add_argument("--seed", type=int, default=1)
+    parser.add_argument("--port", type=int, default=8780)
+    parser.add_argument("--check", action="store_true")
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--tolerance", type=float, default=1.0,
+                        help="допустимый рост p99 и RSS, 1.0 — вдвое")
+    parser.add_argument("--serve", action="store_true",
+                        help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    # сервер-подпроцесс наследует окружение, а с ним и профиль базы
+    os.environ["YATUBE_DB"] = args.db_profile
+    overrides = {"THUMBNAIL_WORKERS": 0, "ALLOWED_HOSTS": ["*"],
+                 "DEBUG": False, "METRICS_SERVER_TIMING": True}
+    if args.serve:
+        setup_django(args.database, **overrides)
+        serve_wsgi(args.port, args.threads)
+        return
+
+    with tempfile.TemporaryDirectory() as tmp:
+        database = args.database or os.path.join(tmp, "load.sqlite3")
+        fresh = not os.path.exists(database)
+        setup_django(database, **overrides)
+        rng = random.Random(args.seed)
+        if fresh:
+            started = time.perf_counter()
+            seed(SIZES[args.size], rng)
+            print(f"Набор создан за {time.perf_counter() - started:.0f} с")
+        server = subprocess.Popen([
+            sys.executable, __file__, "--serve", "--database", database,
+            "--port", str(args.port), "--threads", str(args.threads),
+        ])
+        try:
+            wait_port(args.port)
+            results = drive(args.port, server.pid, args, rng)
+        finally:
+            server.terminate()
+            server.wait()
+
+    path = os.path.join(BASELINES, f"load-{args.size}.json")
+    if args.save_baseline:
+        os.makedirs(BASELINES, exist_ok=True)
+        with open(path, "w") as baseline_file:
+            json.dump(results, baseline_file, ensure_ascii=False, indent=2)
+            baseline_file.write("\n")
+        print(f"Эталон записан: {path}")
+    if args.check:
+        with open(path) as baseline_file:
+            problems = compare(results, json.load(baseline_file),
+                               args.tolerance)
+        for problem in problems:
+            print("РЕГРЕССИЯ:", problem)
+        if problems:
+            sys.exit(1)
+        print("Регрессий нет")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,108 @@
+"""Поиск по постам: индекс FTS5 против LIKE '%слово%'.
+
+Наполняет временную SQLite-базу синтетическими постами (по умолчанию
+миллион) и комментариями, строит индекс rebuild_search_index и
+сравнивает время первой страницы выдачи для редких и частых слов.
+
+    python benchmarks/search.py --posts 1000000
+"""
+import argparse
+import io
+import os
+import random
+import statistics
+import tempfile
+import time
+
+from common import setup_django
+
+WORDS = (
+    "кот собака дом улица город река лес поле море небо солнце дождь "
+    "снег ветер утро вечер ночь день книга письмо дорога окно дверь "
+    "стол чай хлеб молоко сад цветок дерево птица рыба мост поезд"
+).split()
+RARE = ("жираф", "метеорит", "виолончель")
+BATCH = 50000
+
+
+def text(rng):
+    words = rng.choices(WORDS, k=rng.randrange(5, 30))
+    if rng.random() < 0.001:
+        words.append(rng.choice(RARE))
+    return " ".join(words)
+
+
+def fill(posts, comments, seed=0):
+    from django.contrib.auth import get_user_model
+    from django.db import connection, transaction
+    from django.utils import timezone
+
+    from posts.models import Comment, Post
+
+    rng = random.Random(seed)
+    author = get_user_model().objects.create_user(username="bench")
+    now = timezone.now().isoformat()
+    with transaction.atomic(), connection.cursor() as cursor:
+        for start in range(0, posts, BATCH):
+            cursor.executemany(
+                "INSERT INTO {} (text, pub_date, updated, author_id, "
+                "image_variants, comment_count) "
+                "VALUES (%s, %s, %s, %s, '', 0)".format(Post._meta.db_table),
+                [(text(rng), now, now, author.pk)
+                 for _ in range(min(BATCH, posts - start))],
+            )
+        for start in range(0, comments, BATCH):
+            cursor.executemany(
+                "INSERT INTO {} (text, created, author_id, post_id) "
+                "VALUES (%s, %s, %s, %s)".format(Comment._meta.db_table),
+                [(text(rng), now, author.pk, rng.randrange(1, posts + 1))
+                 for _ in range(min(BATCH, comments - start))],
+            )
+
+
+def timed(func, repeat):
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        result = func()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times), result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--posts", type=int, default=1000000)
+    parser.add_argument("--comments", type=int, default=200000)
+    parser.add_argument("--repeat", type=int, default=5)
+    args = parser.parse_args()
+    with tempfile.TemporaryDirectory() as tmp:
+        setup_django(os.path.join(tmp, "bench.sqlite3"))
+        from django.core.management import call_command
+
+        from posts import search
+
+        call_command("migrate", run_syncdb=True, verbosity=0)
+        started = time.perf_counter()
+        fill(args.posts, args.comments)
+        print(f"наполнение: {time.perf_counter() - started:.1f} с")
+        started = time.perf_counter()
+        call_command("rebuild_search_index", stdout=io.StringIO())
+        print(f"индекс:     {time.perf_counter() - started:.1f} с")
+
+        fts = search.SQLiteFTSBackend()
+        like = search.DatabaseBackend()
+        for query in (RARE[0], WORDS[0], "кот дождь"):
+            fts_ms, found = timed(
+                lambda: fts.search(query, 0, 10), args.repeat
+            )
+            like_ms, _ = timed(
+                lambda: like.search(query, 0, 10), args.repeat
+            )
+            print(
+                f"{query!r:14} FTS5 {fts_ms:8.1f} мс  LIKE {like_ms:8.1f} мс"
+                f"  (найдено на странице: {len(found)})"
+            )
+
+
+if __name__ == "__main__":
+    main()
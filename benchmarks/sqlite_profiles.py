@@ -0,0 +1,152 @@
+"""Конкурентные чтения и записи в SQLite: профиль default против production.
+
+Читатели — отдельные процессы, которые выбирают страницу главной
+ленты; писатели добавляют комментарии и переключают подписку, как
+add_comment и profile_follow. Все работают с одной базой заданное
+время. Отчёт: операции в секунду и число ошибок «database is locked».
+
+    python benchmarks/sqlite_profiles.py --readers 6 --writers 4
+"""
+import argparse
+import multiprocessing
+import os
+import random
+import tempfile
+import time
+
+from common import setup_django
+
+POSTS = 2000
+USERS = 50
+
+
+def _setup(profile, database):
+    os.environ["YATUBE_DB"] = profile
+    setup_django(database, THUMBNAIL_WORKERS=0)
+
+
+def prepare(profile, database):
+    _setup(profile, database)
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+    from django.db import transaction
+
+    from posts.models import Post
+
+    call_command("migrate", verbosity=0)
+    User = get_user_model()
+    with transaction.atomic():
+        users = [
+            User.objects.create_user(username=f"user-{num}")
+            for num in range(USERS)
+        ]
+        Post.objects.bulk_create(
+            Post(text=f"Пост {num}", author=users[num % USERS])
+            for num in range(POSTS)
+        )
+
+
+def reader(profile, database, duration, queue):
+    _setup(profile, database)
+    from django.db import OperationalError
+
+    from posts.models import Post
+
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        try:
+            list(Post.objects.for_feed()[:10])
+            done += 1
+        except OperationalError:
+            errors += 1
+    queue.put(("read", done, errors))
+
+
+def writer(profile, database, duration, seed, queue):
+    _setup(profile, database)
+    from django.db import OperationalError, transaction
+
+    from posts.models import Comment, Follow, Post
+
+    rng = random.Random(seed)
+    done = errors = 0
+    deadline = time.monotonic() + duration
+    while time.monotonic() < deadline:
+        user_id = rng.randrange(1, USERS + 1)
+        author_id = rng.randrange(1, USERS + 1)
+        try:
+            with transaction.atomic():
+                if rng.random() < 0.7:
+                    post = Post.objects.only("id").get(
+                        pk=rng.randrange(1, POSTS + 1)
+                    )
+                    Comment.objects.create(
+                        post=post, author_id=user_id, text="Комментарий"
+                    )
+                else:
+                    follow = Follow.objects.filter(
+                        user_id=user_id, author_id=author_id
+                    )
+                    if not follow.delete()[0] and user_id != author_id:
+                        Follow.objects.create(
+                            user_id=user_id, author_id=author_id
+                        )
+            done += 1
+        except OperationalError:
+            errors += 1
+    queue.put(("write", done, errors))
+
+
+def run(profile, args):
+    ctx = multiprocessing.get_context("spawn")
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench.sqlite3")
+        proc = ctx.Process(target=prepare, args=(profile, database))
+        proc.start()
+        proc.join()
+        queue = ctx.Queue()
+        procs = [
+            ctx.Process(target=reader, args=(
+                profile, database, args.duration, queue
+            ))
+            for _ in range(args.readers)
+        ] + [
+            ctx.Process(target=writer, args=(
+                profile, database, args.duration, seed, queue
+            ))
+            for seed in range(args.writers)
+        ]
+        for proc in procs:
+            proc.start()
+        totals = {"read": [0, 0], "write": [0, 0]}
+        for _ in procs:
+            kind, done, errors = queue.get()
+            totals[kind][0] += done
+            totals[kind][1] += errors
+        for proc in procs:
+            proc.join()
+    reads, read_errors = totals["read"]
+    writes, write_errors = totals["write"]
+    print(
+        f"{profile:10} чтения {reads / args.duration:8.0f}/с  "
+        f"записи {writes / args.duration:6.0f}/с  "
+        f"locked: чтения {read_errors}, записи {write_errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--readers", type=int, default=6)
+    parser.add_argument("--writers", type=int, default=4)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument(
+        "--profiles", nargs="+", default=["default", "production"]
+    )
+    args = parser.parse_args()
+    for profile in args.profiles:
+        run(profile, args)
+
+
+if __name__ == "__main__":
+    main()
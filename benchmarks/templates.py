@@ -0,0 +1,138 @@
+"""Отрисовка index.html с десятью карточками: профили шаблонов и include.
+
+Сравнивает профиль default (шаблон ищется и разбирается при каждом
+запросе) и production (cached.Loader, шаблоны скомпилированы заранее),
+а в каждом — карточку через {% include "post_item.html" %} и ту же
+карточку, вписанную в цикл index.html. Кэш фрагментов выключен
+(DummyCache), чтобы мерить сами шаблоны. База не нужна: посты
+создаются в памяти.
+
+    python benchmarks/templates.py --repeat 2000
+"""
+import argparse
+import statistics
+import time
+
+from common import setup_django
+
+INCLUDE = '{% include "post_item.html" with post=post %}'
+
+
+def page(size):
+    from django.contrib.auth import get_user_model
+    from django.core.paginator import Paginator
+    from django.utils import timezone
+
+    from posts.models import Group, Post
+
+    author = get_user_model()(pk=1, username="bench")
+    group = Group(pk=1, title="Котики", slug="cats")
+    posts = [
+        Post(
+            pk=num, text="Пост номер {}\nвторая строка".format(num),
+            author=author, group=group if num % 2 else None,
+            pub_date=timezone.now(), updated=timezone.now(),
+            comment_count=num,
+        )
+        for num in range(1, size + 1)
+    ]
+    return Paginator(posts, size).page(1)
+
+
+def make_engine(profile):
+    """Движок бэкенда из settings (TimedTemplates) в нужном профиле."""
+    from django.conf import settings
+    from django.utils.module_loading import import_string
+
+    params = dict(settings.TEMPLATES[0], NAME=profile)
+    options = dict(settings.TEMPLATE_OPTIONS)
+    if profile == "production":
+        options.update(debug=False, loaders=[(
+            "django.template.loaders.cached.Loader", settings.TEMPLATE_LOADERS
+        )])
+        params["APP_DIRS"] = False
+    else:
+        options.pop("loaders", None)
+        options["debug"] = True
+        params["APP_DIRS"] = True
+    params["OPTIONS"] = options
+    backend = import_string(params.pop("BACKEND"))(params)
+    return backend.engine
+
+
+def inlined_source(engine):
+    """index.html, где вместо include стоит текст карточки."""
+    index, _ = engine.find_template("index.html")
+    card, _ = engine.find_template("post_item.html")
+    index_source = index.source
+    # {% load cache %} в index.html уже есть выше цикла
+    card_source = card.source.replace("{% load cache %}", "", 1)
+    assert INCLUDE in index_source
+    return index_source.replace(INCLUDE, card_source)
+
+
+def measure(render, repeat):
+    render()
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        render()
+        times.append((time.perf_counter() - started) * 1000)
+    return statistics.median(times)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--repeat", type=int, default=2000)
+    parser.add_argument("--posts", type=int, default=10)
+    args = parser.parse_args()
+    setup_django(CACHES={"default": {
+        "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+    }})
+    from django.contrib.auth.models import AnonymousUser
+    from django.template import RequestContext
+    from django.test import RequestFactory
+
+    from yatube import templating
+
+    request = RequestFactory().get("/")
+    request.user = AnonymousUser()
+    context = {"page": page(args.posts), "paginator": None}
+
+    for profile in ("default", "production"):
+        engine = make_engine(profile)
+        if profile == "production":
+            started = time.perf_counter()
+            names = templating.template_names(engine)
+            for name in names:
+                engine.get_template(name)
+            print(f"прогрев: {len(names)} шаблонов за "
+                  f"{(time.perf_counter() - started) * 1000:.0f} мс")
+            inline = engine.from_string(inlined_source(engine))
+
+            def render_inline():
+                return inline.render(RequestContext(request, context))
+        else:
+            source = inlined_source(engine)
+
+            def render_inline():
+                # без кэша шаблон разбирается на каждый запрос
+                return engine.from_string(source).render(
+                    RequestContext(request, context)
+                )
+
+        def render_include():
+            return engine.get_template("index.html").render(
+                RequestContext(request, context)
+            )
+
+        assert render_include().count("card-body") == args.posts
+        assert render_inline().count("card-body") == args.posts
+        include_ms = measure(render_include, args.repeat)
+        inline_ms = measure(render_inline, args.repeat)
+        print(f"{profile:10} include {include_ms:6.2f} мс  "
+              f"inline {inline_ms:6.2f} мс")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,159 @@
+"""Медленные клиенты: синхронный WSGI-сервер против ASGI (uvicorn).
+
+Оба сервера получают одинаковый пул из --threads потоков для Django.
+--slow клиентов шлют запрос по байту (как телефон на плохой связи),
+--fast клиентов в это время читают главную страницу; печатаются
+пропускная способность и задержки быстрых запросов. WSGI-сервер читает
+заголовки в рабочем потоке, поэтому медленные клиенты занимают пул;
+в ASGI их ждёт событийный цикл. Без uvicorn ASGI-часть пропускается.
+
+    python benchmarks/wsgi_vs_asgi.py --slow 16 --fast 8 --threads 8
+"""
+import argparse
+import asyncio
+import os
+import subprocess
+import sys
+import tempfile
+import time
+
+from common import serve_wsgi, setup_django, wait_port
+
+REQUEST = b"GET / HTTP/1.1\r\nHost: localhost\r\nConnection: close\r\n\r\n"
+
+
+def fill(posts):
+    from django.contrib.auth import get_user_model
+    from django.core.management import call_command
+
+    from posts.models import Post
+
+    call_command("migrate", verbosity=0)
+    author = get_user_model().objects.create_user(username="bench")
+    Post.objects.bulk_create(
+        Post(text="Текст поста " * 20, author=author) for _ in range(posts)
+    )
+
+
+def serve(kind, database, port, threads):
+    setup_django(database, ASGI_THREADS=threads, DEBUG=False,
+                 ALLOWED_HOSTS=["*"])
+    if kind == "wsgi":
+        serve_wsgi(port, threads)
+    else:
+        import uvicorn
+
+        from yatube.asgi import application
+
+        uvicorn.run(application, host="127.0.0.1", port=port,
+                    log_level="warning", lifespan="off")
+
+
+async def slow_client(port, delay, stop):
+    while not stop.is_set():
+        try:
+            reader, writer = await asyncio.open_connection("127.0.0.1", port)
+            for byte in REQUEST:
+                writer.write(bytes([byte]))
+                await writer.drain()
+                await asyncio.sleep(delay)
+            await reader.read()
+            writer.close()
+        except OSError:
+            await asyncio.sleep(delay)
+
+
+async def fast_client(port, stop, latencies, errors):
+    while not stop.is_set():
+        started = time.perf_counter()
+        try:
+            reader, writer = await asyncio.wait_for(
+                asyncio.open_connection("127.0.0.1", port), 10
+            )
+            writer.write(REQUEST)
+            response = await asyncio.wait_for(reader.read(), 10)
+            writer.close()
+        except (OSError, asyncio.TimeoutError):
+            errors.append(1)
+            continue
+        if response.startswith(b"HTTP/1.1 200") or \
+                response.startswith(b"HTTP/1.0 200"):
+            latencies.append(time.perf_counter() - started)
+        else:
+            errors.append(1)
+
+
+async def load(port, args):
+    stop = asyncio.Event()
+    latencies, errors = [], []
+    tasks = [
+        asyncio.ensure_future(slow_client(port, args.byte_delay, stop))
+        for _ in range(args.slow)
+    ] + [
+        asyncio.ensure_future(fast_client(port, stop, latencies, errors))
+        for _ in range(args.fast)
+    ]
+    await asyncio.sleep(args.duration)
+    stop.set()
+    await asyncio.wait(tasks, timeout=15)
+    for task in tasks:
+        task.cancel()
+    return latencies, len(errors)
+
+
+def percentile(values, share):
+    if not values:
+        return float("nan")
+    values = sorted(values)
+    return values[min(int(len(values) * share), len(values) - 1)]
+
+
+def run(kind, database, port, args):
+    server = subprocess.Popen([
+        sys.executable, __file__, "--serve", kind, "--database", database,
+        "--port", str(port), "--threads", str(args.threads),
+    ])
+    try:
+        wait_port(port)
+        latencies, errors = asyncio.run(load(port, args))
+    finally:
+        server.terminate()
+        server.wait()
+    print(
+        f"{kind:5} {len(latencies) / args.duration:7.1f} запр/с  "
+        f"p50 {percentile(latencies, 0.5) * 1000:7.1f} мс  "
+        f"p95 {percentile(latencies, 0.95) * 1000:7.1f} мс  "
+        f"ошибок {errors}"
+    )
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--slow", type=int, default=16)
+    parser.add_argument("--fast", type=int, default=8)
+    parser.add_argument("--threads", type=int, default=8)
+    parser.add_argument("--duration", type=float, default=10)
+    parser.add_argument("--byte-delay", type=float, default=0.05)
+    parser.add_argument("--posts", type=int, default=200)
+    parser.add_argument("--serve", choices=["wsgi", "asgi"])
+    parser.add_argument("--database")
+    parser.add_argument("--port", type=int, default=8765)
+    args = parser.parse_args()
+    if args.serve:
+        serve(args.serve, args.database, args.port, args.threads)
+        return
+    with tempfile.TemporaryDirectory() as tmp:
+        database = os.path.join(tmp, "bench.sqlite3")
+        setup_django(database)
+        fill(args.posts)
+        run("wsgi", database, args.port, args)
+        try:
+            import uvicorn  # noqa: F401
+        except ImportError:
+            print("asgi  пропущено: uvicorn не установлен")
+            return
+        run("asgi", database, args.port + 1, args)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,26 +1,272 @@
-from django.contrib import admin
+from django import forms
+from django.contrib import admin, messages
+from django.contrib.admin import helpers
+from django.contrib.auth import get_user_model
+from django.core.paginator import Paginator
+from django.db import connections
+from django.db.models import Min
+from django.http import Http404, JsonResponse
+from django.template.response import TemplateResponse
+from django.urls import path, reverse
+from django.utils.functional import cached_property
+from django.utils.html import format_html
+
+from . import moderation
 from .models import Post, Group, Comment, Follow
+from .search import get_backend
+
+User = get_user_model()
+
+# точный COUNT не дальше стольких строк, см. EstimatedCountPaginator
+COUNT_LIMIT = 10000
+# сколько новых совпадений из поискового индекса показывать
+SEARCH_LIMIT = 500
+
+ESTIMATE_SQL = {
+    "postgresql": "SELECT reltuples::bigint FROM pg_class WHERE relname = %s",
+    "mysql": (
+        "SELECT table_rows FROM information_schema.tables "
+        "WHERE table_schema = DATABASE() AND table_name = %s"
+    ),
+}
+
+
+def _estimate_sqlite(cursor, connection, table):
+    # sqlite_stat1 появляется после ANALYZE (PRAGMA optimize), первое
+    # число stat — строк в таблице; без неё — MAX(rowid), спуск по дереву
+    cursor.execute(
+        "SELECT 1 FROM sqlite_master WHERE name = 'sqlite_stat1'"
+    )
+    if cursor.fetchone():
+        cursor.execute(
+            "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+        )
+        row = cursor.fetchone()
+        if row:
+            return row
+    cursor.execute(
+        "SELECT max(rowid) FROM {}".format(connection.ops.quote_name(table))
+    )
+    return cursor.fetchone()
+
+
+def estimate_rows(model, using):
+    """Число строк таблицы по статистике СУБД, без прохода по таблице."""
+    connection = connections[using]
+    table = model._meta.db_table
+    with connection.cursor() as cursor:
+        if connection.vendor == "sqlite":
+            row = _estimate_sqlite(cursor, connection, table)
+        elif connection.vendor in ESTIMATE_SQL:
+            cursor.execute(ESTIMATE_SQL[connection.vendor], [table])
+            row = cursor.fetchone()
+        else:
+            return None
+    if not row or row[0] is None:
+        return None
+    return int(str(row[0]).split()[0])
+
+
+class EstimatedCountPaginator(Paginator):
+    """Пагинатор списка в админке без COUNT(*) по миллионам строк.
+
+    Без фильтров и поиска число строк берётся из статистики СУБД.
+    С фильтром считается точно, но не дальше COUNT_LIMIT строк:
+    дальние страницы такого списка не нужны, уточните фильтр.
+    """
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            estimate = estimate_rows(queryset.model, queryset.db)
+            if estimate is not None and estimate > COUNT_LIMIT:
+                return estimate
+        return queryset.order_by().values("pk")[:COUNT_LIMIT].count()
+
+
+class ScalableAdmin(admin.ModelAdmin):
+    paginator = EstimatedCountPaginator
+    # «N всего» под поиском — тот же COUNT(*) по всей таблице
+    show_full_result_count = False
+
 
+class IndexedSearchMixin:
+    """Поиск по точному username автора или по полнотекстовому индексу.
 
-class PostAdmin(admin.ModelAdmin):
+    icontains по тексту — полный проход по таблице; вместо него берутся
+    SEARCH_LIMIT самых новых совпадений из posts.search. Если запрос —
+    имя пользователя, показываются только его записи: так фильтр идёт
+    по индексу автора, а не через OR с сортировкой всего результата.
+    """
+
+    # поле поиска показывается, если search_fields не пуст; сами поля
+    # только описывают поиск, get_search_results их не читает
+    search_fields = ("text", "=author__username")
+    # в индексе ищутся комментарии, а не посты
+    search_comments = False
+
+    def get_search_results(self, request, queryset, search_term):
+        search_term = search_term.strip()
+        if not search_term:
+            return queryset, False
+        author = User.objects.filter(username=search_term).values_list(
+            "pk", flat=True
+        ).first()
+        if author is not None:
+            return queryset.filter(author_id=author), False
+        ids = get_backend().recent(
+            search_term, SEARCH_LIMIT, comments=self.search_comments
+        )
+        return queryset.filter(pk__in=ids), False
+
+
+class ModerationActionForm(helpers.ActionForm):
+    group = forms.ModelChoiceField(
+        Group.objects.order_by("title"),
+        required=False,
+        label="Группа",
+        empty_label="без группы",
+    )
+
+
+class PostAdmin(IndexedSearchMixin, ScalableAdmin):
     list_display = ("pk", "text", "pub_date", "author", "group")
-    search_fields = ("text",)
+    list_select_related = ("author", "group")
     list_filter = ("pub_date",)
+    autocomplete_fields = ("author", "group")
     empty_value_display = "-пусто-"
+    action_form = ModerationActionForm
+    actions = ("delete_posts", "move_to_group", "purge_authors")
+
+    def get_actions(self, request):
+        actions = super().get_actions(request)
+        # вместо него delete_posts: без загрузки каждого поста и каскада
+        actions.pop("delete_selected", None)
+        return actions
+
+    def get_urls(self):
+        return [
+            path(
+                "moderation/<str:job_id>/",
+                self.admin_site.admin_view(self.moderation_status),
+                name="posts_post_moderation",
+            ),
+        ] + super().get_urls()
+
+    def moderation_status(self, request, job_id):
+        state = moderation.job_state(job_id)
+        if state is None:
+            raise Http404
+        return JsonResponse(state)
+
+    def _start(self, request, action, ids, **options):
+        job = moderation.start(action, ids, **options)
+        state = job.state
+        url = reverse("admin:posts_post_moderation", args=[job.id])
+        level = messages.ERROR if state["status"] == "failed" else (
+            messages.SUCCESS
+        )
+        self.message_user(request, format_html(
+            "Модерация: {} из {} строк, статус {} (<a href=\"{}\">ход</a>)",
+            state["done"], state["total"], state["status"], url,
+        ), level)
+
+    def _confirm(self, request, action, title, summary, selected,
+                 select_across=False, users=()):
+        return TemplateResponse(
+            request,
+            "admin/posts/post/moderation_confirmation.html",
+            {
+                **self.admin_site.each_context(request),
+                "opts": self.model._meta,
+                "title": title,
+                "summary": summary,
+                "users": users,
+                "action": action,
+                "selected": selected,
+                "select_across": select_across,
+                "action_checkbox_name": helpers.ACTION_CHECKBOX_NAME,
+            },
+        )
+
+    def delete_posts(self, request, queryset):
+        ids = queryset.order_by().values_list("pk", flat=True)
+        if request.POST.get("post"):
+            self._start(request, "delete_posts", ids)
+            return None
+        # при выборе всех страниц форма повторяет фильтр, а не список id
+        select_across = request.POST.get("select_across") == "1"
+        return self._confirm(
+            request, "delete_posts", "Удаление постов",
+            "Будут удалены постов: {} — вместе с комментариями.".format(
+                queryset.count()
+            ),
+            [] if select_across else list(ids),
+            select_across=select_across,
+        )
+    delete_posts.short_description = "Удалить выбранные посты"
+    delete_posts.allowed_permissions = ("delete",)
+
+    def move_to_group(self, request, queryset):
+        # поле group уже проверила action_form в response_action
+        group = request.POST.get("group")
+        self._start(
+            request, "move_posts",
+            queryset.order_by().values_list("pk", flat=True),
+            group_id=int(group) if group else None,
+        )
+    move_to_group.short_description = "Перенести в группу"
+    move_to_group.allowed_permissions = ("change",)
+
+    def purge_authors(self, request, queryset):
+        # по одному посту на автора: форме подтверждения хватает их
+        first_posts = dict(queryset.order_by().values_list(
+            "author_id"
+        ).annotate(first=Min("pk")))
+        users = User.objects.filter(pk__in=first_posts).order_by("username")
+        staff = users.filter(is_staff=True)
+        if staff.exists():
+            self.message_user(request, "Сотрудников так не удалить: {}".format(
+                ", ".join(staff.values_list("username", flat=True))
+            ), messages.ERROR)
+            return None
+        if request.POST.get("post"):
+            self._start(request, "purge_users", list(first_posts))
+            return None
+        return self._confirm(
+            request, "purge_authors", "Чистка спамеров",
+            "Будут заблокированы авторы ({}) и удалены все их посты, "
+            "комментарии и подписки.".format(len(first_posts)),
+            sorted(first_posts.values()),
+            users=users,
+        )
+    purge_authors.short_description = (
+        "Заблокировать авторов и удалить всё, что они написали"
+    )
+    purge_authors.allowed_permissions = ("delete",)
 
 
 class GroupAdmin(admin.ModelAdmin):
     list_display = ("title", "slug", "description")
+    search_fields = ("title", "slug")
 
 
-class CommentAdmin(admin.ModelAdmin):
+class CommentAdmin(IndexedSearchMixin, ScalableAdmin):
     list_display = ("text", "created", "post", "author")
+    list_select_related = ("post", "author")
     list_filter = ("created",)
-    search_fields = ("author",)
+    # по created индекса без поста нет; id растёт вместе с created
+    ordering = ("-pk",)
+    raw_id_fields = ("post",)
+    autocomplete_fields = ("author",)
+    search_comments = True
 
 
-class FollowAdmin(admin.ModelAdmin):
+class FollowAdmin(ScalableAdmin):
     list_display = ("user", "author")
+    list_select_related = ("user", "author")
+    autocomplete_fields = ("user", "author")
 
 
 admin.site.register(Post, PostAdmin)
@@ -0,0 +1,264 @@
+"""JSON API только для чтения, версия 1 (/api/v1/).
+
+Ответы собираются прямо из values(): объекты моделей не создаются,
+строки выборки — словари, которые остаётся переименовать в публичные
+поля и отдать json. ?fields=id,text сужает и саму выборку, а не
+только ответ. Списки листаются курсором (поле next в ответе,
+параметр ?cursor=), ответы сжимаются gzip, если клиент это умеет.
+"""
+from functools import wraps
+
+from django.core.serializers.json import DjangoJSONEncoder
+from django.http import JsonResponse
+from django.views.decorators.gzip import gzip_page
+from django.views.decorators.http import require_safe
+
+from yatube.replica import replica_reads
+
+from .models import Comment, Follow, Group, Post, TimelineEntry
+from .paginator import CommentPaginator, CursorPaginator, TimelinePaginator
+
+PER_PAGE = 20
+MAX_PER_PAGE = 100
+
+
+class ApiError(Exception):
+    def __init__(self, status, detail):
+        super().__init__(detail)
+        self.status = status
+        self.detail = detail
+
+
+class Projection:
+    """Публичные поля ресурса → пути в ORM для values().
+
+    required — поля, без которых не построить курсор; в выборку они
+    попадают всегда, а в ответ — только если их запросили.
+    """
+
+    def __init__(self, fields, required=("id",), urls=()):
+        self.fields = fields
+        self.required = required
+        self.urls = urls
+
+    def names(self, request):
+        raw = request.GET.get("fields")
+        if not raw:
+            return list(self.fields)
+        names = [name.strip() for name in raw.split(",") if name.strip()]
+        unknown = sorted(set(names) - set(self.fields))
+        if unknown:
+            raise ApiError(400, "Неизвестные поля: " + ", ".join(unknown))
+        return names
+
+    def values(self, queryset, names):
+        paths = {self.fields[name] for name in names}
+        paths.update(self.fields[name] for name in self.required)
+        return queryset.values(*paths)
+
+    def shaper(self, names):
+        pairs = [(name, self.fields[name]) for name in names]
+        urls = [name for name in names if name in self.urls]
+
+        def shape(row):
+            item = {name: row[path] for name, path in pairs}
+            for name in urls:
+                item[name] = self.urls[name](item[name])
+            return item
+        return shape
+
+
+def _image_url(name):
+    if not name:
+        return None
+    return Post._meta.get_field("image").storage.url(name)
+
+
+POST = Projection({
+    "id": "id",
+    "text": "text",
+    "pub_date": "pub_date",
+    "updated": "updated",
+    "author": "author__username",
+    "group": "group__slug",
+    "comment_count": "comment_count",
+    "image": "image",
+}, required=("id", "pub_date"), urls={"image": _image_url})
+
+COMMENT = Projection({
+    "id": "id",
+    "post": "post_id",
+    "author": "author__username",
+    "text": "text",
+    "created": "created",
+}, required=("id", "created"))
+
+GROUP = Projection({
+    "id": "id",
+    "slug": "slug",
+    "title": "title",
+    "description": "description",
+})
+
+FOLLOWING = Projection({
+    "id": "id",
+    "author": "author__username",
+})
+
+
+class ValuesPaginator(CursorPaginator):
+    """Курсор по строкам values(); на странице — готовые словари."""
+    key_field = "id"
+
+    def __init__(self, object_list, per_page, shape):
+        super().__init__(object_list, per_page)
+        self.shape = shape
+
+    def transform(self, rows):
+        return [self.shape(row) for row in rows]
+
+
+class CommentValuesPaginator(ValuesPaginator):
+    date_field = CommentPaginator.date_field
+    descending = CommentPaginator.descending
+
+
+class TimelineValuesPaginator(TimelinePaginator):
+    """Лента подписок: курсор по TimelineEntry, посты — одним values()."""
+
+    def __init__(self, object_list, per_page, names):
+        super().__init__(object_list, per_page)
+        self.names = names
+
+    def transform(self, rows):
+        ids = [entry.post_id for entry in rows]
+        posts = POST.values(Post.objects.filter(id__in=ids), self.names)
+        shape = POST.shaper(self.names)
+        by_id = {row["id"]: shape(row) for row in posts}
+        return [by_id[pk] for pk in ids if pk in by_id]
+
+
+def _per_page(request):
+    try:
+        return min(max(int(request.GET.get("limit", PER_PAGE)), 1),
+                   MAX_PER_PAGE)
+    except ValueError:
+        raise ApiError(400, "limit должен быть числом")
+
+
+def _page(request, paginator):
+    page = paginator.get_page(request.GET.get("cursor"))
+    return {"results": list(page), "next": page.next_cursor}
+
+
+def _id_page(request, queryset, projection):
+    """Короткие справочники листаются по id: ?cursor=<последний id>."""
+    names = projection.names(request)
+    per_page = _per_page(request)
+    cursor = request.GET.get("cursor")
+    if cursor:
+        if not cursor.isdigit():
+            raise ApiError(400, "Неверный курсор")
+        queryset = queryset.filter(id__gt=int(cursor))
+    rows = list(projection.values(queryset.order_by("id"), names)
+                [:per_page + 1])
+    shape = projection.shaper(names)
+    has_next = len(rows) > per_page
+    rows = rows[:per_page]
+    return {
+        "results": [shape(row) for row in rows],
+        "next": str(rows[-1]["id"]) if has_next else None,
+    }
+
+
+def _detail(request, queryset, projection, **lookup):
+    names = projection.names(request)
+    row = projection.values(queryset.filter(**lookup), names).first()
+    if row is None:
+        raise ApiError(404, "Не найдено")
+    return projection.shaper(names)(row)
+
+
+def api_view(view):
+    """GET/HEAD, чтение с реплики, gzip и ошибки в виде JSON."""
+    @gzip_page
+    @require_safe
+    @replica_reads
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        try:
+            data = view(request, *args, **kwargs)
+        except ApiError as error:
+            return JsonResponse(
+                {"detail": error.detail}, status=error.status
+            )
+        return JsonResponse(
+            data,
+            encoder=DjangoJSONEncoder,
+            json_dumps_params={"ensure_ascii": False},
+        )
+    return wrapper
+
+
+@api_view
+def post_list(request):
+    posts = Post.objects.all()
+    if request.GET.get("group"):
+        posts = posts.filter(group__slug=request.GET["group"])
+    if request.GET.get("author"):
+        posts = posts.filter(author__username=request.GET["author"])
+    names = POST.names(request)
+    paginator = ValuesPaginator(
+        POST.values(posts, names), _per_page(request), POST.shaper(names)
+    )
+    return _page(request, paginator)
+
+
+@api_view
+def post_detail(request, post_id):
+    return _detail(request, Post.objects.all(), POST, id=post_id)
+
+
+@api_view
+def comment_list(request, post_id):
+    if not Post.objects.filter(id=post_id).exists():
+        raise ApiError(404, "Не найдено")
+    names = COMMENT.names(request)
+    paginator = CommentValuesPaginator(
+        COMMENT.values(Comment.objects.filter(post_id=post_id), names),
+        _per_page(request),
+        COMMENT.shaper(names),
+    )
+    return _page(request, paginator)
+
+
+@api_view
+def group_list(request):
+    return _id_page(request, Group.objects.all(), GROUP)
+
+
+@api_view
+def group_detail(request, slug):
+    return _detail(request, Group.objects.all(), GROUP, slug=slug)
+
+
+@api_view
+def follow_feed(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, "Нужна авторизация")
+    entries = TimelineEntry.objects.filter(user=request.user).only(
+        "id", "post_id", "pub_date"
+    )
+    paginator = TimelineValuesPaginator(
+        entries, _per_page(request), POST.names(request)
+    )
+    return _page(request, paginator)
+
+
+@api_view
+def following_list(request):
+    if not request.user.is_authenticated:
+        raise ApiError(401, "Нужна авторизация")
+    return _id_page(
+        request, Follow.objects.filter(user=request.user), FOLLOWING
+    )
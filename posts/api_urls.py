@@ -0,0 +1,19 @@
+from django.urls import path
+
+from . import api
+
+app_name = "api"
+
+urlpatterns = [
+    path("posts/", api.post_list, name="post_list"),
+    path("posts/<int:post_id>/", api.post_detail, name="post_detail"),
+    path(
+        "posts/<int:post_id>/comments/",
+        api.comment_list,
+        name="comment_list"
+    ),
+    path("groups/", api.group_list, name="group_list"),
+    path("groups/<slug:slug>/", api.group_detail, name="group_detail"),
+    path("follow/", api.follow_feed, name="follow_feed"),
+    path("following/", api.following_list, name="following_list"),
+]
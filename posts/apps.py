@@ -1,5 +1,18 @@
 from django.apps import AppConfig
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import post_migrate
 
 
 class PostsConfig(AppConfig):
     name = "posts"
+
+    def ready(self):
+        from . import signals  # noqa: F401
+        post_migrate.connect(install_search, sender=self)
+
+
+def install_search(using=DEFAULT_DB_ALIAS, **kwargs):
+    """Создаёт индекс поиска после migrate (и в тестовой базе)."""
+    from .search import get_backend
+
+    get_backend().install(using)
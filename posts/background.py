@@ -0,0 +1,51 @@
+"""Общие пулы фоновой работы: запросы страницы, модерация, миниатюры.
+
+Пул создаётся при первом обращении и живёт до конца процесса.
+run_inline() решает, можно ли вообще отдать работу с базой в другой
+поток или процесс: незафиксированную транзакцию и базу в памяти
+(тесты) они не видят.
+"""
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from django.db import close_old_connections, connection
+
+_executors = {}
+_lock = threading.Lock()
+
+
+def executor(name, factory):
+    """Пул name; factory() создаёт его при первом обращении."""
+    with _lock:
+        if name not in _executors:
+            _executors[name] = factory()
+        return _executors[name]
+
+
+def thread_pool(name, workers):
+    return executor(name, lambda: ThreadPoolExecutor(
+        max_workers=workers, thread_name_prefix="yatube-" + name,
+    ))
+
+
+def shared_database():
+    """База видна другим процессам: не в памяти."""
+    is_in_memory = getattr(connection, "is_in_memory_db", None)
+    return not (is_in_memory and is_in_memory())
+
+
+def run_inline(workers):
+    """Работу надо выполнить в текущем потоке: пул выключен (workers
+    = 0), идёт транзакция или база в памяти."""
+    return (
+        not workers or connection.in_atomic_block or not shared_database()
+    )
+
+
+def closing_connections(func, *args):
+    """Вызывает func в потоке пула и закрывает его старые соединения."""
+    try:
+        return func(*args)
+    finally:
+        # соединение потока живёт не дольше CONN_MAX_AGE, как у запроса
+        close_old_connections()
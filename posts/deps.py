@@ -0,0 +1,41 @@
+"""Какие страницы лент задевает изменение постов.
+
+Зависимости — пары (kind, ident) для posts/feed_cache.py: пост виден на
+своей странице, в общей ленте, в профиле автора и в ленте группы.
+Общий список для сигналов и для пакетных операций, которые сигналы
+обходят (модерация, хранилище картинок, миниатюры).
+"""
+from django.db.models import QuerySet
+
+from . import feed_cache
+from .models import Group
+
+
+def post_deps(posts):
+    """Зависимости страниц с постами posts.
+
+    posts — QuerySet или список экземпляров Post. У экземпляра,
+    сменившего группу, задета и прежняя (_old_group_id, см.
+    signals.post_changing).
+    """
+    if isinstance(posts, QuerySet):
+        rows = list(posts.values_list("pk", "author__username", "group_id"))
+        group_ids = {group_id for _, _, group_id in rows}
+    else:
+        rows = [(post.pk, post.author.username, post.group_id)
+                for post in posts]
+        group_ids = {post.group_id for post in posts}
+        group_ids.update(
+            getattr(post, "_old_group_id", None) for post in posts
+        )
+    deps = [(feed_cache.INDEX,)]
+    deps.extend((feed_cache.POST, pk) for pk, _, _ in rows)
+    deps.extend(
+        (feed_cache.AUTHOR, username)
+        for username in sorted({username for _, username, _ in rows})
+    )
+    slugs = Group.objects.filter(pk__in=group_ids - {None}).values_list(
+        "slug", flat=True
+    )
+    deps.extend((feed_cache.GROUP, slug) for slug in slugs)
+    return deps
@@ -0,0 +1,235 @@
+"""Кэш готовых страниц лент и условные GET.
+
+Каждая страница зависит от нескольких «поколений» — счётчиков вида
+feed-gen:group:<slug>. Запись в кэше хранит поколения, с которыми
+она была отрендерена; изменение данных увеличивает только свои
+счётчики, и устаревшие страницы перестают совпадать без общего
+сброса кэша.
+
+Те же поколения — дешёвый штамп версии ресурса: из них и времени
+последнего изменения (feed-mtime:...) строятся ETag и Last-Modified,
+и повторный запрос с If-None-Match / If-Modified-Since получает 304
+без обращения к базе и без рендеринга шаблона. Валидаторы выдаются,
+только если кэш общий для всех процессов (FEED_CONDITIONAL_GET): с
+locmem поколения у каждого воркера свои, и другой процесс ответил бы
+304 на уже изменившуюся страницу.
+"""
+import hashlib
+import time
+from functools import wraps
+
+from django.conf import settings
+from django.core.cache import caches
+from django.db import transaction
+from django.http import HttpResponse
+from django.utils.cache import (
+    get_conditional_response, patch_cache_control, patch_vary_headers
+)
+from django.utils.http import http_date
+from yatube import replica
+from yatube.metrics import count as count_request
+
+INDEX = "index"
+GROUP = "group"
+AUTHOR = "author"
+POST = "post"
+
+METRICS = ("hit", "miss", "stale", "bytes")
+# Параметры запроса, которые меняют содержимое страницы.
+PAGE_PARAMS = ("cursor", "page", "comments")
+
+
+def _cache():
+    return caches[getattr(settings, "FEED_CACHE_ALIAS", "default")]
+
+
+def _timeout():
+    timeout = getattr(settings, "FEED_CACHE_TIMEOUT", 300)
+    if replica.reading():
+        # реплика может отставать: страница с неё могла не увидеть
+        # запись, которая уже увеличила поколение, — храним недолго
+        return min(timeout, getattr(settings, "REPLICA_STICKY_SECONDS", 10))
+    return timeout
+
+
+def _generation_key(kind, ident=""):
+    return "feed-gen:{}:{}".format(kind, ident)
+
+
+def _mtime_key(kind, ident=""):
+    return "feed-mtime:{}:{}".format(kind, ident)
+
+
+def _seed():
+    # Новое поколение начинается с текущего времени, а не с 1: после
+    # потери кэша ETag не совпадут со старыми, выданными раньше.
+    return int(time.time() * 1000)
+
+
+def _count(metric, amount=1):
+    count_request("cache_" + metric, amount)
+    cache = _cache()
+    key = "feed-metric:" + metric
+    cache.add(key, 0, None)
+    try:
+        cache.incr(key, amount)
+    except ValueError:
+        # ключ вытеснили между add и incr
+        cache.set(key, amount, None)
+
+
+def _page_key(request, view_name):
+    params = "&".join(
+        "{}={}".format(name, request.GET.get(name, ""))
+        for name in PAGE_PARAMS
+    )
+    digest = hashlib.md5(
+        "{}?{}".format(request.path, params).encode()
+    ).hexdigest()
+    return "feed-page:{}:{}".format(view_name, digest)
+
+
+def versions(deps):
+    """Поколения зависимостей и время их последнего изменения.
+
+    Одно чтение из кэша. Отсутствующие ключи заводятся заново, время
+    изменения у них — «сейчас».
+    """
+    cache = _cache()
+    keys = [_generation_key(*dep) for dep in deps]
+    mtime_keys = [_mtime_key(*dep) for dep in deps]
+    found = cache.get_many(keys + mtime_keys)
+    now = time.time()
+    result = []
+    for key, mtime_key in zip(keys, mtime_keys):
+        if key not in found:
+            seed = _seed()
+            cache.add(key, seed, None)
+            cache.add(mtime_key, now, None)
+            found[key] = cache.get(key, seed)
+        result.append(found[key])
+    modified = max(
+        (found.get(key, now) for key in mtime_keys), default=now
+    )
+    return tuple(result), modified
+
+
+def bump(*deps):
+    """Увеличивает поколения; страницы с ними станут устаревшими."""
+    cache = _cache()
+    now = time.time()
+    for dep in deps:
+        key = _generation_key(*dep)
+        cache.set(_mtime_key(*dep), now, None)
+        if cache.add(key, _seed(), None):
+            continue
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, _seed(), None)
+
+
+def bump_on_commit(*deps):
+    """bump() сейчас и ещё раз после COMMIT текущей транзакции.
+
+    Читатель, увидевший новое поколение до COMMIT, мог положить в кэш
+    страницу со старыми данными под ним; второй bump делает её
+    устаревшей. Первый нужен самой транзакции: её следующие запросы
+    (и тесты на TestCase, где COMMIT не наступает) видят свежие страницы.
+    """
+    deps = list(deps)
+    bump(*deps)
+    if transaction.get_connection().in_atomic_block:
+        transaction.on_commit(lambda: bump(*deps))
+
+
+def metrics():
+    cache = _cache()
+    found = cache.get_many(["feed-metric:" + name for name in METRICS])
+    return {
+        name: found.get("feed-metric:" + name, 0) for name in METRICS
+    }
+
+
+def reset_metrics():
+    _cache().delete_many(["feed-metric:" + name for name in METRICS])
+
+
+def _etag(request, current):
+    # разметка зависит от пользователя (меню, кнопки), не только от данных
+    user = request.user.pk if request.user.is_authenticated else 0
+    raw = "{}:{}".format(user, current)
+    return '"{}"'.format(hashlib.md5(raw.encode()).hexdigest())
+
+
+def _conditional():
+    return getattr(settings, "FEED_CONDITIONAL_GET", False)
+
+
+def _set_validators(request, response, etag, modified):
+    if not _conditional():
+        return response
+    if request.method not in ("GET", "HEAD") or response.status_code != 200:
+        return response
+    response["ETag"] = etag
+    response["Last-Modified"] = http_date(modified)
+    # всегда перепроверять; чужие страницы в общих кэшах не хранить
+    patch_cache_control(
+        response, no_cache=True, private=request.user.is_authenticated
+    )
+    patch_vary_headers(response, ("Cookie",))
+    return response
+
+
+def cached_feed(get_deps):
+    """Кэширует ответ view для анонимов и отвечает 304 на условные GET.
+
+    get_deps(**kwargs) возвращает список зависимостей (kind, ident)
+    по аргументам URL; в ключ попадают путь и PAGE_PARAMS, так что
+    каждая страница курсора хранится отдельно. Для анонимов текущие
+    поколения лежат в request.feed_generation — для ключей фрагментов.
+    """
+    def decorator(view):
+        @wraps(view)
+        def wrapper(request, **kwargs):
+            if request.method not in ("GET", "HEAD"):
+                return view(request, **kwargs)
+            current, modified = versions(get_deps(**kwargs))
+            etag = _etag(request, current)
+            if _conditional():
+                not_modified = get_conditional_response(
+                    request, etag=etag, last_modified=int(modified)
+                )
+                if not_modified is not None:
+                    return _set_validators(
+                        request, not_modified, etag, modified
+                    )
+            if request.user.is_authenticated:
+                response = view(request, **kwargs)
+                return _set_validators(request, response, etag, modified)
+            # фрагменты {% cache %} в шаблоне ключуются поколением, иначе
+            # промах отрендерил бы старый фрагмент под новым поколением
+            request.feed_generation = "-".join(map(str, current))
+            cache = _cache()
+            key = _page_key(request, view.__name__)
+            entry = cache.get(key)
+            if entry is not None:
+                stored, content, content_type = entry
+                if stored == current:
+                    _count("hit")
+                    response = HttpResponse(content, content_type=content_type)
+                    return _set_validators(request, response, etag, modified)
+                _count("stale")
+            else:
+                _count("miss")
+            response = view(request, **kwargs)
+            if response.status_code == 200 and not response.streaming:
+                cache.set(
+                    key,
+                    (current, response.content, response["Content-Type"]),
+                    _timeout(),
+                )
+                _count("bytes", len(response.content))
+            return _set_validators(request, response, etag, modified)
+        return wrapper
+    return decorator
@@ -12,6 +12,16 @@ class PostForm(forms.ModelForm):
             "text": "Пост"
         }
 
+    def clean(self):
+        cleaned_data = super().clean()
+        # ImageUploadHandler отклонил файл ещё при приёме: вместо общей
+        # ошибки «не картинка» показываем причину отказа
+        rejection = getattr(self.files.get("image"), "rejection", None)
+        if rejection:
+            self.errors.pop("image", None)
+            self.add_error("image", rejection)
+        return cleaned_data
+
 
 class CommentForm(forms.ModelForm):
     text = forms.CharField(widget=forms.Textarea)
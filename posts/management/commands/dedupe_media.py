@@ -0,0 +1,31 @@
+from django.core.management.base import BaseCommand
+
+from posts import storage
+
+
+class Command(BaseCommand):
+    help = (
+        "Переносит старые картинки постов в хэш-имена и удаляет файлы, "
+        "на которые не ссылается ни один пост"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--dry-run", action="store_true",
+            help="Только показать, что будет сделано"
+        )
+        parser.add_argument(
+            "--grace", type=int, default=24,
+            help="Не удалять файлы моложе стольких часов"
+        )
+
+    def handle(self, *args, **options):
+        dry_run = options["dry_run"]
+        moved = storage.migrate_legacy(dry_run)
+        removed = storage.collect_garbage(options["grace"] * 3600, dry_run)
+        for name in removed:
+            self.stdout.write(name)
+        prefix = "Будет" if dry_run else "Готово"
+        self.stdout.write(self.style.SUCCESS(
+            f"{prefix}: перенесено {moved}, удалено файлов {len(removed)}"
+        ))
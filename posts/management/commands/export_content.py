@@ -0,0 +1,39 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоково выгружает группы, посты, комментарии и подписки "
+        "в JSON Lines или CSV"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Каталог выгрузки")
+        parser.add_argument(
+            "--format", choices=transfer.FORMATS, default="jsonl"
+        )
+        parser.add_argument(
+            "--media", action="store_true",
+            help="Скопировать и файлы картинок (в подкаталог media)"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8,
+            help="Потоки для копирования картинок"
+        )
+        parser.add_argument(
+            "--chunk-size", type=int, default=2000,
+            help="Строк за одно чтение из базы"
+        )
+
+    def handle(self, *args, **options):
+        transfer.export(
+            options["directory"],
+            file_format=options["format"],
+            media=options["media"],
+            workers=options["workers"],
+            chunk_size=options["chunk_size"],
+            write=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS("Выгрузка готова"))
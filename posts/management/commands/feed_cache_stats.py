@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand
+
+from posts import feed_cache
+
+
+class Command(BaseCommand):
+    help = "Показывает попадания, промахи и устаревания кэша лент"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--reset", action="store_true", help="Обнулить счётчики"
+        )
+
+    def handle(self, *args, **options):
+        stats = feed_cache.metrics()
+        lookups = stats["hit"] + stats["miss"] + stats["stale"]
+        ratio = stats["hit"] / lookups if lookups else 0
+        for name, value in stats.items():
+            self.stdout.write(f"{name}: {value}")
+        self.stdout.write(f"hit ratio: {ratio:.2%}")
+        if options["reset"]:
+            feed_cache.reset_metrics()
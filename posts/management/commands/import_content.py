@@ -0,0 +1,51 @@
+from django.core.management.base import BaseCommand
+
+from posts import transfer
+
+
+class Command(BaseCommand):
+    help = (
+        "Потоково загружает выгрузку export_content: пачками bulk_create, "
+        "по нескольку пачек в транзакции"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("directory", help="Каталог выгрузки")
+        parser.add_argument(
+            "--format", choices=transfer.FORMATS, default="jsonl"
+        )
+        parser.add_argument(
+            "--media", action="store_true",
+            help="Загрузить и файлы картинок из подкаталога media"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=8,
+            help="Потоки для копирования картинок"
+        )
+        parser.add_argument(
+            "--batch-size", type=int, default=1000,
+            help="Строк в одном bulk_create"
+        )
+        parser.add_argument(
+            "--transaction-size", type=int, default=20000,
+            help="Строк в одной транзакции"
+        )
+        parser.add_argument(
+            "--skip-rebuild", action="store_true",
+            help="Не пересобирать ленты, счётчики и поиск после загрузки"
+        )
+
+    def handle(self, *args, **options):
+        loaded = transfer.load(
+            options["directory"],
+            file_format=options["format"],
+            media=options["media"],
+            workers=options["workers"],
+            batch_size=options["batch_size"],
+            transaction_size=options["transaction_size"],
+            write=self.stdout.write,
+        )
+        if not options["skip_rebuild"]:
+            transfer.rebuild_derived(write=self.stdout.write)
+        total = sum(loaded.values())
+        self.stdout.write(self.style.SUCCESS(f"Загружено строк: {total}"))
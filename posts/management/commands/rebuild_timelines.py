@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import timeline
+
+
+class Command(BaseCommand):
+    help = "Пересобирает материализованные ленты подписок с нуля"
+
+    def handle(self, *args, **options):
+        follows = timeline.rebuild_all()
+        self.stdout.write(
+            self.style.SUCCESS(f"Ленты пересобраны, подписок: {follows}")
+        )
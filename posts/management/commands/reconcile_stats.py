@@ -0,0 +1,13 @@
+from django.core.management.base import BaseCommand
+
+from posts import stats
+
+
+class Command(BaseCommand):
+    help = "Пересчитывает счётчики постов и подписок в профилях"
+
+    def handle(self, *args, **options):
+        fixed = stats.reconcile()
+        self.stdout.write(
+            self.style.SUCCESS(f"Счётчики сверены, исправлено: {fixed}")
+        )
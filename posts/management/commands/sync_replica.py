@@ -0,0 +1,29 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from yatube.replica import replicate
+
+
+class Command(BaseCommand):
+    help = (
+        "Копирует основную SQLite-базу в реплику (YATUBE_REPLICA); "
+        "с --interval повторяет, изображая отставание репликации"
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--interval", type=float, default=0,
+            help="Повторять каждые столько секунд"
+        )
+
+    def handle(self, *args, **options):
+        if not settings.REPLICA_DATABASE:
+            raise CommandError("Реплика не настроена: задайте YATUBE_REPLICA")
+        while True:
+            replicate()
+            self.stdout.write(self.style.SUCCESS("Реплика обновлена"))
+            if not options["interval"]:
+                break
+            time.sleep(options["interval"])
@@ -0,0 +1,29 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from posts import thumbnails
+from posts.models import Post
+
+
+class Command(BaseCommand):
+    help = "Заранее делает адаптивные копии картинок существующих постов"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--all", action="store_true",
+            help="Пересоздать и уже готовые копии"
+        )
+        parser.add_argument(
+            "--workers", type=int, default=settings.THUMBNAIL_WORKERS or 1,
+            help="Число процессов"
+        )
+
+    def handle(self, *args, **options):
+        posts = Post.objects.exclude(image="").exclude(image=None)
+        if not options["all"]:
+            posts = posts.filter(image_variants="")
+        post_ids = list(posts.values_list("id", flat=True))
+        done = thumbnails.generate_many(
+            post_ids, options["workers"], force=options["all"]
+        )
+        self.stdout.write(self.style.SUCCESS(f"Картинок обработано: {done}"))
@@ -0,0 +1,51 @@
+from django.db import migrations, models
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+import posts.storage
+
+
+def fill_post_fields(apps, schema_editor):
+    """updated — дата публикации, comment_count — по факту."""
+    Post = apps.get_model("posts", "Post")
+    Comment = apps.get_model("posts", "Comment")
+    comments = Comment.objects.filter(post=OuterRef("pk")).order_by()
+    Post.objects.update(
+        updated=F("pub_date"),
+        comment_count=Coalesce(Subquery(
+            comments.values("post").annotate(total=Count("pk")).values(
+                "total"
+            )
+        ), 0),
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('posts', '0002_feed_indexes'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='post',
+            name='updated',
+            field=models.DateTimeField(auto_now=True, verbose_name='date updated'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='image_variants',
+            field=models.TextField(blank=True, editable=False, help_text='JSON с srcset готовых копий, см. posts/thumbnails.py', verbose_name='Копии картинки'),
+        ),
+        migrations.AddField(
+            model_name='post',
+            name='comment_count',
+            field=models.PositiveIntegerField(default=0, editable=False, verbose_name='Комментариев'),
+        ),
+        migrations.AlterField(
+            model_name='post',
+            name='image',
+            field=models.ImageField(blank=True, help_text='Загрузите картинку', null=True, storage=posts.storage.ContentAddressedStorage(), upload_to='posts/', verbose_name='Картинка'),
+        ),
+        migrations.RunPython(fill_post_fields, migrations.RunPython.noop),
+    ]
@@ -1,6 +1,10 @@
+import json
+
 from django.db import models
 from django.contrib.auth import get_user_model
 
+from .storage import post_image_storage
+
 User = get_user_model()
 
 
@@ -25,36 +29,91 @@ class Group(models.Model):
         return self.title
 
 
+class PostQuerySet(models.QuerySet):
+    # Колонки, которые читает post_item.html.
+    FEED_FIELDS = (
+        "id", "text", "pub_date", "updated", "image", "image_variants",
+        "author__id", "author__username",
+        "group__id", "group__slug", "group__title", "comment_count",
+    )
+
+    def for_feed(self):
+        """Посты для ленты: автор и группа одним JOIN, без лишних колонок."""
+        return self.select_related("author", "group").only(*self.FEED_FIELDS)
+
+
 class Post(models.Model):
     text = models.TextField(
         verbose_name="Пост",
         help_text="Напишите свой пост"
     )
     pub_date = models.DateTimeField("date published", auto_now_add=True)
+    updated = models.DateTimeField("date updated", auto_now=True)
     author = models.ForeignKey(
         User,
         on_delete=models.CASCADE,
+        # покрыт составным post_author_date_idx
+        db_index=False,
         related_name="posts")
     group = models.ForeignKey(
         Group,
         on_delete=models.SET_NULL,
+        db_index=False,
         blank=True,
         null=True,
         related_name="group_posts")
     image = models.ImageField(
         verbose_name="Картинка",
         upload_to="posts/",
+        storage=post_image_storage,
         blank=True,
         null=True,
         help_text="Загрузите картинку"
     )
+    image_variants = models.TextField(
+        verbose_name="Копии картинки",
+        blank=True,
+        editable=False,
+        help_text="JSON с srcset готовых копий, см. posts/thumbnails.py"
+    )
+    comment_count = models.PositiveIntegerField(
+        verbose_name="Комментариев",
+        default=0,
+        editable=False,
+    )
+
+    objects = PostQuerySet.as_manager()
 
     class Meta:
-        ordering = ["-pub_date"]
+        ordering = ["-pub_date", "-id"]
+        # Индексы повторяют фильтр и порядок лент: выборка страницы —
+        # один проход по индексу без сортировки.
+        indexes = [
+            models.Index(
+                fields=["-pub_date", "-id"],
+                name="post_date_idx"
+            ),
+            models.Index(
+                fields=["author", "-pub_date", "-id"],
+                name="post_author_date_idx"
+            ),
+            models.Index(
+                fields=["group", "-pub_date", "-id"],
+                name="post_group_date_idx"
+            ),
+        ]
 
     def __str__(self) -> str:
         return self.text[:15]
 
+    @property
+    def variants(self):
+        try:
+            variants = json.loads(self.image_variants)
+        except ValueError:
+            return {}
+        return variants if isinstance(variants, dict) else {}
+
 
 class Comment(models.Model):
     text = models.TextField(
@@ -68,6 +127,7 @@ class Comment(models.Model):
     post = models.ForeignKey(
         Post,
         on_delete=models.CASCADE,
+        db_index=False,
         related_name="comments",
     )
     author = models.ForeignKey(
@@ -77,7 +137,13 @@ class Comment(models.Model):
     )
 
     class Meta:
-        ordering = ["created"]
+        ordering = ["created", "id"]
+        indexes = [
+            models.Index(
+                fields=["post", "created", "id"],
+                name="comment_post_created_idx"
+            ),
+        ]
 
     def __str__(self):
         return "Комментарий от {} для поста {}".format(self.author, self.post)
@@ -105,3 +171,68 @@ class Follow(models.Model):
                 name="unique_subs"
             )
         ]
+
+
+class TimelineEntry(models.Model):
+    """Материализованная лента подписок: строка на пару (читатель, пост).
+
+    pub_date копируется из поста, чтобы лента читалась одним
+    диапазоном по индексу (user, pub_date, post).
+    """
+    user = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="timeline",
+    )
+    post = models.ForeignKey(
+        Post,
+        on_delete=models.CASCADE,
+        related_name="timeline_entries",
+    )
+    author = models.ForeignKey(
+        User,
+        on_delete=models.CASCADE,
+        related_name="+",
+    )
+    pub_date = models.DateTimeField()
+
+    class Meta:
+        constraints = [
+            models.UniqueConstraint(
+                fields=["user", "post"],
+                name="unique_timeline_entry"
+            )
+        ]
+        indexes = [
+            models.Index(
+                fields=["user", "-pub_date", "-post"],
+                name="timeline_user_date_idx"
+            ),
+            models.Index(
+                fields=["user", "author"],
+                name="timeline_user_author_idx"
+            ),
+        ]
+
+    def __str__(self):
+        return "Пост {} в ленте {}".format(self.post_id, self.user)
+
+
+class UserStats(models.Model):
+    """Денормализованные счётчики профиля.
+
+    Обновляются вместе с созданием и удалением Post и Follow,
+    расхождения чинит команда reconcile_stats.
+    """
+    user = models.OneToOneField(
+        User,
+        on_delete=models.CASCADE,
+        primary_key=True,
+        related_name="stats",
+    )
+    post_count = models.PositiveIntegerField(default=0)
+    follower_count = models.PositiveIntegerField(default=0)
+    following_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return "Статистика {}".format(self.user)
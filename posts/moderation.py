@@ -0,0 +1,251 @@
+"""Массовая модерация: удаление постов, перенос в группу, чистка спамера.
+
+Стандартное удаление в админке загружает каждый объект и каскад его
+комментариев построчно, а сигналы правят счётчики и индекс по одной
+записи. Здесь работа идёт пачками по MODERATION_CHUNK_SIZE id: на пачку
+несколько DELETE и UPDATE, счётчики затронутых пользователей и постов
+пересчитываются одним запросом, поиск и кэш лент обновляются один раз.
+
+Задача выполняется в фоновом потоке, её ход хранится в кэше (job_state)
+и виден в админке — поэтому в фоне она идёт, только если кэш общий для
+всех процессов: с locmem запрос хода попал бы в другой воркер и получил
+404. При MODERATION_WORKERS = 0, с кэшем в памяти процесса, внутри
+транзакции и с базой в памяти (тесты) задача выполняется сразу, в
+запросе. Перезапуск процесса прерывает фоновую задачу: её ход остаётся
+«running» до истечения JOB_TIMEOUT, а действие можно повторить — уже
+удалённые и перенесённые посты оно пропустит.
+"""
+import logging
+import uuid
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache, caches
+from django.core.cache.backends.locmem import LocMemCache
+from django.db import transaction
+from django.db.models import Q
+from django.utils import timezone
+
+from . import background, feed_cache, stats
+from .deps import post_deps
+from .models import Comment, Follow, Group, Post, TimelineEntry
+from .search import get_backend
+
+logger = logging.getLogger(__name__)
+
+User = get_user_model()
+
+# ход задачи хранится сутки после последнего обновления
+JOB_TIMEOUT = 24 * 60 * 60
+
+
+def _chunks(ids):
+    ids = sorted(set(ids))
+    size = settings.MODERATION_CHUNK_SIZE
+    for start in range(0, len(ids), size):
+        yield ids[start:start + size]
+
+
+def _raw_delete(queryset):
+    # без Collector: он загрузил бы каждую строку ради сигналов,
+    # а их работу эта пачка делает сама
+    return queryset._raw_delete(queryset.db)
+
+
+def _usernames(user_ids):
+    return User.objects.filter(pk__in=user_ids).values_list(
+        "username", flat=True
+    )
+
+
+class Job:
+    """Ход задачи в кэше: действие, статус, сколько строк из скольких."""
+
+    def __init__(self, action, job_id=None):
+        self.id = job_id or uuid.uuid4().hex
+        self.state = {
+            "action": action,
+            "status": "queued",
+            "total": 0,
+            "done": 0,
+            "error": "",
+        }
+
+    @staticmethod
+    def key(job_id):
+        return "moderation-job:{}".format(job_id)
+
+    def update(self, **changes):
+        self.state.update(changes)
+        cache.set(self.key(self.id), self.state, JOB_TIMEOUT)
+
+    def add(self, rows):
+        self.update(done=self.state["done"] + rows)
+
+
+def job_state(job_id):
+    return cache.get(Job.key(job_id))
+
+
+# --- пачки ------------------------------------------------------------
+
+def _delete_posts_chunk(post_ids):
+    posts = Post.objects.filter(pk__in=post_ids)
+    with transaction.atomic():
+        # id читаются в той же транзакции, что и удаление: комментарий,
+        # добавленный между чтением и DELETE, остался бы в индексе
+        author_ids = set(posts.values_list("author_id", flat=True))
+        deps = post_deps(posts)
+        comment_ids = list(Comment.objects.filter(
+            post_id__in=post_ids
+        ).values_list("pk", flat=True))
+        # у TimelineEntry нет сигналов, delete() — один DELETE
+        TimelineEntry.objects.filter(post_id__in=post_ids).delete()
+        _raw_delete(Comment.objects.filter(pk__in=comment_ids))
+        deleted = _raw_delete(posts)
+        stats.recount(author_ids)
+        get_backend().remove_many(post_ids, comment_ids)
+    feed_cache.bump(*deps)
+    return deleted
+
+
+def _delete_comments_chunk(rows):
+    """rows — пары (id комментария, id поста)."""
+    comment_ids = [pk for pk, _ in rows]
+    post_ids = {post_id for _, post_id in rows}
+    with transaction.atomic():
+        deleted = _raw_delete(Comment.objects.filter(pk__in=comment_ids))
+        stats.recount_comments(post_ids)
+        get_backend().remove_many(comment_ids=comment_ids)
+    # число комментариев видно в карточках постов на всех лентах
+    deps = post_deps(Post.objects.filter(pk__in=post_ids))
+    feed_cache.bump(*deps)
+    return deleted
+
+
+def _move_posts_chunk(post_ids, group_id):
+    posts = Post.objects.filter(pk__in=post_ids)
+    deps = post_deps(posts)
+    moved = posts.update(group_id=group_id, updated=timezone.now())
+    if group_id is not None:
+        deps.extend(
+            (feed_cache.GROUP, slug) for slug in Group.objects.filter(
+                pk=group_id
+            ).values_list("slug", flat=True)
+        )
+    feed_cache.bump(*deps)
+    return moved
+
+
+def _delete_follows(user_id):
+    follows = Follow.objects.filter(Q(user_id=user_id) | Q(author_id=user_id))
+    rows = list(follows.values_list("user_id", "author_id"))
+    user_ids = {user_id}
+    for follower_id, author_id in rows:
+        user_ids.update((follower_id, author_id))
+    with transaction.atomic():
+        # посты спамера из чужих лент ушли вместе с постами
+        TimelineEntry.objects.filter(user_id=user_id).delete()
+        deleted = _raw_delete(follows)
+        stats.recount(user_ids)
+    feed_cache.bump(
+        *((feed_cache.AUTHOR, name) for name in _usernames(user_ids))
+    )
+    return deleted
+
+
+# --- действия ---------------------------------------------------------
+
+def delete_posts(post_ids, job):
+    """Удаляет посты вместе с комментариями и записями лент."""
+    post_ids = list(post_ids)
+    job.update(total=len(post_ids))
+    for chunk in _chunks(post_ids):
+        _delete_posts_chunk(chunk)
+        job.add(len(chunk))
+
+
+def move_posts(post_ids, job, group_id=None):
+    """Переносит посты в группу group_id (None — убрать из группы)."""
+    post_ids = list(post_ids)
+    job.update(total=len(post_ids))
+    for chunk in _chunks(post_ids):
+        _move_posts_chunk(chunk, group_id)
+        job.add(len(chunk))
+
+
+def purge_users(user_ids, job):
+    """Удаляет посты, комментарии и подписки пользователей и блокирует их.
+
+    Ход — в строках: посты, затем комментарии к чужим постам и подписки.
+    """
+    user_ids = sorted(set(user_ids))
+    size = settings.MODERATION_CHUNK_SIZE
+    # комментарии к своим постам уходят вместе с постами
+    job.update(total=(
+        Post.objects.filter(author_id__in=user_ids).count()
+        + Comment.objects.filter(author_id__in=user_ids).exclude(
+            post__author_id__in=user_ids
+        ).count()
+        + Follow.objects.filter(
+            Q(user_id__in=user_ids) | Q(author_id__in=user_ids)
+        ).count()
+    ))
+    for user_id in user_ids:
+        User.objects.filter(pk=user_id).update(is_active=False)
+        posts = Post.objects.filter(author_id=user_id).order_by("pk")
+        while True:
+            chunk = list(posts.values_list("pk", flat=True)[:size])
+            if not chunk:
+                break
+            job.add(_delete_posts_chunk(chunk))
+        comments = Comment.objects.filter(author_id=user_id).order_by("pk")
+        while True:
+            rows = list(comments.values_list("pk", "post_id")[:size])
+            if not rows:
+                break
+            job.add(_delete_comments_chunk(rows))
+        job.add(_delete_follows(user_id))
+
+
+ACTIONS = {
+    "delete_posts": delete_posts,
+    "move_posts": move_posts,
+    "purge_users": purge_users,
+}
+
+
+# --- запуск -----------------------------------------------------------
+
+def _inline():
+    """Ход задачи из кэша процесса не виден другим воркерам."""
+    return (
+        background.run_inline(settings.MODERATION_WORKERS)
+        or isinstance(caches["default"], LocMemCache)
+    )
+
+
+def _run(job, ids, options):
+    """Ошибка не пробрасывается: её видно в ходе задачи и в логе."""
+    job.update(status="running")
+    try:
+        ACTIONS[job.state["action"]](ids, job, **options)
+    except Exception as error:
+        logger.exception("Задача модерации %s не выполнена", job.id)
+        job.update(status="failed", error=str(error))
+    else:
+        job.update(status="done")
+
+
+def start(action, ids, **options):
+    """Запускает действие из ACTIONS над ids, возвращает Job."""
+    job = Job(action)
+    ids = list(ids)
+    job.update(total=len(ids))
+    if _inline():
+        _run(job, ids, options)
+    else:
+        background.thread_pool(
+            "moderation", settings.MODERATION_WORKERS
+        ).submit(background.closing_connections, _run, job, ids, options)
+    return job
@@ -0,0 +1,247 @@
+import base64
+import binascii
+
+from django.core.paginator import Page, Paginator
+from django.db.models import Q
+from django.utils.dateparse import parse_datetime
+
+FORWARD = "n"
+BACKWARD = "p"
+
+
+def encode_cursor(direction, pub_date, pk):
+    raw = "{}{}|{}".format(direction, pub_date.isoformat(), pk)
+    return base64.urlsafe_b64encode(raw.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor):
+    """Разбирает курсор; на любой мусор возвращает None (первая страница)."""
+    if not cursor:
+        return None
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        raw = base64.urlsafe_b64decode(padded.encode()).decode()
+        direction, raw = raw[0], raw[1:]
+        raw_date, raw_pk = raw.rsplit("|", 1)
+        pub_date = parse_datetime(raw_date)
+        pk = int(raw_pk)
+    except (binascii.Error, UnicodeDecodeError, ValueError, IndexError):
+        return None
+    if direction not in (FORWARD, BACKWARD) or pub_date is None:
+        return None
+    return direction, pub_date, pk
+
+
+class CursorPaginator(Paginator):
+    """Keyset-пагинатор по (pub_date, id).
+
+    Каждая страница — один запрос LIMIT per_page + 1 после курсора:
+    без COUNT(*) по всей таблице и без OFFSET. Страница — обычный
+    django.core.paginator.Page, поэтому has_next/has_previous и
+    paginator.html работают как раньше; номер страницы условный
+    (1 — самая свежая, 2 — любая следующая), а ссылки строятся
+    по page.next_cursor / page.previous_cursor.
+    """
+    cursor_mode = True
+    date_field = "pub_date"
+    key_field = "pk"
+    descending = True
+
+    def __init__(self, object_list, per_page):
+        super().__init__(object_list, per_page)
+        self._number = 1
+        self._has_next = False
+        self._on_page = 0
+
+    def _check_object_list_is_ordered(self):
+        # Порядок задаёт сам пагинатор, см. _ordered().
+        pass
+
+    @property
+    def num_pages(self):
+        return self._number + 1 if self._has_next else self._number
+
+    @property
+    def count(self):
+        # Общее число строк намеренно не считается; отдаём известный минимум.
+        return (
+            (self._number - 1) * self.per_page
+            + self._on_page + int(self._has_next)
+        )
+
+    def get_page(self, cursor=None, number=None):
+        decoded = decode_cursor(cursor)
+        if decoded is not None:
+            direction, pub_date, pk = decoded
+            if direction == FORWARD:
+                page = self._page_after(pub_date, pk)
+            else:
+                page = self._page_before(pub_date, pk)
+        elif number is not None:
+            page = self._page_by_number(number)
+        else:
+            page = self._build_page(self._fetch(self._ordered()), 1, False)
+        page.cursor = cursor if decoded is not None else ""
+        return page
+
+    def _ordered(self, reverse=False):
+        prefix = "" if reverse == self.descending else "-"
+        return self.object_list.order_by(
+            prefix + self.date_field, prefix + self.key_field
+        )
+
+    @property
+    def _after(self):
+        return "__lt" if self.descending else "__gt"
+
+    @property
+    def _before(self):
+        return "__gt" if self.descending else "__lt"
+
+    def _fetch(self, queryset):
+        return list(queryset[:self.per_page + 1])
+
+    def _after_key(self, pub_date, pk):
+        date_field, key_field = self.date_field, self.key_field
+        return self._ordered().filter(
+            Q(**{date_field + self._after: pub_date})
+            | Q(**{date_field: pub_date, key_field + self._after: pk})
+        )
+
+    def _page_after(self, pub_date, pk):
+        rows = self._fetch(self._after_key(pub_date, pk))
+        return self._build_page(rows, 2, has_previous=True)
+
+    def window(self, cursor=None):
+        """Упорядоченный QuerySet строк после курсора (только вперёд).
+
+        Для мест, где в контекст нужен сам QuerySet, а не Page, — см.
+        window_page().
+        """
+        decoded = decode_cursor(cursor)
+        if decoded is None or decoded[0] != FORWARD:
+            return self._ordered()
+        return self._after_key(decoded[1], decoded[2])
+
+    def next_cursor_for(self, rows):
+        """Курсор после rows[:per_page], если есть лишняя строка."""
+        rows = list(rows)
+        if len(rows) <= self.per_page:
+            return None
+        return self._cursor_for(FORWARD, rows[self.per_page - 1])
+
+    def window_page(self, cursor=None):
+        """Порция window() на per_page строк и курсор продолжения.
+
+        Ключи per_page + 1 строк читаются по индексу; лишняя строка
+        только показывает, что продолжение есть. Сама порция — уже
+        загруженный QuerySet window(), ограниченный этими ключами.
+        """
+        window = self.window(cursor)
+        keys = list(window.values(self.date_field, self.key_field)[
+            :self.per_page + 1
+        ])
+        page = window.filter(**{
+            self.key_field + "__in": [
+                row[self.key_field] for row in keys[:self.per_page]
+            ],
+        })
+        len(page)
+        return page, self.next_cursor_for(keys)
+
+    def _page_before(self, pub_date, pk):
+        date_field, key_field = self.date_field, self.key_field
+        rows = self._fetch(self._ordered(reverse=True).filter(
+            Q(**{date_field + self._before: pub_date})
+            | Q(**{date_field: pub_date, key_field + self._before: pk})
+        ))
+        has_previous = len(rows) > self.per_page
+        rows = rows[:self.per_page][::-1]
+        self._number = 2 if has_previous else 1
+        self._has_next = True
+        return self._make_page(rows, has_previous)
+
+    def _page_by_number(self, number):
+        """Совместимость со старыми ссылками ?page=N: OFFSET, но без COUNT."""
+        try:
+            number = max(int(number), 1)
+        except (TypeError, ValueError):
+            number = 1
+        offset = (number - 1) * self.per_page
+        rows = list(self._ordered()[offset:offset + self.per_page + 1])
+        if not rows and number > 1:
+            return self._build_page(self._fetch(self._ordered()), 1, False)
+        return self._build_page(rows, number, has_previous=number > 1)
+
+    def _build_page(self, rows, number, has_previous):
+        self._number = number
+        self._has_next = len(rows) > self.per_page
+        return self._make_page(rows[:self.per_page], has_previous)
+
+    def _make_page(self, rows, has_previous):
+        self._on_page = len(rows)
+        page = Page(self.transform(rows), self._number, self)
+        page.next_cursor = None
+        page.previous_cursor = None
+        if rows and self._has_next:
+            page.next_cursor = self._cursor_for(FORWARD, rows[-1])
+        if rows and has_previous:
+            page.previous_cursor = self._cursor_for(BACKWARD, rows[0])
+        return page
+
+    def _cursor_for(self, direction, row):
+        if isinstance(row, dict):
+            # строки из values()
+            return encode_cursor(
+                direction, row[self.date_field], row[self.key_field]
+            )
+        return encode_cursor(
+            direction,
+            getattr(row, self.date_field),
+            getattr(row, self.key_field),
+        )
+
+    def transform(self, rows):
+        """Превращает строки выборки в объекты страницы."""
+        return rows
+
+
+class TimelinePaginator(CursorPaginator):
+    """Листает TimelineEntry по (pub_date, post_id), отдаёт сами посты."""
+    key_field = "post_id"
+
+    def transform(self, rows):
+        return [entry.post for entry in rows]
+
+
+class CommentPaginator(CursorPaginator):
+    """Комментарии поста от старых к новым, порциями по курсору."""
+    date_field = "created"
+    descending = False
+
+
+class RankedPaginator(CursorPaginator):
+    """Выдача поиска: порядок задаёт ранжирование, а не дата.
+
+    object_list — объект со срезами (posts.search.SearchResults);
+    страницы листаются по ?page=N через LIMIT/OFFSET, тоже без COUNT.
+    """
+
+    def get_page(self, cursor=None, number=None):
+        page = self._page_by_number(number)
+        page.cursor = ""
+        return page
+
+    def _ordered(self, reverse=False):
+        return self.object_list
+
+    def _cursor_for(self, direction, row):
+        return None
+
+
+def get_cursor_page(request, object_list, per_page,
+                    paginator_class=CursorPaginator):
+    paginator = paginator_class(object_list, per_page)
+    return paginator.get_page(
+        request.GET.get("cursor"), request.GET.get("page")
+    )
@@ -0,0 +1,36 @@
+"""Независимые запросы страницы — параллельно, в пуле потоков.
+
+Пока один поток ждёт базу, остальные запросы уже выполняются: время
+страницы ≈ самый долгий запрос, а не их сумма. Контекст (реплика для
+чтения, см. yatube/replica.py) переносится в поток вместе с вызовом.
+"""
+import contextvars
+
+from django.conf import settings
+
+from . import background
+
+
+def gather(*funcs):
+    """Вызывает функции без аргументов и возвращает их результаты.
+
+    Первая выполняется в текущем потоке, остальные — в пуле; исключение
+    любой из них (например, Http404) пробрасывается как есть.
+    """
+    if len(funcs) < 2 or background.run_inline(settings.QUERY_WORKERS):
+        return [func() for func in funcs]
+    executor = background.thread_pool("query", settings.QUERY_WORKERS)
+    futures = [
+        executor.submit(
+            background.closing_connections, contextvars.copy_context().run,
+            func,
+        )
+        for func in funcs[1:]
+    ]
+    try:
+        first = funcs[0]()
+    except BaseException:
+        for future in futures:
+            future.cancel()
+        raise
+    return [first] + [future.result() for future in futures]
@@ -0,0 +1,256 @@
+"""Полнотекстовый поиск по постам и комментариям.
+
+Поиск идёт через подключаемый бэкенд (settings.SEARCH_BACKEND — путь
+к классу). На SQLite это SQLiteFTSBackend: инвертированный индекс
+FTS5 в таблице posts_search, где каждый пост и каждый комментарий —
+отдельный документ, а выдача — посты, отсортированные по лучшему
+bm25 среди своих документов. Для других СУБД есть DatabaseBackend
+без индекса (LIKE), чтобы /search/ просто работал.
+
+Индекс обновляется сигналами при сохранении и удалении постов и
+комментариев; rebuild_search_index пересобирает его целиком.
+"""
+import re
+from abc import ABC, abstractmethod
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connection, connections, router
+from django.db.models import Q
+from django.utils.module_loading import import_string
+
+WORD = re.compile(r"\w+")
+MAX_TERMS = 8
+
+
+def terms(query):
+    return WORD.findall(query.lower())[:MAX_TERMS]
+
+
+class SearchBackend(ABC):
+    """Интерфейс бэкенда; методы индексации по умолчанию ничего не делают."""
+
+    def install(self, using=DEFAULT_DB_ALIAS):
+        pass
+
+    def index_post(self, post):
+        pass
+
+    def remove_post(self, post_id):
+        pass
+
+    def index_comment(self, comment):
+        pass
+
+    def remove_comment(self, comment_id):
+        pass
+
+    def remove_many(self, post_ids=(), comment_ids=()):
+        """Убирает пачку постов и комментариев (массовая модерация)."""
+        for post_id in post_ids:
+            self.remove_post(post_id)
+        for comment_id in comment_ids:
+            self.remove_comment(comment_id)
+
+    def rebuild(self):
+        return 0
+
+    @abstractmethod
+    def search(self, query, offset, limit):
+        """id постов по убыванию релевантности."""
+
+    @abstractmethod
+    def recent(self, query, limit, comments=False):
+        """id постов (comments — комментариев) со всеми словами запроса
+        в собственном тексте, новые первыми, без ранжирования."""
+
+
+class DatabaseBackend(SearchBackend):
+    """Без индекса: все слова через icontains, свежие посты выше."""
+
+    def search(self, query, offset, limit):
+        from .models import Post
+
+        words = terms(query)
+        if not words:
+            return []
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word) | Q(
+                comments__text__icontains=word
+            )
+        ids = (
+            Post.objects.filter(condition).order_by("-pub_date", "-id")
+            .values_list("id", flat=True).distinct()
+        )
+        return list(ids[offset:offset + limit])
+
+    def recent(self, query, limit, comments=False):
+        from .models import Comment, Post
+
+        words = terms(query)
+        if not words:
+            return []
+        condition = Q()
+        for word in words:
+            condition &= Q(text__icontains=word)
+        model = Comment if comments else Post
+        ids = model.objects.filter(condition).order_by("-id").values_list(
+            "id", flat=True
+        )
+        return list(ids[:limit])
+
+
+class SQLiteFTSBackend(SearchBackend):
+    """Индекс FTS5. rowid документа: 2*id у поста, 2*id+1 у комментария,
+    поэтому правка и удаление — точечный DELETE по rowid."""
+
+    table = "posts_search"
+
+    def _connection(self, write=False):
+        from .models import Post
+
+        if write:
+            return connections[router.db_for_write(Post)]
+        return connections[router.db_for_read(Post)]
+
+    def install(self, using=DEFAULT_DB_ALIAS):
+        with connections[using].cursor() as cursor:
+            cursor.execute(
+                "CREATE VIRTUAL TABLE IF NOT EXISTS {} USING fts5("
+                "body, post_id UNINDEXED, "
+                "tokenize='unicode61 remove_diacritics 2')".format(self.table)
+            )
+
+    def _replace(self, rowid, body, post_id):
+        with self._connection(write=True).cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {} WHERE rowid = %s".format(self.table), [rowid]
+            )
+            cursor.execute(
+                "INSERT INTO {} (rowid, body, post_id) "
+                "VALUES (%s, %s, %s)".format(self.table),
+                [rowid, body, post_id],
+            )
+
+    def _delete(self, rowid):
+        with self._connection(write=True).cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {} WHERE rowid = %s".format(self.table), [rowid]
+            )
+
+    def index_post(self, post):
+        self._replace(2 * post.pk, post.text, post.pk)
+
+    def remove_post(self, post_id):
+        # комментарии поста удаляются каскадом и своими сигналами
+        self._delete(2 * post_id)
+
+    def index_comment(self, comment):
+        self._replace(2 * comment.pk + 1, comment.text, comment.post_id)
+
+    def remove_comment(self, comment_id):
+        self._delete(2 * comment_id + 1)
+
+    def remove_many(self, post_ids=(), comment_ids=()):
+        rowids = [2 * pk for pk in post_ids]
+        rowids.extend(2 * pk + 1 for pk in comment_ids)
+        if not rowids:
+            return
+        with self._connection(write=True).cursor() as cursor:
+            cursor.execute(
+                "DELETE FROM {} WHERE rowid IN ({})".format(
+                    self.table, ", ".join(["%s"] * len(rowids))
+                ),
+                rowids,
+            )
+
+    def rebuild(self):
+        from .models import Comment, Post
+
+        with self._connection(write=True).cursor() as cursor:
+            cursor.execute("DROP TABLE IF EXISTS {}".format(self.table))
+            self.install(router.db_for_write(Post))
+            cursor.execute(
+                "INSERT INTO {} (rowid, body, post_id) "
+                "SELECT 2 * id, text, id FROM {}".format(
+                    self.table, Post._meta.db_table
+                )
+            )
+            cursor.execute(
+                "INSERT INTO {} (rowid, body, post_id) "
+                "SELECT 2 * id + 1, text, post_id FROM {}".format(
+                    self.table, Comment._meta.db_table
+                )
+            )
+            cursor.execute(
+                "INSERT INTO {0} ({0}) VALUES ('optimize')".format(self.table)
+            )
+            cursor.execute("SELECT count(*) FROM {}".format(self.table))
+            return cursor.fetchone()[0]
+
+    def match(self, query):
+        """Запрос FTS5 из слов пользователя: все слова, последнее — префикс.
+
+        Каждое слово в кавычках, поэтому операторы FTS5 из ввода
+        не вызывают синтаксических ошибок.
+        """
+        words = ['"{}"'.format(word) for word in terms(query)]
+        if not words:
+            return None
+        words[-1] += "*"
+        return " ".join(words)
+
+    def search(self, query, offset, limit):
+        match = self.match(query)
+        if match is None:
+            return []
+        with self._connection().cursor() as cursor:
+            cursor.execute(
+                "SELECT post_id FROM {0} WHERE {0} MATCH %s "
+                "GROUP BY post_id ORDER BY min(rank), post_id DESC "
+                "LIMIT %s OFFSET %s".format(self.table),
+                [match, limit, offset],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+    def recent(self, query, limit, comments=False):
+        match = self.match(query)
+        if match is None:
+            return []
+        # по rowid FTS5 идёт в порядке индекса и останавливается на limit,
+        # а ORDER BY rank считал бы bm25 для каждого совпадения
+        with self._connection().cursor() as cursor:
+            cursor.execute(
+                "SELECT rowid / 2 FROM {0} WHERE {0} MATCH %s "
+                "AND rowid %% 2 = %s ORDER BY rowid DESC "
+                "LIMIT %s".format(self.table),
+                [match, int(comments), limit],
+            )
+            return [row[0] for row in cursor.fetchall()]
+
+
+def get_backend():
+    path = getattr(settings, "SEARCH_BACKEND", None)
+    if path:
+        return import_string(path)()
+    if connection.vendor == "sqlite":
+        return SQLiteFTSBackend()
+    return DatabaseBackend()
+
+
+class SearchResults:
+    """Ленивая выдача для RankedPaginator: срез — один запрос к индексу
+    и один к постам."""
+
+    def __init__(self, query, backend=None):
+        self.query = query
+        self.backend = backend or get_backend()
+
+    def __getitem__(self, item):
+        from .models import Post
+
+        ids = self.backend.search(
+            self.query, item.start or 0, item.stop - (item.start or 0)
+        )
+        posts = Post.objects.for_feed().in_bulk(ids)
+        return [posts[pk] for pk in ids if pk in posts]
@@ -0,0 +1,97 @@
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from . import feed_cache, search, stats, timeline
+from .deps import post_deps
+from .models import Comment, Follow, Group, Post
+
+
+def _text_changed(kwargs):
+    # save(update_fields=...) без text (копии картинок, счётчики)
+    update_fields = kwargs.get("update_fields")
+    return update_fields is None or "text" in update_fields
+
+
+@receiver(pre_save, sender=Post)
+def post_changing(sender, instance, **kwargs):
+    if instance.pk:
+        instance._old_group_id = Post.objects.filter(
+            pk=instance.pk
+        ).values_list("group_id", flat=True).first()
+
+
+@receiver(post_save, sender=Post)
+def post_saved(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(instance.author_id, "post_count", 1)
+        timeline.fan_out_post(instance)
+    if _text_changed(kwargs):
+        search.get_backend().index_post(instance)
+    feed_cache.bump_on_commit(*post_deps([instance]))
+
+
+@receiver(post_delete, sender=Post)
+def post_deleted(sender, instance, **kwargs):
+    stats.bump(instance.author_id, "post_count", -1)
+    search.get_backend().remove_post(instance.pk)
+    feed_cache.bump_on_commit(*post_deps([instance]))
+
+
+@receiver(post_save, sender=Follow)
+def follow_created(sender, instance, created, **kwargs):
+    if created:
+        stats.bump(instance.user_id, "following_count", 1)
+        stats.bump(instance.author_id, "follower_count", 1)
+        timeline.backfill(instance.user_id, instance.author_id)
+        _bump_follow(instance)
+
+
+@receiver(post_delete, sender=Follow)
+def follow_deleted(sender, instance, **kwargs):
+    stats.bump(instance.user_id, "following_count", -1)
+    stats.bump(instance.author_id, "follower_count", -1)
+    timeline.prune(instance.user_id, instance.author_id)
+    _bump_follow(instance)
+
+
+def _bump_comment(comment):
+    # число комментариев видно в карточке поста на всех лентах
+    post = Post.objects.filter(pk=comment.post_id).select_related(
+        "author"
+    ).first()
+    if post is None:
+        # пост удаляется каскадом и сбросит свои страницы сам
+        feed_cache.bump_on_commit((feed_cache.POST, comment.post_id))
+    else:
+        feed_cache.bump_on_commit(*post_deps([post]))
+
+
+def _bump_follow(follow):
+    # счётчики подписок видны в профилях обоих пользователей
+    feed_cache.bump_on_commit(
+        (feed_cache.AUTHOR, follow.user.username),
+        (feed_cache.AUTHOR, follow.author.username),
+    )
+
+
+@receiver(post_save, sender=Comment)
+def comment_created(sender, instance, created, **kwargs):
+    if created:
+        stats.bump_comments(instance.post_id, 1)
+    if _text_changed(kwargs):
+        search.get_backend().index_comment(instance)
+    _bump_comment(instance)
+
+
+@receiver(post_delete, sender=Comment)
+def comment_deleted(sender, instance, **kwargs):
+    stats.bump_comments(instance.post_id, -1)
+    search.get_backend().remove_comment(instance.pk)
+    _bump_comment(instance)
+
+
+@receiver(post_save, sender=Group)
+def group_saved(sender, instance, **kwargs):
+    feed_cache.bump_on_commit(
+        (feed_cache.GROUP, instance.slug), (feed_cache.INDEX,)
+    )
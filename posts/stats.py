@@ -0,0 +1,104 @@
+"""Счётчики постов и подписок для страницы профиля."""
+from django.contrib.auth import get_user_model
+from django.db.models import Count, F, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .models import Comment, Follow, Post, UserStats
+
+User = get_user_model()
+
+COUNTERS = (
+    ("post_count", Post, "author"),
+    ("follower_count", Follow, "author"),
+    ("following_count", Follow, "user"),
+)
+
+
+def actual_counts(user_id):
+    return {
+        name: model.objects.filter(**{field: user_id}).count()
+        for name, model, field in COUNTERS
+    }
+
+
+def _count_subquery(model, field):
+    counted = model.objects.filter(**{field: OuterRef("pk")}).order_by()
+    return Coalesce(Subquery(
+        counted.values(field).annotate(total=Count("pk")).values("total")
+    ), 0)
+
+
+def bump(user_id, field, delta):
+    """Сдвигает счётчик; если строки ещё нет — создаёт её по факту.
+
+    Уменьшение строку не создаёт: так удаление пользователя каскадом
+    не пытается завести статистику уже удалённому автору.
+    """
+    rows = UserStats.objects.filter(user_id=user_id)
+    if delta < 0:
+        rows.filter(**{field + "__gte": -delta}).update(
+            **{field: F(field) + delta}
+        )
+        return
+    if not rows.update(**{field: F(field) + delta}):
+        UserStats.objects.get_or_create(
+            user_id=user_id, defaults=actual_counts(user_id)
+        )
+
+
+def bump_comments(post_id, delta):
+    rows = Post.objects.filter(pk=post_id)
+    if delta < 0:
+        rows = rows.filter(comment_count__gte=-delta)
+    rows.update(comment_count=F("comment_count") + delta)
+
+
+def recount(user_ids):
+    """Пересчитывает счётчики профиля пользователей одним UPDATE."""
+    return UserStats.objects.filter(user_id__in=user_ids).update(**{
+        name: _count_subquery(model, field)
+        for name, model, field in COUNTERS
+    })
+
+
+def recount_comments(post_ids):
+    return Post.objects.filter(pk__in=post_ids).update(
+        comment_count=_count_subquery(Comment, "post")
+    )
+
+
+def stats_for(user):
+    """Один запрос по первичному ключу, без COUNT."""
+    stats = UserStats.objects.filter(user=user).first()
+    return stats or UserStats(user=user)
+
+
+def reconcile():
+    """Пересчитывает счётчики пользователей и комментариев к постам.
+
+    Возвращает число созданных или исправленных строк.
+    """
+    existing = {
+        stats.user_id: stats for stats in UserStats.objects.iterator()
+    }
+    actual = User.objects.annotate(**{
+        name: _count_subquery(model, field)
+        for name, model, field in COUNTERS
+    }).values("pk", *(name for name, _, _ in COUNTERS))
+    fixed = 0
+    for row in actual.iterator():
+        user_id = row.pop("pk")
+        stats = existing.get(user_id)
+        if stats is None:
+            UserStats.objects.create(user_id=user_id, **row)
+        elif any(getattr(stats, name) != value
+                 for name, value in row.items()):
+            UserStats.objects.filter(pk=user_id).update(**row)
+        else:
+            continue
+        fixed += 1
+    comments = _count_subquery(Comment, "post")
+    fixed += Post.objects.exclude(comment_count=comments).update(
+        comment_count=comments
+    )
+    return fixed
@@ -0,0 +1,168 @@
+"""Хранилище картинок постов с дедупликацией по содержимому.
+
+Байты каждой уникальной картинки лежат один раз, в posts/blobs/ под
+именем-хэшем sha256. Имя, которое видит пост (posts/meme.jpg), —
+жёсткая ссылка на этот файл: URL и поле Post.image не меняются, а
+повторная загрузка того же мема не занимает места. Число ссылок на
+блоб ведёт сама файловая система (st_nlink), поэтому отдельной
+таблицы счётчиков нет. Адаптивные копии из posts/thumbnails.py тоже
+называются по хэшу и общие для одинаковых картинок.
+
+Раз блоб делят несколько постов, удаление поста файлы не трогает;
+неиспользуемые имена, блобы и копии убирает команда dedupe_media.
+"""
+import hashlib
+import os
+import shutil
+import time
+from collections import Counter
+
+from django.core.files.storage import FileSystemStorage
+from django.utils import timezone
+
+BLOBS_DIR = "posts/blobs"
+
+
+def content_hash(content):
+    digest = hashlib.sha256()
+    content.seek(0)
+    for chunk in content.chunks():
+        digest.update(chunk)
+    content.seek(0)
+    return digest.hexdigest()
+
+
+class ContentAddressedStorage(FileSystemStorage):
+    """FileSystemStorage, в котором одинаковые файлы делят один блоб."""
+
+    def blob_name(self, digest, name):
+        extension = os.path.splitext(name)[1].lower()
+        return "{}/{}/{}{}".format(BLOBS_DIR, digest[:2], digest, extension)
+
+    def _save(self, name, content):
+        blob = self.blob_name(content_hash(content), name)
+        if not self.exists(blob):
+            blob = super()._save(blob, content)
+        directory = os.path.dirname(self.path(name))
+        os.makedirs(directory, exist_ok=True)
+        while True:
+            try:
+                os.link(self.path(blob), self.path(name))
+                return name
+            except FileExistsError:
+                name = self.get_available_name(name)
+            except OSError:
+                # ФС без жёстких ссылок: обычная копия блоба — content
+                # уже прочитан, а временный файл загрузки перенесён
+                shutil.copyfile(self.path(blob), self.path(name))
+                return name
+
+
+post_image_storage = ContentAddressedStorage()
+
+
+def _walk(storage, path):
+    """Все файлы под path в хранилище."""
+    if not storage.exists(path):
+        return
+    directories, files = storage.listdir(path)
+    for name in files:
+        yield "{}/{}".format(path, name)
+    for directory in directories:
+        yield from _walk(storage, "{}/{}".format(path, directory))
+
+
+def _expired(storage, name, deadline):
+    return storage.get_modified_time(name).timestamp() < deadline
+
+
+def _originals(storage):
+    skip = (BLOBS_DIR + "/", _derivatives_prefix())
+    for name in _walk(storage, "posts"):
+        if not name.startswith(skip):
+            yield name
+
+
+def _derivatives_prefix():
+    from .thumbnails import DERIVATIVES_DIR
+
+    return DERIVATIVES_DIR + "/"
+
+
+def migrate_legacy(dry_run=False):
+    """Превращает старые отдельные файлы в ссылки на блобы.
+
+    Имена в Post.image не меняются. Копии таких постов сбрасываются,
+    чтобы warm_thumbnails сделал их заново уже общими. Возвращает
+    число перенесённых файлов.
+    """
+    from .models import Post
+
+    storage = post_image_storage
+    moved = []
+    for name in _originals(storage):
+        path = storage.path(name)
+        if os.stat(path).st_nlink > 1:
+            continue
+        moved.append(name)
+        if dry_run:
+            continue
+        with storage.open(name, "rb") as source:
+            blob = storage.blob_name(content_hash(source), name)
+        blob_path = storage.path(blob)
+        if not storage.exists(blob):
+            os.makedirs(os.path.dirname(blob_path), exist_ok=True)
+            os.link(path, blob_path)
+            continue
+        # такой блоб уже есть: заменяем файл ссылкой на него
+        os.link(blob_path, path + ".dedupe")
+        os.replace(path + ".dedupe", path)
+    if moved and not dry_run:
+        # update() обходит сигналы: updated и кэш лент — как в moderation
+        from . import feed_cache
+        from .deps import post_deps
+
+        posts = Post.objects.filter(image__in=moved)
+        deps = post_deps(posts)
+        posts.update(image_variants="", updated=timezone.now())
+        feed_cache.bump(*deps)
+    return len(moved)
+
+
+def collect_garbage(grace=24 * 3600, dry_run=False):
+    """Удаляет имена, блобы и копии, которые не нужны ни одному посту.
+
+    Файлы моложе grace секунд не трогаются: пост с ними может быть
+    ещё не сохранён. Возвращает список удалённых имён.
+    """
+    from .models import Post
+
+    storage = post_image_storage
+    posts = Post.objects.exclude(image="").exclude(image=None)
+    referenced = set(posts.values_list("image", flat=True))
+    derivatives = set()
+    for post in posts.only("image_variants").iterator():
+        derivatives.update(post.variants.get("files", ()))
+    deadline = time.time() - grace
+    removed = []
+    unlinked = Counter()
+
+    def remove(name):
+        removed.append(name)
+        if not dry_run:
+            storage.delete(name)
+
+    for name in _originals(storage):
+        if name in referenced or not _expired(storage, name, deadline):
+            continue
+        unlinked[os.stat(storage.path(name)).st_ino] += 1
+        remove(name)
+    for name in _walk(storage, _derivatives_prefix().rstrip("/")):
+        if name not in derivatives and _expired(storage, name, deadline):
+            remove(name)
+    for name in _walk(storage, BLOBS_DIR):
+        stat = os.stat(storage.path(name))
+        links = stat.st_nlink - unlinked[stat.st_ino]
+        if links <= 1 and _expired(storage, name, deadline):
+            remove(name)
+    return removed
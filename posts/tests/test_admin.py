@@ -0,0 +1,102 @@
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts import admin as posts_admin
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ScalableAdminTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.admin = User.objects.create_superuser(
+            username="admin", email="admin@example.com", password="pass"
+        )
+        cls.group = Group.objects.create(
+            title="Группа", slug="admin-group", description=""
+        )
+        cls.authors = [
+            User.objects.create_user(username=f"writer{num}")
+            for num in range(5)
+        ]
+        for num, author in enumerate(cls.authors):
+            post = Post.objects.create(
+                text=f"Пост номер {num} про котов", author=author,
+                group=cls.group,
+            )
+            Comment.objects.create(
+                post=post, author=cls.authors[0], text=f"Ответ {num} про собак"
+            )
+            Follow.objects.create(user=cls.authors[0], author=author)
+
+    def setUp(self):
+        self.client = Client()
+        self.client.force_login(self.admin)
+
+    def changelist(self, model, params=None):
+        url = reverse(f"admin:posts_{model}_changelist")
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        return response, [query["sql"] for query in queries]
+
+    def test_no_query_per_row(self):
+        models = ("post", "comment", "follow")
+        before = {model: len(self.changelist(model)[1]) for model in models}
+        reader = User.objects.create_user(username="reader")
+        for author in self.authors:
+            post = Post.objects.create(text="Ещё пост", author=author)
+            Comment.objects.create(post=post, author=reader, text="Ещё")
+            Follow.objects.create(user=reader, author=author)
+        for model in models:
+            with self.subTest(model=model):
+                self.assertEqual(len(self.changelist(model)[1]),
+                                 before[model])
+
+    def test_large_table_uses_estimate(self):
+        with mock.patch.object(posts_admin, "COUNT_LIMIT", 2):
+            response, queries = self.changelist("post")
+        self.assertFalse(
+            any("COUNT(" in sql.upper() for sql in queries), queries
+        )
+        self.assertEqual(response.context["cl"].result_count, 5)
+
+    def test_filtered_count_is_capped(self):
+        with mock.patch.object(posts_admin, "COUNT_LIMIT", 2):
+            response, _ = self.changelist("post", {"q": "writer1"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+        with mock.patch.object(posts_admin, "COUNT_LIMIT", 2):
+            response, _ = self.changelist("post", {"q": "котов"})
+        self.assertEqual(response.context["cl"].result_count, 2)
+
+    def test_post_search(self):
+        response, _ = self.changelist("post", {"q": "номер 3"})
+        self.assertEqual(
+            [post.text for post in response.context["cl"].result_list],
+            ["Пост номер 3 про котов"],
+        )
+        response, _ = self.changelist("post", {"q": "writer2"})
+        self.assertEqual(response.context["cl"].result_count, 1)
+
+    def test_comment_search(self):
+        response, _ = self.changelist("comment", {"q": "ответ 4"})
+        self.assertEqual(
+            [comment.text for comment in response.context["cl"].result_list],
+            ["Ответ 4 про собак"],
+        )
+        response, _ = self.changelist("comment", {"q": "writer0"})
+        self.assertEqual(response.context["cl"].result_count, 5)
+
+    def test_foreign_keys_without_dropdowns(self):
+        response = self.client.get(reverse("admin:posts_comment_add"))
+        self.assertNotContains(response, "<option value=\"{}\">".format(
+            self.authors[1].pk
+        ))
+        self.assertContains(response, "vForeignKeyRawIdAdminField")
+        self.assertContains(response, "admin-autocomplete")
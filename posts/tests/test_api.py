@@ -0,0 +1,104 @@
+import gzip
+import json
+
+from django.contrib.auth import get_user_model
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+
+class ApiTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title="Группа", slug="api-group", description="Описание"
+        )
+        cls.author = User.objects.create_user(username="api-author")
+        cls.reader = User.objects.create_user(username="api-reader")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        cls.posts = [
+            Post.objects.create(
+                text=f"Пост {num}", author=cls.author, group=cls.group
+            )
+            for num in range(25)
+        ]
+        for num in range(3):
+            Comment.objects.create(
+                post=cls.posts[0], author=cls.reader, text=f"Ответ {num}"
+            )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def get(self, name, params=None, client=None, **kwargs):
+        response = (client or self.guest_client).get(
+            reverse(f"api:{name}", kwargs=kwargs), params
+        )
+        return response, json.loads(response.content)
+
+    def test_post_list_walks_with_cursor(self):
+        seen = []
+        params = {}
+        while True:
+            response, data = self.get("post_list", params)
+            self.assertEqual(response.status_code, 200)
+            seen.extend(item["id"] for item in data["results"])
+            if not data["next"]:
+                break
+            params = {"cursor": data["next"]}
+        self.assertEqual(seen, [post.id for post in reversed(self.posts)])
+
+    def test_post_fields(self):
+        _, data = self.get("post_detail", post_id=self.posts[0].id)
+        self.assertEqual(data["author"], "api-author")
+        self.assertEqual(data["group"], "api-group")
+        self.assertEqual(data["comment_count"], 3)
+        self.assertIsNone(data["image"])
+
+    def test_field_selection_narrows_query(self):
+        with CaptureQueriesContext(connection) as queries:
+            _, data = self.get("post_list", {"fields": "id,text"})
+        self.assertEqual(set(data["results"][0]), {"id", "text"})
+        self.assertEqual(len(queries), 1)
+        self.assertNotIn("auth_user", queries[0]["sql"])
+        response, data = self.get("post_list", {"fields": "id,password"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_comments_oldest_first(self):
+        _, data = self.get("comment_list", post_id=self.posts[0].id)
+        self.assertEqual(
+            [item["text"] for item in data["results"]],
+            ["Ответ 0", "Ответ 1", "Ответ 2"],
+        )
+
+    def test_groups(self):
+        _, data = self.get("group_list")
+        self.assertEqual(data["results"][0]["slug"], "api-group")
+        response, _ = self.get("group_detail", slug="missing")
+        self.assertEqual(response.status_code, 404)
+
+    def test_follow_feed_needs_login(self):
+        response, _ = self.get("follow_feed")
+        self.assertEqual(response.status_code, 401)
+        client = Client()
+        client.force_login(self.reader)
+        _, data = self.get("follow_feed", {"limit": 5}, client=client)
+        self.assertEqual(
+            [item["id"] for item in data["results"]],
+            [post.id for post in reversed(self.posts[-5:])],
+        )
+        _, data = self.get("following_list", client=client)
+        self.assertEqual(data["results"][0]["author"], "api-author")
+
+    def test_gzip(self):
+        response = self.guest_client.get(
+            reverse("api:post_list"), HTTP_ACCEPT_ENCODING="gzip"
+        )
+        self.assertEqual(response["Content-Encoding"], "gzip")
+        data = json.loads(gzip.decompress(response.content))
+        self.assertEqual(len(data["results"]), 20)
@@ -0,0 +1,88 @@
+import asyncio
+
+from django.test import SimpleTestCase
+
+from yatube.asgi import WsgiBridge, _environ, application
+
+
+def call(app, scope, messages):
+    """Прогоняет один ASGI-вызов и возвращает отправленные сообщения."""
+    incoming = list(messages)
+    sent = []
+
+    async def receive():
+        return incoming.pop(0)
+
+    async def send(message):
+        sent.append(message)
+
+    asyncio.run(app(scope, receive, send))
+    return sent
+
+
+def http_scope(path, method="GET", headers=(), query=b""):
+    return {
+        "type": "http",
+        "http_version": "1.1",
+        "method": method,
+        "scheme": "http",
+        "path": path,
+        "query_string": query,
+        "headers": list(headers),
+        "server": ("testserver", 80),
+        "client": ("127.0.0.1", 5000),
+    }
+
+
+class AsgiBridgeTests(SimpleTestCase):
+    def test_serves_django_page(self):
+        sent = call(application, http_scope("/about/author/"), [
+            {"type": "http.request", "body": b"", "more_body": False},
+        ])
+        start, body = sent[0], b"".join(m["body"] for m in sent[1:])
+        self.assertEqual(start["status"], 200)
+        self.assertIn(
+            (b"content-type", b"text/html; charset=utf-8"), start["headers"]
+        )
+        self.assertIn("<html".encode(), body)
+        self.assertFalse(sent[-1].get("more_body", False))
+
+    def test_body_and_headers_reach_wsgi(self):
+        seen = {}
+
+        def wsgi_app(environ, start_response):
+            seen.update(environ, body=environ["wsgi.input"].read())
+            start_response("201 Created", [("X-Test", "1")])
+            return [b"ok"]
+
+        sent = call(WsgiBridge(wsgi_app, 1), http_scope(
+            "/поиск/", method="POST", query=b"q=1",
+            headers=[(b"content-type", b"text/plain"),
+                     (b"x-tag", b"a"), (b"x-tag", b"b")],
+        ), [
+            {"type": "http.request", "body": b"par", "more_body": True},
+            {"type": "http.request", "body": b"ts", "more_body": False},
+        ])
+        self.assertEqual(seen["body"], b"parts")
+        self.assertEqual(seen["CONTENT_TYPE"], "text/plain")
+        self.assertEqual(seen["HTTP_X_TAG"], "a,b")
+        self.assertEqual(seen["QUERY_STRING"], "q=1")
+        self.assertEqual(
+            seen["PATH_INFO"].encode("latin-1").decode(), "/поиск/"
+        )
+        self.assertEqual(sent[0]["status"], 201)
+        self.assertIn((b"x-test", b"1"), sent[0]["headers"])
+
+    def test_lifespan(self):
+        sent = call(WsgiBridge(None, 1), {"type": "lifespan"}, [
+            {"type": "lifespan.startup"}, {"type": "lifespan.shutdown"},
+        ])
+        self.assertEqual(
+            [m["type"] for m in sent],
+            ["lifespan.startup.complete", "lifespan.shutdown.complete"],
+        )
+
+    def test_environ_defaults(self):
+        environ = _environ(http_scope("/"), None)
+        self.assertEqual(environ["SERVER_NAME"], "testserver")
+        self.assertEqual(environ["REMOTE_ADDR"], "127.0.0.1")
@@ -0,0 +1,79 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Post
+from posts.views import COMMENTS_PER_PAGE
+
+User = get_user_model()
+
+
+class CommentRenderingTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="comment-author")
+        cls.post = Post.objects.create(text="Пост", author=cls.author)
+        cls.url = reverse(
+            "posts:post",
+            kwargs={"username": cls.author.username, "post_id": cls.post.id}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+
+    def add_comments(self, amount):
+        for num in range(amount):
+            commenter = User.objects.create_user(
+                username=f"commenter-{Comment.objects.count()}"
+            )
+            Comment.objects.create(
+                text=f"Комментарий {num}", post=self.post, author=commenter
+            )
+
+    def count_queries(self):
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(self.url)
+        return len(queries)
+
+    def test_add_comment_updates_count(self):
+        self.author_client.post(
+            reverse(
+                "posts:add_comment",
+                kwargs={
+                    "username": self.author.username,
+                    "post_id": self.post.id
+                }
+            ),
+            {"text": "Первый"}
+        )
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 1)
+
+    def test_comment_queries_do_not_grow(self):
+        self.add_comments(1)
+        few = self.count_queries()
+        self.add_comments(10)
+        self.assertEqual(self.count_queries(), few)
+
+    def test_comments_are_paginated(self):
+        self.add_comments(COMMENTS_PER_PAGE + 3)
+        context = self.client.get(self.url).context
+        self.assertEqual(len(context["comments"]), COMMENTS_PER_PAGE)
+        rest = self.client.get(
+            self.url, {"comments": context["comments_next"]}
+        ).context["comments"]
+        self.assertEqual(
+            [comment.text for comment in rest],
+            [f"Комментарий {num}" for num in range(COMMENTS_PER_PAGE, 53)]
+        )
+
+    def test_no_next_link_after_a_full_last_page(self):
+        self.add_comments(COMMENTS_PER_PAGE)
+        context = self.client.get(self.url).context
+        self.assertEqual(len(context["comments"]), COMMENTS_PER_PAGE)
+        self.assertIsNone(context["comments_next"])
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+@override_settings(FEED_CONDITIONAL_GET=True)
+class ConditionalGetTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="etag-author")
+        cls.post = Post.objects.create(text="Пост", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+        self.post_url = reverse("posts:post", kwargs={
+            "username": self.author.username, "post_id": self.post.id
+        })
+
+    def test_unchanged_feed_answers_304_without_queries(self):
+        url = reverse("posts:index")
+        response = self.guest_client.get(url)
+        self.assertIn("no-cache", response["Cache-Control"])
+        with self.assertNumQueries(0):
+            again = self.guest_client.get(
+                url, HTTP_IF_NONE_MATCH=response["ETag"]
+            )
+        self.assertEqual(again.status_code, 304)
+        again = self.guest_client.get(
+            url, HTTP_IF_MODIFIED_SINCE=response["Last-Modified"]
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_revalidation_after_new_post_gets_new_content(self):
+        url = reverse("posts:index")
+        etag = self.guest_client.get(url)["ETag"]
+        Post.objects.create(text="Только что", author=self.author)
+        response = self.guest_client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertContains(response, "Только что")
+        again = self.guest_client.get(
+            url, HTTP_IF_NONE_MATCH=response["ETag"]
+        )
+        self.assertEqual(again.status_code, 304)
+
+    def test_new_comment_changes_post_etag(self):
+        etag = self.guest_client.get(self.post_url)["ETag"]
+        Comment.objects.create(post=self.post, author=self.author, text="Да")
+        response = self.guest_client.get(
+            self.post_url, HTTP_IF_NONE_MATCH=etag
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_new_comment_changes_feed_etag(self):
+        # карточка поста в ленте показывает число комментариев
+        profile = reverse(
+            "posts:profile", kwargs={"username": self.author.username}
+        )
+        etag = self.guest_client.get(profile)["ETag"]
+        Comment.objects.create(post=self.post, author=self.author, text="Да")
+        response = self.guest_client.get(profile, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+
+    def test_etag_depends_on_user(self):
+        etag = self.guest_client.get(self.post_url)["ETag"]
+        client = Client()
+        client.force_login(self.author)
+        response = client.get(self.post_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertIn("private", response["Cache-Control"])
+
+    def test_no_validators_with_per_process_cache(self):
+        etag = self.guest_client.get(self.post_url)["ETag"]
+        with override_settings(FEED_CONDITIONAL_GET=False):
+            response = self.guest_client.get(
+                self.post_url, HTTP_IF_NONE_MATCH=etag
+            )
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header("ETag"))
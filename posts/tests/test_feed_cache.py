@@ -0,0 +1,108 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import transaction
+from django.test import Client, TestCase, TransactionTestCase
+from django.urls import reverse
+
+from posts import feed_cache
+from posts.deps import post_deps
+from posts.models import Comment, Group, Post
+
+User = get_user_model()
+
+
+class FeedCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="cache-author")
+        cls.group = Group.objects.create(
+            title="Кэш", slug="cache-slug", description="Описание"
+        )
+        cls.other_group = Group.objects.create(
+            title="Другая", slug="other-slug", description="Описание"
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def group_url(self, group):
+        return reverse("posts:group_post", kwargs={"slug": group.slug})
+
+    def test_second_hit_served_from_cache(self):
+        self.guest_client.get(self.group_url(self.group))
+        response = self.guest_client.get(self.group_url(self.group))
+        self.assertIsNone(response.context)
+        self.assertEqual(feed_cache.metrics()["hit"], 1)
+        self.assertEqual(feed_cache.metrics()["miss"], 1)
+
+    def test_new_post_bumps_only_its_group(self):
+        self.guest_client.get(self.group_url(self.group))
+        self.guest_client.get(self.group_url(self.other_group))
+        Post.objects.create(text="Свежий", author=self.author,
+                            group=self.group)
+        response = self.guest_client.get(self.group_url(self.group))
+        self.assertContains(response, "Свежий")
+        self.guest_client.get(self.group_url(self.other_group))
+        stats = feed_cache.metrics()
+        self.assertEqual(stats["stale"], 1)
+        self.assertEqual(stats["hit"], 1)
+
+    def test_guest_sees_new_post_on_index(self):
+        index = reverse("posts:index")
+        Post.objects.create(text="Старый", author=self.author)
+        self.assertContains(self.guest_client.get(index), "Старый")
+        Post.objects.create(text="Свежий", author=self.author)
+        self.assertContains(self.guest_client.get(index), "Свежий")
+        # и из кэша страниц — тот же свежий вариант
+        self.assertContains(self.guest_client.get(index), "Свежий")
+        self.assertEqual(feed_cache.metrics()["hit"], 1)
+
+    def test_comment_bumps_feeds_with_the_post(self):
+        post = Post.objects.create(text="Обсуждаемый", author=self.author,
+                                   group=self.group)
+        profile = reverse("posts:profile", args=[self.author.username])
+        self.guest_client.get(self.group_url(self.group))
+        self.guest_client.get(profile)
+        comment = Comment.objects.create(post=post, author=self.author,
+                                         text="Реплика")
+        for url in (self.group_url(self.group), profile):
+            response = self.guest_client.get(url)
+            self.assertEqual(response.context["page"][0].comment_count, 1)
+        comment.delete()
+        response = self.guest_client.get(self.group_url(self.group))
+        self.assertEqual(response.context["page"][0].comment_count, 0)
+        self.assertEqual(feed_cache.metrics()["hit"], 0)
+
+    def test_post_deps_same_for_queryset_and_instances(self):
+        post = Post.objects.create(text="Пост", author=self.author,
+                                   group=self.group)
+        deps = post_deps(Post.objects.filter(pk=post.pk))
+        self.assertEqual(deps, post_deps([post]))
+        self.assertIn((feed_cache.GROUP, self.group.slug), deps)
+        post._old_group_id = self.other_group.pk
+        self.assertIn((feed_cache.GROUP, self.other_group.slug),
+                      post_deps([post]))
+
+    def test_logged_in_users_bypass_cache(self):
+        client = Client()
+        client.force_login(self.author)
+        client.get(self.group_url(self.group))
+        self.assertEqual(feed_cache.metrics()["miss"], 0)
+
+
+class BumpOnCommitTests(TransactionTestCase):
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="commit-author")
+
+    def test_generation_changes_again_after_commit(self):
+        deps = [(feed_cache.INDEX,)]
+        before, _ = feed_cache.versions(deps)
+        with transaction.atomic():
+            Post.objects.create(text="В транзакции", author=self.author)
+            # страницу со старыми данными читатель мог закэшировать здесь
+            during, _ = feed_cache.versions(deps)
+            self.assertNotEqual(during, before)
+        after, _ = feed_cache.versions(deps)
+        self.assertNotEqual(after, during)
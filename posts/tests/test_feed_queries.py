@@ -0,0 +1,64 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Group, Post
+
+User = get_user_model()
+
+
+class FeedQueryCountTests(TestCase):
+    """Число запросов на страницу ленты не зависит от числа постов."""
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title="Группа", slug="queries-slug", description="Описание"
+        )
+        cls.reader = User.objects.create_user(username="reader")
+        cls.authors = [
+            User.objects.create_user(username=f"author-{num}")
+            for num in range(10)
+        ]
+        for author in cls.authors:
+            Follow.objects.create(user=cls.reader, author=author)
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        return len(queries)
+
+    def add_posts(self, amount):
+        for num in range(amount):
+            Post.objects.create(
+                text=f"Пост {num}",
+                author=self.authors[num % len(self.authors)],
+                group=self.group,
+            )
+
+    def test_feed_query_count_is_fixed(self):
+        urls = [
+            reverse("posts:index"),
+            reverse("posts:group_post", kwargs={"slug": self.group.slug}),
+            reverse("posts:follow_index"),
+            reverse(
+                "posts:profile",
+                kwargs={"username": self.authors[0].username}
+            ),
+        ]
+        self.add_posts(1)
+        small = {url: self.count_queries(url) for url in urls}
+        self.add_posts(30)
+        for url in urls:
+            with self.subTest(url=url):
+                self.assertEqual(self.count_queries(url), small[url])
@@ -0,0 +1,86 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import metrics
+
+User = get_user_model()
+
+
+def timing(response):
+    """Разбирает Server-Timing в {имя: {параметр: значение}}."""
+    result = {}
+    for part in response["Server-Timing"].split(", "):
+        name, *params = part.split(";")
+        result[name] = dict(param.split("=", 1) for param in params)
+    return result
+
+
+@override_settings(METRICS_SERVER_TIMING=True)
+class RequestMetricsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="metrics-author")
+        Post.objects.create(text="Пост", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        metrics.reset()
+        self.guest_client = Client()
+        self.profile_url = reverse(
+            "posts:profile", kwargs={"username": self.author.username}
+        )
+
+    def test_server_timing(self):
+        response = self.guest_client.get(self.profile_url)
+        parts = timing(response)
+        self.assertEqual(parts["cache"]["desc"], '"miss"')
+        self.assertNotEqual(parts["db"]["desc"], '"0 queries"')
+        self.assertGreater(float(parts["tpl"]["dur"]), 0)
+
+        again = timing(self.guest_client.get(self.profile_url))
+        self.assertEqual(again["db"]["desc"], '"0 queries"')
+        self.assertEqual(again["cache"]["desc"], '"hit"')
+
+    @override_settings(METRICS_SERVER_TIMING=False)
+    def test_server_timing_for_staff_only(self):
+        response = self.guest_client.get(self.profile_url)
+        self.assertFalse(response.has_header("Server-Timing"))
+        staff = User.objects.create_user(username="metrics-staff",
+                                         is_staff=True)
+        client = Client()
+        client.force_login(staff)
+        self.assertIn("db", timing(client.get(self.profile_url)))
+
+    def test_summary_by_view(self):
+        for _ in range(2):
+            self.guest_client.get(self.profile_url)
+        row = metrics.summary()["posts:profile"]
+        self.assertEqual(row["requests"], 2)
+        self.assertEqual(row["cache"], {"hit": 1, "stale": 0, "miss": 1})
+        self.assertGreater(row["max_queries"], 0)
+
+    @override_settings(METRICS_QUERY_LIMIT=0)
+    def test_too_many_queries_logged(self):
+        with self.assertLogs("yatube.metrics", "WARNING") as logs:
+            self.guest_client.get(self.profile_url)
+        self.assertIn("posts:profile", logs.output[0])
+        self.assertEqual(metrics.summary()["posts:profile"]["flagged"], 1)
+
+    def test_repeated_sql_logged(self):
+        with self.assertLogs("yatube.metrics", "WARNING") as logs:
+            with self.settings(METRICS_REPEAT_LIMIT=1):
+                self.guest_client.get(self.profile_url)
+        self.assertIn("SQL повторён", logs.output[0])
+
+    def test_summary_is_for_staff(self):
+        response = self.guest_client.get(reverse("metrics"))
+        self.assertEqual(response.status_code, 302)
+        admin = User.objects.create_user(username="metrics-admin",
+                                         is_staff=True)
+        self.guest_client.force_login(admin)
+        self.guest_client.get(self.profile_url)
+        data = self.guest_client.get(reverse("metrics")).json()
+        self.assertIn("posts:profile", data)
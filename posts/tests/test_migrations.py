@@ -0,0 +1,48 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import connection
+from django.db.migrations.executor import MigrationExecutor
+from django.db.migrations.recorder import MigrationRecorder
+from django.test import TransactionTestCase
+
+
+class BaselineUpgradeTests(TransactionTestCase):
+    """База, созданная syncdb до появления posts/migrations."""
+
+    def setUp(self):
+        executor = MigrationExecutor(connection)
+        executor.migrate([("posts", None)])
+        executor.loader.build_graph()
+        # 0001 — схема до миграций; syncdb не оставлял записей о ней
+        state = executor.migrate([("posts", "0001_initial")])
+        MigrationRecorder(connection).migration_qs.filter(
+            app="posts"
+        ).delete()
+        apps = state.apps
+        User = apps.get_model("auth", "User")
+        Post = apps.get_model("posts", "Post")
+        Comment = apps.get_model("posts", "Comment")
+        author = User.objects.create(username="old-author")
+        post = Post.objects.create(text="Старый пост", author_id=author.pk)
+        for text in ("Первый", "Второй"):
+            Comment.objects.create(
+                post_id=post.pk, author_id=author.pk, text=text
+            )
+
+    def tearDown(self):
+        call_command("migrate", verbosity=0)
+
+    def test_fake_initial_applies_the_rest(self):
+        out = StringIO()
+        call_command("migrate", "posts", fake_initial=True, stdout=out)
+        self.assertIn("0001_initial... FAKED", out.getvalue())
+        self.assertIn("0004_userstats_timelineentry... OK", out.getvalue())
+
+        from posts.models import Post, TimelineEntry, UserStats
+
+        post = Post.objects.get(text="Старый пост")
+        self.assertEqual(post.comment_count, 2)
+        self.assertEqual(post.updated, post.pub_date)
+        self.assertEqual(UserStats.objects.count(), 0)
+        self.assertEqual(TimelineEntry.objects.count(), 0)
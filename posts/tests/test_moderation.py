@@ -0,0 +1,145 @@
+from unittest import mock
+
+from django.contrib.admin.helpers import ACTION_CHECKBOX_NAME
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts import moderation, stats, timeline
+from posts.models import Comment, Follow, Group, Post, TimelineEntry
+from posts.search import get_backend
+
+User = get_user_model()
+
+CHANGELIST = reverse("admin:posts_post_changelist")
+
+
+@override_settings(MODERATION_CHUNK_SIZE=2)
+class ModerationTests(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.admin = User.objects.create_superuser(
+            username="moderator", email="moderator@example.com",
+            password="pass",
+        )
+        self.client = Client()
+        self.client.force_login(self.admin)
+        self.author = User.objects.create_user(username="honest")
+        self.spammer = User.objects.create_user(username="spammer")
+        self.group = Group.objects.create(
+            title="Котики", slug="cats", description=""
+        )
+        self.post = Post.objects.create(
+            text="Честный пост", author=self.author
+        )
+        self.spam = [
+            Post.objects.create(text=f"Купи слона {num}", author=self.spammer)
+            for num in range(5)
+        ]
+        Comment.objects.create(
+            post=self.spam[0], author=self.author, text="Это спам"
+        )
+        Comment.objects.create(
+            post=self.post, author=self.spammer, text="Купи слона"
+        )
+        Follow.objects.create(user=self.author, author=self.spammer)
+        Follow.objects.create(user=self.spammer, author=self.author)
+        # строки счётчиков есть у всех: reconcile ниже ничего не создаёт
+        stats.reconcile()
+
+    def action(self, action, posts, **data):
+        return self.client.post(CHANGELIST, {
+            "action": action,
+            "index": 0,
+            ACTION_CHECKBOX_NAME: [post.pk for post in posts],
+            **data,
+        })
+
+    def assert_consistent(self):
+        # счётчикам и лентам нечего чинить после пакетной модерации
+        self.assertEqual(stats.reconcile(), 0)
+        entries = set(TimelineEntry.objects.values_list("user", "post"))
+        timeline.rebuild_all()
+        self.assertEqual(
+            set(TimelineEntry.objects.values_list("user", "post")), entries
+        )
+
+    def test_delete_asks_for_confirmation(self):
+        profile = reverse("posts:profile", args=[self.spammer.username])
+        self.assertContains(Client().get(profile), "слона 0")
+        response = self.action("delete_posts", self.spam[:3])
+        self.assertContains(response, "Будут удалены постов: 3")
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 5)
+        response = self.action("delete_posts", self.spam[:3], post="yes")
+        self.assertRedirects(response, CHANGELIST)
+        self.assertEqual(Post.objects.filter(author=self.spammer).count(), 2)
+        self.assertFalse(Comment.objects.filter(post=self.spam[0]).exists())
+        self.assertEqual(get_backend().recent("спам", 10, comments=True), [])
+        self.assertEqual(len(get_backend().recent("слона", 10)), 2)
+        self.assertNotContains(Client().get(profile), "слона 0")
+        self.assert_consistent()
+
+    def test_default_delete_action_replaced(self):
+        response = self.client.get(CHANGELIST)
+        choices = dict(response.context["action_form"].fields[
+            "action"
+        ].choices)
+        self.assertNotIn("delete_selected", choices)
+        self.assertIn("delete_posts", choices)
+
+    def test_move_to_group(self):
+        self.action("move_to_group", self.spam[:4], group=self.group.pk)
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 4)
+        self.action("move_to_group", self.spam[:1], group="")
+        self.assertEqual(Post.objects.filter(group=self.group).count(), 3)
+
+    def test_purge_spammer(self):
+        # лента группы не задета ни постами, ни подписками спамера
+        Post.objects.filter(pk=self.post.pk).update(group=self.group)
+        group_page = reverse("posts:group_post", args=[self.group.slug])
+        page = Client().get(group_page).context["page"]
+        self.assertEqual(page[0].comment_count, 1)
+        response = self.action("purge_authors", self.spam[1:3])
+        self.assertContains(response, "spammer")
+        self.action("purge_authors", self.spam[1:3], post="yes")
+        self.assertFalse(Post.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Comment.objects.filter(author=self.spammer).exists())
+        self.assertFalse(Follow.objects.exists())
+        self.spammer.refresh_from_db()
+        self.assertFalse(self.spammer.is_active)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.comment_count, 0)
+        page = Client().get(group_page).context["page"]
+        self.assertEqual(page[0].comment_count, 0)
+        self.assertEqual(Post.objects.count(), 1)
+        self.assert_consistent()
+
+    def test_purge_refuses_staff(self):
+        post = Post.objects.create(text="Пост модератора", author=self.admin)
+        self.action("purge_authors", [post], post="yes")
+        self.assertTrue(Post.objects.filter(pk=post.pk).exists())
+
+    def test_progress(self):
+        job = moderation.start("delete_posts", [p.pk for p in self.spam])
+        response = self.client.get(
+            reverse("admin:posts_post_moderation", args=[job.id])
+        )
+        self.assertEqual(response.json(), {
+            "action": "delete_posts", "status": "done",
+            "total": 5, "done": 5, "error": "",
+        })
+        missing = reverse("admin:posts_post_moderation", args=["nope"])
+        self.assertEqual(self.client.get(missing).status_code, 404)
+
+    @override_settings(MODERATION_WORKERS=1)
+    def test_background_only_with_shared_cache(self):
+        with mock.patch("posts.background.connection") as connection:
+            connection.in_atomic_block = False
+            connection.is_in_memory_db.return_value = False
+            self.assertTrue(moderation._inline())
+            dummy = {"default": {
+                "BACKEND": "django.core.cache.backends.dummy.DummyCache",
+            }}
+            with override_settings(CACHES=dummy):
+                self.assertFalse(moderation._inline())
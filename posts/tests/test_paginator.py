@@ -0,0 +1,68 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class CursorPaginatorTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="cursor-author")
+        for num in range(25):
+            Post.objects.create(text=f"Пост {num}", author=cls.author)
+
+    def setUp(self):
+        cache.clear()
+        self.guest_client = Client()
+
+    def test_cursor_walks_feed_without_gaps(self):
+        seen = []
+        params = {}
+        while True:
+            response = self.guest_client.get(reverse("posts:index"), params)
+            page = response.context["page"]
+            seen.extend(post.id for post in page)
+            if not page.has_next():
+                break
+            params = {"cursor": page.next_cursor}
+        expected = list(
+            Post.objects.order_by("-pub_date", "-id").values_list(
+                "id", flat=True
+            )
+        )
+        self.assertEqual(seen, expected)
+
+    def test_previous_cursor_returns_previous_page(self):
+        first = self.guest_client.get(reverse("posts:index")).context["page"]
+        second = self.guest_client.get(
+            reverse("posts:index"), {"cursor": first.next_cursor}
+        ).context["page"]
+        back = self.guest_client.get(
+            reverse("posts:index"), {"cursor": second.previous_cursor}
+        ).context["page"]
+        self.assertEqual(list(back), list(first))
+        self.assertFalse(back.has_previous())
+
+    def test_feed_does_not_count_rows(self):
+        # ни COUNT(*), ни OFFSET при переходе по курсору
+        first = self.guest_client.get(reverse("posts:index")).context["page"]
+        with CaptureQueriesContext(connection) as queries:
+            self.guest_client.get(
+                reverse("posts:index"), {"cursor": first.next_cursor}
+            )
+        sql = " ".join(query["sql"] for query in queries).upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertNotIn("OFFSET", sql)
+
+    def test_broken_cursor_returns_first_page(self):
+        response = self.guest_client.get(
+            reverse("posts:index"), {"cursor": "мусор"}
+        )
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context["page"].number, 1)
@@ -0,0 +1,77 @@
+import contextvars
+import threading
+from unittest import mock
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import close_old_connections
+from django.http import Http404
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts import background, parallel
+from posts.models import Post
+
+User = get_user_model()
+
+marker = contextvars.ContextVar("marker", default=None)
+
+
+@override_settings(QUERY_WORKERS=2)
+class ThreadedGatherTests(TransactionTestCase):
+    """Ветка с пулом: транзакции зафиксированы, а тестовая база в памяти
+    общая для потоков (cache=shared), так что run_inline можно обойти."""
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="parallel-author")
+        Post.objects.create(text="Пост из потока", author=self.author)
+        patcher = mock.patch.object(
+            background, "run_inline", return_value=False
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_results_come_back_in_order(self):
+        threads = []
+
+        def count():
+            threads.append(threading.current_thread().name)
+            return Post.objects.count()
+
+        marker.set("из запроса")
+        with mock.patch.object(
+            background, "close_old_connections", wraps=close_old_connections
+        ) as close:
+            result = parallel.gather(
+                lambda: "первый", count, lambda: marker.get()
+            )
+        self.assertEqual(result, ["первый", 1, "из запроса"])
+        self.assertTrue(threads[0].startswith("yatube-query"))
+        self.assertEqual(close.call_count, 2)
+
+    def test_error_in_pool_is_raised(self):
+        def missing():
+            raise Http404("Нет такого поста")
+
+        with mock.patch.object(
+            background, "close_old_connections", wraps=close_old_connections
+        ) as close:
+            with self.assertRaisesMessage(Http404, "Нет такого поста"):
+                parallel.gather(lambda: None, missing)
+        close.assert_called_once_with()
+
+    def test_error_in_first_is_raised(self):
+        def broken():
+            raise ValueError("сломалось")
+
+        with self.assertRaisesMessage(ValueError, "сломалось"):
+            parallel.gather(broken, Post.objects.count)
+
+    def test_pages(self):
+        response = Client().get(
+            reverse("posts:profile", args=[self.author.username])
+        )
+        self.assertContains(response, "Пост из потока")
+        missing = reverse("posts:post", args=[self.author.username, 0])
+        self.assertEqual(Client().get(missing).status_code, 404)
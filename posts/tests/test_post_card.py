@@ -0,0 +1,44 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Post
+
+User = get_user_model()
+
+
+class PostCardCacheTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="card-author")
+        cls.reader = User.objects.create_user(username="card-reader")
+        cls.post = Post.objects.create(text="Карточка", author=cls.author)
+        cls.edit_url = reverse(
+            "posts:post_edit",
+            kwargs={"username": cls.author.username, "post_id": cls.post.id}
+        )
+        cls.profile_url = reverse(
+            "posts:profile", kwargs={"username": cls.author.username}
+        )
+
+    def setUp(self):
+        cache.clear()
+        self.author_client = Client()
+        self.author_client.force_login(self.author)
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_edit_link_is_not_shared_through_cache(self):
+        response = self.reader_client.get(self.profile_url)
+        self.assertNotContains(response, self.edit_url)
+        response = self.author_client.get(self.profile_url)
+        self.assertContains(response, self.edit_url)
+        response = self.reader_client.get(self.profile_url)
+        self.assertNotContains(response, self.edit_url)
+
+    def test_card_refreshes_after_edit(self):
+        self.reader_client.get(self.profile_url)
+        self.author_client.post(self.edit_url, {"text": "Исправлено"})
+        response = self.reader_client.get(self.profile_url)
+        self.assertContains(response, "Исправлено")
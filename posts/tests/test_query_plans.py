@@ -0,0 +1,82 @@
+import re
+
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Comment, Follow, Group, Post
+
+User = get_user_model()
+
+# Таблицы, которые растут вместе с сайтом: по ним нельзя ни полный
+# проход, ни сортировка во временном B-дереве.
+LARGE_TABLES = ("posts_post", "posts_comment", "posts_timelineentry")
+FULL_SCAN = re.compile(
+    r"\bSCAN (TABLE )?({})\b(?! USING)".format("|".join(LARGE_TABLES))
+)
+
+
+class FeedQueryPlanTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.group = Group.objects.create(
+            title="Группа", slug="plans", description="Описание"
+        )
+        cls.author = User.objects.create_user(username="plan-author")
+        cls.reader = User.objects.create_user(username="plan-reader")
+        Follow.objects.create(user=cls.reader, author=cls.author)
+        for num in range(15):
+            cls.post = Post.objects.create(
+                text=f"Пост {num}", author=cls.author, group=cls.group
+            )
+        for num in range(3):
+            Comment.objects.create(
+                post=cls.post, author=cls.reader, text=f"Комментарий {num}"
+            )
+
+    def setUp(self):
+        cache.clear()
+        self.client = Client()
+        self.client.force_login(self.reader)
+
+    def plans(self, url, params=None):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+        found = []
+        with connection.cursor() as cursor:
+            for query in queries:
+                sql = query["sql"]
+                if not sql.startswith("SELECT") or "posts_" not in sql:
+                    continue
+                cursor.execute("EXPLAIN QUERY PLAN " + sql)
+                plan = " / ".join(row[-1] for row in cursor.fetchall())
+                found.append((sql, plan))
+        return response, found
+
+    def assert_indexed(self, url, params=None):
+        response, plans = self.plans(url, params)
+        for sql, plan in plans:
+            with self.subTest(url=url, sql=sql):
+                self.assertNotIn("TEMP B-TREE", plan)
+                self.assertIsNone(FULL_SCAN.search(plan), plan)
+        return response
+
+    def test_feeds_use_indexes(self):
+        urls = [
+            reverse("posts:index"),
+            reverse("posts:group_post", kwargs={"slug": self.group.slug}),
+            reverse("posts:profile", kwargs={"username": "plan-author"}),
+            reverse("posts:follow_index"),
+            reverse("posts:post", kwargs={
+                "username": "plan-author", "post_id": self.post.id
+            }),
+        ]
+        for url in urls:
+            response = self.assert_indexed(url)
+            page = response.context.get("page")
+            if page is not None and page.next_cursor:
+                self.assert_indexed(url, {"cursor": page.next_cursor})
@@ -0,0 +1,55 @@
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.test import Client, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube.replica import STICKY_COOKIE, replicate
+
+User = get_user_model()
+
+
+@override_settings(REPLICA_DATABASE="replica", THUMBNAIL_WORKERS=0)
+class ReplicaRoutingTests(TransactionTestCase):
+    # реплика — отдельная тестовая база, её обновляет только replicate()
+    databases = {"default", "replica"}
+
+    def setUp(self):
+        cache.clear()
+        self.author = User.objects.create_user(username="replica-author")
+        self.post = Post.objects.create(text="Старый пост", author=self.author)
+        replicate()
+        self.client = Client()
+        self.client.force_login(self.author)
+
+    def test_feeds_read_from_replica(self):
+        Post.objects.create(text="Ещё не на реплике", author=self.author)
+        guest = Client()
+        self.assertNotContains(
+            guest.get(reverse("posts:index")), "Ещё не на реплике"
+        )
+        replicate()
+        cache.clear()
+        self.assertContains(
+            guest.get(reverse("posts:index")), "Ещё не на реплике"
+        )
+
+    def test_writer_reads_own_writes(self):
+        post_url = reverse("posts:post", kwargs={
+            "username": self.author.username, "post_id": self.post.id
+        })
+        response = self.client.post(
+            reverse("posts:add_comment", kwargs={
+                "username": self.author.username, "post_id": self.post.id
+            }),
+            {"text": "Свежий комментарий"},
+        )
+        self.assertIn(STICKY_COOKIE, response.cookies)
+        self.assertContains(self.client.get(post_url), "Свежий комментарий")
+
+        # остальные читают реплику, пока её не обновят
+        self.assertNotContains(Client().get(post_url), "Свежий комментарий")
+
+    def test_reads_do_not_pin(self):
+        response = self.client.get(reverse("posts:index"))
+        self.assertNotIn(STICKY_COOKIE, response.cookies)
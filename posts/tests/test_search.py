@@ -0,0 +1,89 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts import search
+from posts.models import Comment, Post
+
+User = get_user_model()
+
+
+class SearchTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="searcher")
+        cls.cats = Post.objects.create(
+            text="Кот спит на подоконнике", author=cls.author
+        )
+        cls.dogs = Post.objects.create(
+            text="Собака гуляет во дворе", author=cls.author
+        )
+
+    def setUp(self):
+        self.guest_client = Client()
+
+    def found(self, query):
+        response = self.guest_client.get(reverse("posts:search"), {"q": query})
+        self.assertEqual(response.status_code, 200)
+        return [post.id for post in response.context["page"]]
+
+    def test_finds_posts_by_words_and_prefix(self):
+        self.assertEqual(self.found("кот"), [self.cats.id])
+        self.assertEqual(self.found("подоконн"), [self.cats.id])
+        self.assertEqual(self.found("жираф"), [])
+
+    def test_comments_and_edits_are_indexed(self):
+        Comment.objects.create(
+            post=self.dogs, author=self.author, text="А кот лучше"
+        )
+        self.assertCountEqual(self.found("кот"), [self.cats.id, self.dogs.id])
+        cats = Post.objects.get(pk=self.cats.pk)
+        cats.text = "Жираф"
+        cats.save()
+        self.assertEqual(self.found("кот"), [self.dogs.id])
+        Post.objects.get(pk=self.dogs.pk).delete()
+        self.assertEqual(self.found("кот"), [])
+
+    def test_more_relevant_post_first(self):
+        many = Post.objects.create(
+            text="кот кот кот и ещё кот", author=self.author
+        )
+        self.assertEqual(self.found("кот"), [many.id, self.cats.id])
+
+    def test_fts_syntax_in_query_is_harmless(self):
+        self.assertEqual(self.found('кот*"('), [self.cats.id])
+
+    def test_pages_keep_query(self):
+        for num in range(12):
+            Post.objects.create(text=f"Ёж номер {num}", author=self.author)
+        response = self.guest_client.get(reverse("posts:search"), {"q": "ёж"})
+        page = response.context["page"]
+        self.assertEqual(len(page), 10)
+        self.assertContains(response, "?q=%D1%91%D0%B6&amp;page=2")
+        second = self.guest_client.get(
+            reverse("posts:search"), {"q": "ёж", "page": 2}
+        ).context["page"]
+        self.assertEqual(len(second), 2)
+        self.assertFalse(second.has_next())
+
+    def test_rebuild_command(self):
+        backend = search.get_backend()
+        call_command("rebuild_search_index", stdout=StringIO())
+        self.assertEqual(backend.search("собака", 0, 10), [self.dogs.id])
+
+    def test_recent_newest_first_by_own_text(self):
+        newer = Post.objects.create(text="Ёж спит", author=self.author)
+        comment = Comment.objects.create(
+            post=self.dogs, author=self.author, text="Щенок тоже спит"
+        )
+        for backend in (search.get_backend(), search.DatabaseBackend()):
+            with self.subTest(backend=type(backend).__name__):
+                self.assertEqual(
+                    backend.recent("спит", 10), [newer.id, self.cats.id]
+                )
+                self.assertEqual(
+                    backend.recent("спит", 10, comments=True), [comment.id]
+                )
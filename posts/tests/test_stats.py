@@ -0,0 +1,62 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.db import connection
+from django.test import Client, TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from posts.models import Follow, Post, UserStats
+
+User = get_user_model()
+
+
+class UserStatsTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="stats-author")
+        cls.reader = User.objects.create_user(username="stats-reader")
+        Post.objects.create(text="Пост 1", author=cls.author)
+        Post.objects.create(text="Пост 2", author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def test_counters_follow_writes(self):
+        self.reader_client.get(reverse(
+            "posts:profile_follow", kwargs={"username": self.author.username}
+        ))
+        Post.objects.filter(text="Пост 1").delete()
+        author_stats = UserStats.objects.get(user=self.author)
+        reader_stats = UserStats.objects.get(user=self.reader)
+        self.assertEqual(author_stats.post_count, 1)
+        self.assertEqual(author_stats.follower_count, 1)
+        self.assertEqual(reader_stats.following_count, 1)
+        self.reader_client.get(reverse(
+            "posts:profile_unfollow",
+            kwargs={"username": self.author.username}
+        ))
+        author_stats.refresh_from_db()
+        self.assertEqual(author_stats.follower_count, 0)
+
+    def test_profile_does_not_count(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.reader_client.get(reverse(
+                "posts:profile", kwargs={"username": self.author.username}
+            ))
+        sql = " ".join(query["sql"] for query in queries).upper()
+        self.assertNotIn("COUNT(", sql)
+        self.assertEqual(response.context["post_count"], 2)
+        self.assertEqual(response.context["subs"], 1)
+
+    def test_reconcile_repairs_drift(self):
+        UserStats.objects.filter(user=self.author).update(
+            post_count=100, follower_count=7
+        )
+        call_command("reconcile_stats", stdout=StringIO())
+        stats = UserStats.objects.get(user=self.author)
+        self.assertEqual(stats.post_count, 2)
+        self.assertEqual(stats.follower_count, 0)
@@ -0,0 +1,136 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.base import ContentFile
+from django.core.files.storage import FileSystemStorage
+from django.core.files.uploadedfile import (
+    SimpleUploadedFile, TemporaryUploadedFile
+)
+from django.core.management import call_command
+from django.test import TestCase, override_settings
+from PIL import Image
+
+from posts import feed_cache, storage, thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def jpeg_bytes(color):
+    buffer = BytesIO()
+    Image.new("RGB", (400, 300), color).save(buffer, "JPEG")
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ContentAddressedStorageTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        self.author = User.objects.create_user(username="storage-author")
+
+    def blobs(self, name):
+        return [
+            blob for blob in storage._walk(
+                storage.post_image_storage, storage.BLOBS_DIR
+            )
+            if os.path.samefile(
+                os.path.join(MEDIA_ROOT, blob), os.path.join(MEDIA_ROOT, name)
+            )
+        ]
+
+    def create_post(self, data, name="photo.jpg"):
+        return Post.objects.create(
+            text="Пост", author=self.author,
+            image=SimpleUploadedFile(name, data, content_type="image/jpeg"),
+        )
+
+    def test_same_upload_is_stored_once(self):
+        data = jpeg_bytes((10, 200, 10))
+        first = self.create_post(data, "a.jpg")
+        second = self.create_post(data, "a.jpg")
+        self.assertEqual(first.image.name, "posts/a.jpg")
+        self.assertNotEqual(first.image.name, second.image.name)
+        self.assertTrue(os.path.samefile(first.image.path, second.image.path))
+        blobs = list(storage._walk(storage.post_image_storage,
+                                   storage.BLOBS_DIR))
+        self.assertEqual(len(blobs), 1)
+
+    def test_duplicates_share_derivatives(self):
+        data = jpeg_bytes((10, 10, 200))
+        first = self.create_post(data)
+        second = self.create_post(data)
+        self.assertEqual(
+            thumbnails.generate(first.pk)["files"],
+            thumbnails.generate(second.pk)["files"],
+        )
+
+    def test_copy_when_hard_links_are_unsupported(self):
+        data = jpeg_bytes((200, 10, 10))
+        upload = TemporaryUploadedFile("copy.jpg", "image/jpeg", len(data),
+                                       None)
+        upload.write(data)
+        upload.seek(0)
+        with mock.patch("os.link", side_effect=OSError("no links")):
+            post = Post.objects.create(text="Копия", author=self.author,
+                                       image=upload)
+        upload.close()
+        with open(post.image.path, "rb") as stream:
+            self.assertEqual(stream.read(), data)
+        self.assertEqual(self.blobs(post.image.name), [])
+
+    def test_garbage_collection_keeps_referenced_files(self):
+        kept = self.create_post(jpeg_bytes((200, 200, 10)))
+        thumbnails.generate(kept.pk)
+        dropped = self.create_post(jpeg_bytes((10, 200, 200)))
+        dropped_files = thumbnails.generate(dropped.pk)["files"]
+        dropped_names = [dropped.image.name] + self.blobs(dropped.image.name)
+        dropped.delete()
+        removed = storage.collect_garbage(grace=0)
+        self.assertCountEqual(removed, dropped_names + dropped_files)
+        kept.refresh_from_db()
+        self.assertTrue(os.path.exists(kept.image.path))
+        self.assertTrue(kept.variants["files"])
+        self.assertTrue(all(
+            storage.post_image_storage.exists(name)
+            for name in kept.variants["files"]
+        ))
+
+    def test_grace_period_protects_fresh_files(self):
+        self.create_post(jpeg_bytes((90, 90, 90))).delete()
+        self.assertEqual(storage.collect_garbage(grace=3600), [])
+
+    def test_command_links_legacy_duplicates(self):
+        legacy_storage = FileSystemStorage()
+        data = jpeg_bytes((1, 2, 3))
+        names = [
+            legacy_storage.save("posts/old.jpg", ContentFile(data))
+            for _ in range(2)
+        ]
+        for name in names:
+            Post.objects.create(text="Старый", author=self.author, image=name)
+        posts = Post.objects.filter(image__in=names)
+        Post.objects.update(image_variants='{"files": []}')
+        updated = max(posts.values_list("updated", flat=True))
+        generation, _ = feed_cache.versions([(feed_cache.INDEX,)])
+        call_command("dedupe_media", grace=0, stdout=StringIO())
+        first, second = (legacy_storage.path(name) for name in names)
+        self.assertTrue(os.path.samefile(first, second))
+        self.assertEqual(posts.count(), len(names))
+        for post in posts:
+            self.assertEqual(post.image_variants, "")
+            self.assertGreater(post.updated, updated)
+        self.assertNotEqual(
+            feed_cache.versions([(feed_cache.INDEX,)])[0], generation
+        )
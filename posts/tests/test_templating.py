@@ -0,0 +1,95 @@
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.template import engines
+from django.template.loaders.filesystem import Loader
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+
+from posts.models import Post
+from yatube import templating
+
+User = get_user_model()
+
+# профиль production из settings.py
+PRODUCTION = [dict(
+    settings.TEMPLATES[0],
+    APP_DIRS=False,
+    OPTIONS=dict(
+        settings.TEMPLATE_OPTIONS,
+        debug=False,
+        loaders=[(
+            "django.template.loaders.cached.Loader", settings.TEMPLATE_LOADERS
+        )],
+    ),
+)]
+
+
+@override_settings(TEMPLATES=PRODUCTION, METRICS_SERVER_TIMING=True)
+class TemplateWarmUpTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        author = User.objects.create_user(username="template-author")
+        Post.objects.create(text="Пост из кэша шаблонов", author=author)
+
+    def setUp(self):
+        cache.clear()
+
+    def test_warm_up_compiles_project_templates(self):
+        names = templating.template_names(engines.all()[0].engine)
+        self.assertIn("index.html", names)
+        self.assertIn("post_item.html", names)
+        self.assertIn("admin/posts/post/moderation_confirmation.html", names)
+        self.assertEqual(templating.warm_up(), len(names))
+
+    def test_pages_after_warm_up_do_not_read_files(self):
+        templating.warm_up()
+        with mock.patch.object(Loader, "get_contents") as get_contents:
+            response = Client().get(reverse("posts:index"))
+        get_contents.assert_not_called()
+        self.assertContains(response, "Пост из кэша шаблонов")
+        self.assertIn("tpl;dur=", response["Server-Timing"])
+
+    def test_broken_template_is_logged(self):
+        directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, directory)
+        with open(os.path.join(directory, "broken.html"), "w") as stream:
+            stream.write("{% if %}")
+        templates = [dict(PRODUCTION[0], DIRS=[directory])]
+        with override_settings(TEMPLATES=templates), \
+                self.assertLogs("yatube.templating", "ERROR") as logs:
+            compiled = templating.warm_up()
+        self.assertIn("broken.html", logs.output[0])
+        self.assertGreater(compiled, 0)
+
+
+class ProductionProfileTests(TestCase):
+    def debug_for(self, **env):
+        # settings читаются один раз при импорте — в отдельном процессе
+        env = dict({
+            name: value for name, value in os.environ.items()
+            if name not in ("YATUBE_DEBUG", "YATUBE_TEMPLATES")
+        }, **env)
+        result = subprocess.run(
+            [sys.executable, "-c",
+             "from yatube import settings; print(settings.DEBUG)"],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+            check=True,
+        )
+        return result.stdout.strip()
+
+    def test_production_turns_debug_off(self):
+        self.assertEqual(self.debug_for(YATUBE_TEMPLATES="production"),
+                         "False")
+        self.assertEqual(self.debug_for(YATUBE_TEMPLATES="default"), "True")
+        self.assertEqual(
+            self.debug_for(YATUBE_TEMPLATES="production", YATUBE_DEBUG="1"),
+            "True",
+        )
@@ -0,0 +1,92 @@
+import os
+import shutil
+import tempfile
+from io import BytesIO, StringIO
+from unittest import mock
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.cache import cache
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import call_command
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image
+
+from posts import thumbnails
+from posts.models import Post
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ThumbnailPipelineTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        cache.clear()
+        buffer = BytesIO()
+        Image.new("RGB", (1200, 800), (200, 10, 10)).save(buffer, "JPEG")
+        self.author = User.objects.create_user(username="thumb-author")
+        self.post = Post.objects.create(
+            text="С картинкой",
+            author=self.author,
+            image=SimpleUploadedFile(
+                "big.jpg", buffer.getvalue(), content_type="image/jpeg"
+            ),
+        )
+        self.url = reverse(
+            "posts:profile", kwargs={"username": self.author.username}
+        )
+
+    def test_original_shown_until_thumbnail_ready(self):
+        response = Client().get(self.url)
+        self.assertContains(response, self.post.image.url)
+
+    def test_generate_stores_variants(self):
+        variants = thumbnails.generate(self.post.pk)
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.variants, variants)
+        self.assertEqual(
+            len(variants["files"]),
+            len(thumbnails.WIDTHS) * (len(thumbnails.FORMATS) + 1)
+        )
+        path = os.path.join(MEDIA_ROOT, variants["files"][-1])
+        with Image.open(path) as image:
+            self.assertEqual(image.size, (960, 339))
+        response = Client().get(self.url)
+        self.assertContains(response, 'type="image/webp"')
+        self.assertContains(response, variants["src"])
+
+    def test_replaced_image_is_not_overwritten(self):
+        build = thumbnails.build_variants
+
+        def replace_while_building(post, force=False):
+            variants = build(post, force)
+            # post_edit заменил картинку, пока шла генерация
+            Post.objects.filter(pk=post.pk).update(
+                image="posts/new.jpg", image_variants=""
+            )
+            return variants
+
+        with mock.patch.object(thumbnails, "build_variants",
+                               replace_while_building):
+            self.assertIsNone(thumbnails.generate(self.post.pk))
+        self.post.refresh_from_db()
+        self.assertEqual(self.post.image_variants, "")
+
+    def test_generated_variants_reach_cached_feed(self):
+        Client().get(self.url)
+        variants = thumbnails.generate(self.post.pk)
+        response = Client().get(self.url)
+        self.assertContains(response, variants["sources"][0]["srcset"])
+
+    def test_warm_command_fills_missing(self):
+        call_command("warm_thumbnails", workers=1, stdout=StringIO())
+        self.post.refresh_from_db()
+        self.assertTrue(self.post.variants)
@@ -0,0 +1,49 @@
+from io import StringIO
+
+from django.contrib.auth import get_user_model
+from django.core.management import call_command
+from django.test import Client, TestCase
+from django.urls import reverse
+
+from posts.models import Follow, Post, TimelineEntry
+
+User = get_user_model()
+
+
+class TimelineTests(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = User.objects.create_user(username="timeline-author")
+        cls.reader = User.objects.create_user(username="timeline-reader")
+        cls.old_post = Post.objects.create(text="Старый", author=cls.author)
+
+    def setUp(self):
+        self.reader_client = Client()
+        self.reader_client.force_login(self.reader)
+
+    def feed(self):
+        response = self.reader_client.get(reverse("posts:follow_index"))
+        return [post.text for post in response.context["page"]]
+
+    def test_follow_backfills_and_new_post_fans_out(self):
+        self.reader_client.get(reverse(
+            "posts:profile_follow", kwargs={"username": self.author.username}
+        ))
+        self.assertEqual(self.feed(), ["Старый"])
+        Post.objects.create(text="Новый", author=self.author)
+        self.assertEqual(self.feed(), ["Новый", "Старый"])
+
+    def test_unfollow_prunes_timeline(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        self.reader_client.get(reverse(
+            "posts:profile_unfollow",
+            kwargs={"username": self.author.username}
+        ))
+        self.assertFalse(TimelineEntry.objects.filter(user=self.reader))
+        self.assertEqual(self.feed(), [])
+
+    def test_rebuild_command_restores_timelines(self):
+        Follow.objects.create(user=self.reader, author=self.author)
+        TimelineEntry.objects.all().delete()
+        call_command("rebuild_timelines", stdout=StringIO())
+        self.assertEqual(self.feed(), ["Старый"])
@@ -0,0 +1,117 @@
+import shutil
+import tempfile
+import tracemalloc
+from io import BytesIO
+
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.test import Client, TestCase, override_settings
+from django.urls import reverse
+from PIL import Image, PngImagePlugin
+
+from posts.models import Post
+from posts.uploads import ImageUploadHandler
+
+User = get_user_model()
+
+MEDIA_ROOT = tempfile.mkdtemp(dir=settings.BASE_DIR)
+
+
+def make_image(size, image_format="JPEG", **options):
+    buffer = BytesIO()
+    Image.effect_noise(size, 60).convert("RGB").save(
+        buffer, image_format, **options
+    )
+    return buffer.getvalue()
+
+
+@override_settings(MEDIA_ROOT=MEDIA_ROOT)
+class ImageUploadTests(TestCase):
+    @classmethod
+    def tearDownClass(cls):
+        shutil.rmtree(MEDIA_ROOT, ignore_errors=True)
+        super().tearDownClass()
+
+    def setUp(self):
+        self.user = User.objects.create_user(username="uploader")
+        self.client = Client()
+        self.client.force_login(self.user)
+
+    def upload(self, content, name="photo.jpg"):
+        return self.client.post(reverse("posts:new_post"), {
+            "text": "С картинкой",
+            "image": SimpleUploadedFile(name, content, "image/jpeg"),
+        })
+
+    def test_oversized_dimensions_rejected(self):
+        response = self.upload(make_image((9000, 8), "PNG"), "wide.png")
+        self.assertFormError(
+            response, "form", "image", "Картинка 9000x8 слишком большая"
+        )
+        self.assertFalse(Post.objects.exists())
+
+    @override_settings(POST_IMAGE_MAX_BYTES=20 * 1024)
+    def test_oversized_file_rejected(self):
+        response = self.upload(make_image((600, 600), quality=95))
+        self.assertFormError(
+            response, "form", "image", "Файл больше 20,0\xa0КБ"
+        )
+
+    def test_csrf_still_checked(self):
+        client = Client(enforce_csrf_checks=True)
+        client.force_login(self.user)
+        response = client.post(reverse("posts:new_post"), {"text": "Без"})
+        self.assertEqual(response.status_code, 403)
+
+    def test_exif_is_stripped(self):
+        exif = Image.Exif()
+        exif[0x010F] = "Секретная камера"
+        response = self.upload(make_image((300, 200), exif=exif.tobytes()))
+        self.assertEqual(response.status_code, 302)
+        post = Post.objects.get()
+        with Image.open(post.image.path) as image:
+            self.assertEqual(image.size, (300, 200))
+            self.assertNotIn(0x010F, image.getexif())
+
+    def test_png_metadata_is_stripped(self):
+        info = PngImagePlugin.PngInfo()
+        info.add_text("GPS", "55.75, 37.61")
+        exif = Image.Exif()
+        exif[0x010F] = "Секретная камера"
+        content = make_image((300, 200), "PNG", pnginfo=info,
+                             exif=exif.tobytes())
+        response = self.upload(content, "map.png")
+        self.assertEqual(response.status_code, 302)
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual((image.format, image.size), ("PNG", (300, 200)))
+            self.assertNotIn("GPS", image.info)
+            self.assertNotIn(0x010F, image.getexif())
+
+    def test_gif_comment_stripped_frames_kept(self):
+        frames = [Image.new("P", (40, 30), color) for color in (1, 2, 3)]
+        buffer = BytesIO()
+        frames[0].save(buffer, "GIF", save_all=True, append_images=frames[1:],
+                       comment=b"secret", duration=100, loop=0)
+        response = self.upload(buffer.getvalue(), "anim.gif")
+        self.assertEqual(response.status_code, 302)
+        with Image.open(Post.objects.get().image.path) as image:
+            self.assertEqual(image.n_frames, 3)
+            self.assertNotIn("comment", image.info)
+
+    def test_handler_memory_is_bounded(self):
+        content = make_image((2500, 2500), quality=95)
+        handler = ImageUploadHandler()
+        handler.new_file("image", "big.jpg", "image/jpeg", len(content))
+        chunk_size = handler.chunk_size
+        tracemalloc.start()
+        for start in range(0, len(content), chunk_size):
+            handler.receive_data_chunk(
+                content[start:start + chunk_size], start
+            )
+        uploaded = handler.file_complete(len(content))
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        uploaded.close()
+        self.assertGreater(len(content), 2 * 1024 * 1024)
+        self.assertLess(peak, 1024 * 1024)
@@ -0,0 +1,180 @@
+"""Фоновая генерация адаптивных копий картинок постов.
+
+Для каждой картинки один раз делается набор ширин WIDTHS в WebP
+(и AVIF, если его умеет установленный Pillow) плюс JPEG как запасной
+вариант. Готовые srcset сохраняются в Post.image_variants, так что
+шаблон не обращается к бэкенду миниатюр.
+
+new_post и post_edit после коммита ставят пост в очередь; копии
+делает пул процессов, а шаблон до их появления показывает оригинал.
+При THUMBNAIL_WORKERS = 0 генерация идёт сразу, в том же процессе.
+"""
+import json
+import logging
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.db import connection, transaction
+from django.utils import timezone
+from PIL import Image, ImageOps
+
+from . import background, feed_cache
+from .storage import content_hash
+
+logger = logging.getLogger(__name__)
+
+# Пропорции карточки прежние: 960x339, обрезка по центру.
+CARD_WIDTH = 960
+CARD_HEIGHT = 339
+WIDTHS = (320, 480, 720, 960)
+SIZES = "(max-width: 960px) 100vw, 960px"
+FORMATS = [("webp", "WEBP", {"quality": 80, "method": 4})]
+if "AVIF" in Image.SAVE:
+    FORMATS.insert(0, ("avif", "AVIF", {"quality": 60}))
+FALLBACK = ("jpeg", "JPEG", {"quality": 85, "progressive": True,
+                             "optimize": True})
+DERIVATIVES_DIR = "posts/derivatives"
+
+
+def _init_worker(database):
+    # процессы пула работают с той же базой, что и родитель
+    settings.DATABASES["default"]["NAME"] = database
+    import django
+    django.setup()
+
+
+def _pool(workers):
+    return ProcessPoolExecutor(
+        max_workers=workers,
+        mp_context=multiprocessing.get_context("spawn"),
+        initializer=_init_worker,
+        initargs=(connection.settings_dict["NAME"],),
+    )
+
+
+def render_variant(image, width, image_format, options):
+    """Обрезает картинку под карточку нужной ширины и кодирует её."""
+    height = round(width * CARD_HEIGHT / CARD_WIDTH)
+    fitted = ImageOps.fit(image, (width, height), Image.LANCZOS)
+    if image_format == "JPEG" and fitted.mode != "RGB":
+        fitted = fitted.convert("RGB")
+    buffer = BytesIO()
+    fitted.save(buffer, image_format, **options)
+    return buffer.getvalue()
+
+
+def derivatives_dir(digest):
+    """Каталог копий по хэшу оригинала, общий для одинаковых картинок."""
+    return "{}/{}/{}".format(DERIVATIVES_DIR, digest[:2], digest)
+
+
+def _load_source(post):
+    with post.image.open("rb") as source:
+        image = Image.open(source)
+        image.load()
+    image = ImageOps.exif_transpose(image)
+    if image.mode not in ("RGB", "RGBA"):
+        image = image.convert("RGBA" if "A" in image.getbands() else "RGB")
+    return image
+
+
+def build_variants(post, force=False):
+    """Сохраняет копии картинки поста, возвращает метаданные.
+
+    Имена копий зависят только от содержимого картинки, поэтому у
+    постов с одинаковой картинкой копии общие: готовые файлы не
+    перекодируются, пока не передан force.
+    """
+    with post.image.open("rb") as source:
+        folder = derivatives_dir(content_hash(source))
+    image = None
+    variants = {"files": [], "sizes": SIZES}
+    for key, image_format, options in FORMATS + [FALLBACK]:
+        srcset = []
+        for width in WIDTHS:
+            name = "{}/{}.{}".format(folder, width, key)
+            if force or not default_storage.exists(name):
+                if image is None:
+                    image = _load_source(post)
+                default_storage.delete(name)
+                default_storage.save(name, ContentFile(
+                    render_variant(image, width, image_format, options)
+                ))
+            url = default_storage.url(name)
+            variants["files"].append(name)
+            srcset.append("{} {}w".format(url, width))
+        variants[key] = ", ".join(srcset)
+        # самая широкая копия запасного формата — обычный src
+        variants["src"] = url
+    variants["sources"] = [
+        {"type": "image/" + key, "srcset": variants[key]}
+        for key, _, _ in FORMATS
+    ]
+    return variants
+
+
+def generate(post_id, force=False):
+    """Делает адаптивные копии и сохраняет их описание в посте.
+
+    Описание записывается, только если картинка поста та же: если её
+    успели заменить, копии новой сделает задача, поставленная заменой.
+    """
+    from .deps import post_deps
+    from .models import Post
+
+    post = Post.objects.filter(pk=post_id).first()
+    if post is None or not post.image:
+        return None
+    try:
+        variants = build_variants(post, force)
+    except Exception:
+        logger.exception("Не удалось обработать картинку поста %s", post_id)
+        return None
+    same_image = Post.objects.filter(pk=post_id, image=post.image.name)
+    if not same_image.update(
+        image_variants=json.dumps(variants), updated=timezone.now()
+    ):
+        return None
+    # update() обходит сигналы
+    feed_cache.bump(*post_deps(Post.objects.filter(pk=post_id)))
+    return variants
+
+
+def generate_many(post_ids, workers, force=False):
+    """Обрабатывает картинки пачкой, возвращает число готовых."""
+    forced = [force] * len(post_ids)
+    if workers <= 1 or not background.shared_database():
+        return sum(1 for variants in map(generate, post_ids, forced)
+                   if variants)
+    with _pool(workers) as pool:
+        return sum(
+            1 for variants in pool.map(
+                generate, post_ids, forced, chunksize=16
+            )
+            if variants
+        )
+
+
+def _submit(post_id):
+    if background.run_inline(settings.THUMBNAIL_WORKERS):
+        generate(post_id)
+        return
+    try:
+        background.executor(
+            "thumbnails", lambda: _pool(settings.THUMBNAIL_WORKERS)
+        ).submit(generate, post_id)
+    except RuntimeError:
+        # пул сломан (например, упал процесс) — делаем сами
+        logger.exception("Очередь миниатюр недоступна")
+        generate(post_id)
+
+
+def enqueue(post):
+    """Ставит картинку поста в очередь после коммита транзакции."""
+    if post.image:
+        post_id = post.pk
+        transaction.on_commit(lambda: _submit(post_id))
@@ -0,0 +1,79 @@
+"""Fan-out-on-write для ленты подписок.
+
+Новый пост сразу раскладывается по TimelineEntry всех подписчиков
+автора, подписка добавляет в ленту посты автора, отписка их убирает.
+follow_index после этого читает только свою ленту.
+"""
+from django.db import transaction
+
+from .models import Follow, Post, PostQuerySet, TimelineEntry
+
+BATCH_SIZE = 500
+
+TIMELINE_FIELDS = ("id", "pub_date", "post") + tuple(
+    "post__" + field for field in PostQuerySet.FEED_FIELDS
+)
+
+
+def _insert(entries):
+    TimelineEntry.objects.bulk_create(
+        entries, batch_size=BATCH_SIZE, ignore_conflicts=True
+    )
+
+
+def fan_out_post(post):
+    """Кладёт пост в ленты всех подписчиков его автора."""
+    follower_ids = Follow.objects.filter(
+        author_id=post.author_id
+    ).values_list("user_id", flat=True)
+    _insert(
+        TimelineEntry(
+            user_id=user_id,
+            post_id=post.pk,
+            author_id=post.author_id,
+            pub_date=post.pub_date,
+        )
+        for user_id in follower_ids.iterator()
+    )
+
+
+def backfill(user_id, author_id):
+    """Добавляет в ленту читателя все посты автора."""
+    posts = Post.objects.filter(author_id=author_id).values_list(
+        "id", "pub_date"
+    )
+    entries = []
+    for post_id, pub_date in posts.iterator():
+        entries.append(TimelineEntry(
+            user_id=user_id,
+            post_id=post_id,
+            author_id=author_id,
+            pub_date=pub_date,
+        ))
+        if len(entries) >= BATCH_SIZE:
+            _insert(entries)
+            entries = []
+    _insert(entries)
+
+
+def prune(user_id, author_id):
+    """Убирает посты автора из ленты читателя."""
+    TimelineEntry.objects.filter(user_id=user_id, author_id=author_id).delete()
+
+
+def timeline_for(user):
+    return TimelineEntry.objects.filter(user=user).select_related(
+        "post__author", "post__group"
+    ).only(*TIMELINE_FIELDS)
+
+
+@transaction.atomic
+def rebuild_all():
+    """Пересобирает все ленты с нуля, возвращает число подписок."""
+    TimelineEntry.objects.all().delete()
+    follows = Follow.objects.values_list("user_id", "author_id")
+    count = 0
+    for user_id, author_id in follows.iterator():
+        backfill(user_id, author_id)
+        count += 1
+    return count
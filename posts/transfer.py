@@ -0,0 +1,407 @@
+"""Потоковая выгрузка и загрузка групп, постов, комментариев и подписок.
+
+Каждая таблица — отдельный файл <таблица>.jsonl или <таблица>.csv
+в каталоге выгрузки. Строки читаются и пишутся по одной: в памяти
+только текущая пачка, поэтому размер базы на память не влияет.
+Пользователи и группы указываются по username и slug, у постов
+и комментариев сохраняются id: комментарии находят свои посты,
+а повторный запуск прерванной загрузки пропускает уже загруженные
+строки. Загрузка рассчитана на пустую базу или на продолжение своей
+же загрузки: пост с занятым id будет пропущен.
+
+Загрузка идёт через bulk_create, сигналы не срабатывают — ленты
+подписок, счётчики и поисковый индекс пересобираются в конце
+(rebuild_derived), страницы лент в кэше устаревают по пачкам.
+"""
+import csv
+import itertools
+import json
+import os
+import shutil
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.hashers import make_password
+from django.core.files import File
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.utils import timezone
+from django.utils.dateparse import parse_datetime
+
+from . import feed_cache, stats, timeline
+from .models import Comment, Follow, Group, Post
+from .search import get_backend
+
+User = get_user_model()
+
+_dates_lock = threading.Lock()
+
+FORMATS = ("jsonl", "csv")
+MEDIA_DIR = "media"
+
+# таблица → модель и колонки выгрузки (имя → путь для values())
+TABLES = {
+    "groups": (Group, {
+        "slug": "slug",
+        "title": "title",
+        "description": "description",
+    }),
+    "posts": (Post, {
+        "id": "id",
+        "text": "text",
+        "pub_date": "pub_date",
+        "updated": "updated",
+        "author": "author__username",
+        "group": "group__slug",
+        "image": "image",
+    }),
+    "comments": (Comment, {
+        "id": "id",
+        "post": "post_id",
+        "author": "author__username",
+        "text": "text",
+        "created": "created",
+    }),
+    "follows": (Follow, {
+        "user": "user__username",
+        "author": "author__username",
+    }),
+}
+
+
+def table_path(directory, table, file_format):
+    return os.path.join(directory, "{}.{}".format(table, file_format))
+
+
+class Progress:
+    """Печатает число строк и скорость не чаще раза в interval секунд."""
+
+    def __init__(self, table, write, interval=2.0):
+        self.table = table
+        self.write = write
+        self.interval = interval
+        self.rows = 0
+        self.skipped = 0
+        self.started = self.reported = time.monotonic()
+
+    def add(self, rows, skipped=0):
+        self.rows += rows
+        self.skipped += skipped
+        now = time.monotonic()
+        if now - self.reported >= self.interval:
+            self.reported = now
+            self.write(self.line())
+
+    def line(self):
+        elapsed = max(time.monotonic() - self.started, 1e-6)
+        line = "{}: {} строк, {:.0f} строк/с".format(
+            self.table, self.rows, self.rows / elapsed
+        )
+        if self.skipped:
+            line += ", пропущено {}".format(self.skipped)
+        return line
+
+
+# --- выгрузка ---------------------------------------------------------
+
+def _rows(table, chunk_size):
+    model, columns = TABLES[table]
+    names = list(columns)
+    queryset = model.objects.order_by("pk").values_list(
+        *columns.values()
+    )
+    for values in queryset.iterator(chunk_size=chunk_size):
+        yield dict(zip(names, values))
+
+
+def _isoformat(value):
+    # полная точность: DjangoJSONEncoder срезает микросекунды
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    raise TypeError(repr(value))
+
+
+def _write_jsonl(stream, rows, columns, progress):
+    for row in rows:
+        stream.write(json.dumps(row, ensure_ascii=False, default=_isoformat))
+        stream.write("\n")
+        progress.add(1)
+
+
+def _write_csv(stream, rows, columns, progress):
+    writer = csv.DictWriter(stream, fieldnames=list(columns))
+    writer.writeheader()
+    for row in rows:
+        writer.writerow({
+            name: _isoformat(value) if hasattr(value, "isoformat") else value
+            for name, value in row.items()
+        })
+        progress.add(1)
+
+
+def _copy_out(source_storage, target_dir, name):
+    target = os.path.join(target_dir, name)
+    os.makedirs(os.path.dirname(target), exist_ok=True)
+    with source_storage.open(name) as source, open(target, "wb") as copy:
+        shutil.copyfileobj(source, copy)
+
+
+def export(directory, file_format="jsonl", media=False, workers=8,
+           chunk_size=2000, write=print):
+    """Выгружает все таблицы в directory; media — с файлами картинок."""
+    os.makedirs(directory, exist_ok=True)
+    writer = _write_jsonl if file_format == "jsonl" else _write_csv
+    for table, (model, columns) in TABLES.items():
+        progress = Progress(table, write)
+        path = table_path(directory, table, file_format)
+        with open(path, "w", encoding="utf-8", newline="") as stream:
+            writer(stream, _rows(table, chunk_size), columns, progress)
+        write(progress.line())
+    if media:
+        _export_media(directory, workers, chunk_size, write)
+
+
+def _export_media(directory, workers, chunk_size, write):
+    storage = Post._meta.get_field("image").storage
+    target_dir = os.path.join(directory, MEDIA_DIR)
+    names = Post.objects.exclude(image="").exclude(image=None).order_by(
+        "pk"
+    ).values_list("image", flat=True).iterator(chunk_size=chunk_size)
+    progress = Progress("media", write)
+    with ThreadPoolExecutor(max_workers=workers) as pool:
+        # map забирает задачи пачками, чтобы не держать в памяти все имена
+        for batch in _batches(names, chunk_size):
+            for _ in pool.map(
+                lambda name: _copy_out(storage, target_dir, name), batch
+            ):
+                progress.add(1)
+    write(progress.line())
+
+
+# --- загрузка ---------------------------------------------------------
+
+def _batches(iterable, size):
+    iterator = iter(iterable)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def _read(path, file_format):
+    with open(path, encoding="utf-8", newline="") as stream:
+        if file_format == "jsonl":
+            for line in stream:
+                if line.strip():
+                    yield json.loads(line)
+        else:
+            for row in csv.DictReader(stream):
+                # в CSV нет None: пустая строка — отсутствующее значение
+                yield {name: value if value != "" else None
+                       for name, value in row.items()}
+
+
+def _date(value):
+    return parse_datetime(value) if value else timezone.now()
+
+
+@contextmanager
+def _keep_dates():
+    """bulk_create не перезаписывает даты из выгрузки на «сейчас».
+
+    auto_now и auto_now_add — свойства общих для процесса полей модели:
+    pre_save ставит «сейчас», что бы ни лежало в объекте. На время
+    загрузки они выключены для всего процесса, поэтому load() —
+    отдельный процесс (команда import_content), а не код, вызываемый
+    из работающего сайта. Замок не даёт двум загрузкам в одном процессе
+    вернуть флаги друг другу не вовремя.
+    """
+    fields = [
+        Post._meta.get_field("pub_date"),
+        Post._meta.get_field("updated"),
+        Comment._meta.get_field("created"),
+    ]
+    with _dates_lock:
+        saved = [(field.auto_now, field.auto_now_add) for field in fields]
+        for field in fields:
+            field.auto_now = field.auto_now_add = False
+        try:
+            yield
+        finally:
+            for field, (auto_now, auto_now_add) in zip(fields, saved):
+                field.auto_now, field.auto_now_add = auto_now, auto_now_add
+
+
+def _user_ids(usernames):
+    """username → id; недостающих пользователей заводит без пароля."""
+    usernames = set(usernames) - {None}
+    found = dict(User.objects.filter(username__in=usernames).values_list(
+        "username", "id"
+    ))
+    missing = usernames - set(found)
+    if missing:
+        password = make_password(None)
+        User.objects.bulk_create(
+            [User(username=name, password=password) for name in missing],
+            ignore_conflicts=True,
+        )
+        found.update(User.objects.filter(username__in=missing).values_list(
+            "username", "id"
+        ))
+    return found
+
+
+def _group_ids(slugs):
+    slugs = set(slugs) - {None}
+    return dict(Group.objects.filter(slug__in=slugs).values_list(
+        "slug", "id"
+    ))
+
+
+class _Importer:
+    def __init__(self, media_dir, pool):
+        self.media_dir = media_dir
+        self.pool = pool
+        self.storage = Post._meta.get_field("image").storage
+
+    def groups(self, rows):
+        objects = [
+            Group(slug=row["slug"], title=row["title"],
+                  description=row.get("description") or "")
+            for row in rows
+        ]
+        return objects, []
+
+    def posts(self, rows):
+        users = _user_ids(row["author"] for row in rows)
+        groups = _group_ids(row.get("group") for row in rows)
+        images = self._copy_images(row.get("image") for row in rows)
+        objects = [
+            Post(
+                id=int(row["id"]),
+                text=row["text"] or "",
+                pub_date=_date(row.get("pub_date")),
+                updated=_date(row.get("updated") or row.get("pub_date")),
+                author_id=users[row["author"]],
+                group_id=groups.get(row.get("group")),
+                image=image,
+            )
+            for row, image in zip(rows, images)
+        ]
+        deps = [(feed_cache.INDEX,)]
+        deps.extend((feed_cache.AUTHOR, name) for name in users)
+        deps.extend((feed_cache.GROUP, slug) for slug in groups)
+        return objects, deps
+
+    def comments(self, rows):
+        post_ids = set(Post.objects.filter(
+            id__in={int(row["post"]) for row in rows}
+        ).values_list("id", flat=True))
+        rows = [row for row in rows if int(row["post"]) in post_ids]
+        users = _user_ids(row["author"] for row in rows)
+        objects = [
+            Comment(
+                id=int(row["id"]),
+                post_id=int(row["post"]),
+                author_id=users[row["author"]],
+                text=row["text"] or "",
+                created=_date(row.get("created")),
+            )
+            for row in rows
+        ]
+        return objects, [(feed_cache.POST, pk) for pk in post_ids]
+
+    def follows(self, rows):
+        users = _user_ids(
+            itertools.chain.from_iterable(
+                (row["user"], row["author"]) for row in rows
+            )
+        )
+        objects = [
+            Follow(user_id=users[row["user"]], author_id=users[row["author"]])
+            for row in rows
+            if row["user"] != row["author"]
+        ]
+        return objects, [(feed_cache.AUTHOR, name) for name in users]
+
+    def _copy_images(self, names):
+        names = list(names)
+        if not self.media_dir:
+            return [name or "" for name in names]
+        return list(self.pool.map(self._copy_in, names))
+
+    def _copy_in(self, name):
+        if not name:
+            return ""
+        source = os.path.join(self.media_dir, name)
+        if self.storage.exists(name) or not os.path.exists(source):
+            return name
+        with open(source, "rb") as stream:
+            return self.storage.save(name, File(stream))
+
+
+def load(directory, file_format="jsonl", media=False, workers=8,
+         batch_size=1000, transaction_size=20000, write=print):
+    """Загружает выгрузку из directory, возвращает {таблица: строк}."""
+    media_dir = os.path.join(directory, MEDIA_DIR) if media else None
+    loaded = {}
+    with ThreadPoolExecutor(max_workers=workers) as pool, _keep_dates():
+        importer = _Importer(media_dir, pool)
+        for table, (model, _) in TABLES.items():
+            path = table_path(directory, table, file_format)
+            if not os.path.exists(path):
+                continue
+            progress = Progress(table, write)
+            batches = _batches(_read(path, file_format), batch_size)
+            per_transaction = max(transaction_size // batch_size, 1)
+            while True:
+                chunk = list(itertools.islice(batches, per_transaction))
+                if not chunk:
+                    break
+                deps = set()
+                with transaction.atomic():
+                    # ignore_conflicts молча пропускает занятые id, и
+                    # bulk_create об этом не сообщает: вставленное — это
+                    # разница COUNT(*) до и после транзакции
+                    before = model.objects.count()
+                    read = 0
+                    for rows in chunk:
+                        objects, batch_deps = getattr(importer, table)(rows)
+                        model.objects.bulk_create(
+                            objects, ignore_conflicts=True
+                        )
+                        deps.update(batch_deps)
+                        read += len(rows)
+                    inserted = model.objects.count() - before
+                progress.add(inserted, read - inserted)
+                feed_cache.bump(*deps)
+            write(progress.line())
+            loaded[table] = progress.rows
+    _reset_sequences()
+    return loaded
+
+
+def _reset_sequences():
+    """После вставки с явными id счётчики первичных ключей — за максимумом."""
+    statements = connection.ops.sequence_reset_sql(
+        no_style(), [Group, Post, Comment, Follow]
+    )
+    with connection.cursor() as cursor:
+        for sql in statements:
+            cursor.execute(sql)
+
+
+def rebuild_derived(write=print):
+    """Ленты подписок, счётчики и поиск после загрузки мимо сигналов."""
+    for name, step in (
+        ("ленты подписок", timeline.rebuild_all),
+        ("счётчики", stats.reconcile),
+        ("поисковый индекс", lambda: get_backend().rebuild()),
+    ):
+        started = time.monotonic()
+        step()
+        write("{}: {:.1f} с".format(name, time.monotonic() - started))
@@ -0,0 +1,196 @@
+"""Потоковая приёмка картинок постов.
+
+ImageUploadHandler пишет загрузку во временный файл кусками, как
+стандартный TemporaryFileUploadHandler, но по первым килобайтам
+определяет формат и размеры картинки (Pillow читает только заголовок)
+и обрывает приём, если файл или картинка больше лимитов из settings.
+Отклонённая загрузка превращается в RejectedUpload, сообщение из
+которого показывает PostForm. Обработчик включает декоратор
+image_uploads на view с формой поста, остальной сайт принимает файлы
+стандартными обработчиками Django. У принятых картинок убираются
+метаданные (EXIF, GPS, XMP, текстовые блоки): у JPEG — потоковым
+проходом по сегментам, без декодирования, остальные форматы
+пересохраняются.
+"""
+import shutil
+import tempfile
+from functools import wraps
+from io import BytesIO
+
+from django.conf import settings
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.files.uploadhandler import TemporaryFileUploadHandler
+from django.template.defaultfilters import filesizeformat
+from django.views.decorators.csrf import csrf_exempt, csrf_protect
+from PIL import Image, ImageOps
+
+ALLOWED_FORMATS = ("JPEG", "PNG", "GIF", "WEBP")
+# Дальше заголовка не ищем: у JPEG перед SOF бывает большой EXIF.
+MAX_HEADER_BYTES = 512 * 1024
+COPY_CHUNK = 64 * 1024
+# APP1 (EXIF, XMP), APP13 (IPTC) и комментарии; ICC и Adobe остаются.
+DROPPED_MARKERS = (0xE1, 0xED, 0xFE)
+
+
+def _limit(name, default):
+    return getattr(settings, name, default)
+
+
+class RejectedUpload(SimpleUploadedFile):
+    """Пустая заглушка вместо файла, не прошедшего лимиты."""
+
+    def __init__(self, name, rejection):
+        super().__init__(name, b"", content_type="application/octet-stream")
+        self.rejection = rejection
+
+
+def read_header(data):
+    """Формат и размеры по началу файла или None, если данных мало."""
+    try:
+        with Image.open(BytesIO(data)) as image:
+            return image.format, image.size
+    except (OSError, SyntaxError, ValueError):
+        return None
+
+
+def check_limits(image_format, size, file_size=0):
+    """Возвращает текст отказа или None."""
+    max_bytes = _limit("POST_IMAGE_MAX_BYTES", 10 * 1024 * 1024)
+    max_side = _limit("POST_IMAGE_MAX_SIDE", 8000)
+    max_pixels = _limit("POST_IMAGE_MAX_PIXELS", 40 * 1000 * 1000)
+    if file_size > max_bytes:
+        return "Файл больше {}".format(filesizeformat(max_bytes))
+    if image_format is None:
+        return None
+    if image_format not in ALLOWED_FORMATS:
+        return "Формат {} не поддерживается".format(image_format)
+    width, height = size
+    if max(width, height) > max_side or width * height > max_pixels:
+        return "Картинка {}x{} слишком большая".format(width, height)
+    return None
+
+
+def _copy_segments(source, target):
+    """Копирует JPEG, пропуская сегменты DROPPED_MARKERS."""
+    if source.read(2) != b"\xff\xd8":
+        raise ValueError("not a JPEG")
+    target.write(b"\xff\xd8")
+    while True:
+        marker = source.read(2)
+        if len(marker) < 2 or marker[0] != 0xFF:
+            raise ValueError("broken JPEG")
+        if marker[1] == 0xDA:
+            # дальше данные скана — копируем как есть
+            target.write(marker)
+            for chunk in iter(lambda: source.read(COPY_CHUNK), b""):
+                target.write(chunk)
+            return
+        length = source.read(2)
+        segment = source.read(int.from_bytes(length, "big") - 2)
+        if marker[1] not in DROPPED_MARKERS:
+            target.write(marker + length + segment)
+
+
+def _reencode(image, target):
+    """Сохраняет картинку заново без метаданных, анимацию — целиком."""
+    image_format = image.format
+    options = {
+        # пустые значения: плагины Pillow не пишут EXIF, XMP и комментарий
+        "exif": b"", "xmp": b"", "comment": b"",
+        "icc_profile": image.info.get("icc_profile"),
+    }
+    if getattr(image, "is_animated", False):
+        options["save_all"] = True
+    else:
+        image = ImageOps.exif_transpose(image)
+    if image_format == "JPEG":
+        options["quality"] = 92
+    elif image_format == "WEBP":
+        options["quality"] = 90
+    image.save(target, image_format, **options)
+
+
+def strip_metadata(uploaded):
+    """Убирает метаданные загруженной картинки.
+
+    JPEG без поворота в EXIF чистится по сегментам, не раскрывая
+    картинку. Повёрнутый JPEG и другие форматы один раз декодируются
+    (размеры уже ограничены лимитами) и сохраняются заново.
+    """
+    path = uploaded.temporary_file_path()
+    with tempfile.TemporaryFile(dir=settings.FILE_UPLOAD_TEMP_DIR) as clean:
+        with Image.open(path) as image:
+            orientation = image.getexif().get(0x0112, 1)
+            if image.format == "JPEG" and orientation == 1:
+                with open(path, "rb") as source:
+                    _copy_segments(source, clean)
+            else:
+                _reencode(image, clean)
+        # переписываем тот же временный файл: на него ссылается upload
+        clean.seek(0)
+        target = uploaded.file
+        target.seek(0)
+        target.truncate()
+        shutil.copyfileobj(clean, target, COPY_CHUNK)
+        uploaded.size = target.tell()
+        target.flush()
+        target.seek(0)
+
+
+class ImageUploadHandler(TemporaryFileUploadHandler):
+    """Загрузка во временный файл с проверкой заголовка на лету."""
+
+    def new_file(self, *args, **kwargs):
+        super().new_file(*args, **kwargs)
+        self.received = 0
+        self.head = BytesIO()
+        self.header = None
+        self.rejection = None
+
+    def receive_data_chunk(self, raw_data, start):
+        if self.rejection:
+            return None
+        self.received += len(raw_data)
+        if self.header is None and self.head.tell() < MAX_HEADER_BYTES:
+            self.head.write(raw_data)
+            self.header = read_header(self.head.getvalue())
+        image_format, size = self.header or (None, None)
+        self.rejection = check_limits(image_format, size, self.received)
+        if self.header is None and self.head.tell() >= MAX_HEADER_BYTES:
+            self.rejection = "Не удалось прочитать картинку"
+        if self.rejection:
+            self.file.close()
+            return None
+        return super().receive_data_chunk(raw_data, start)
+
+    def file_complete(self, file_size):
+        if self.header is None and not self.rejection:
+            self.file.close()
+            self.rejection = "Загрузите картинку"
+        if self.rejection:
+            return RejectedUpload(self.file_name, self.rejection)
+        uploaded = super().file_complete(file_size)
+        try:
+            strip_metadata(uploaded)
+        except (OSError, SyntaxError, ValueError):
+            # Pillow решит при проверке формы, картинка ли это
+            pass
+        uploaded.image_format, uploaded.image_size = self.header
+        return uploaded
+
+
+def image_uploads(view):
+    """Принимает файлы запроса через ImageUploadHandler.
+
+    Обработчики меняются только до первого чтения request.POST и
+    request.FILES, а CsrfViewMiddleware читает POST раньше view, —
+    поэтому проверка CSRF переносится внутрь, после замены.
+    """
+    protected = csrf_protect(view)
+
+    @csrf_exempt
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        request.upload_handlers = [ImageUploadHandler(request)]
+        return protected(request, *args, **kwargs)
+    return wrapper
@@ -1,40 +1,75 @@
+from urllib.parse import urlencode
+
 from django.shortcuts import render, get_object_or_404, redirect
-from django.core.paginator import Paginator
 from django.contrib.auth.decorators import login_required
 from django.urls import reverse
 from django.contrib.auth import get_user_model
+from django.db import transaction
+from yatube.replica import replica_reads
 
-from .models import Post, Group, Follow
+from .models import Comment, Post, Group, Follow
 from .forms import PostForm, CommentForm
+from . import feed_cache, thumbnails
+from .feed_cache import cached_feed
+from .parallel import gather
+from .paginator import (
+    CommentPaginator, RankedPaginator, TimelinePaginator, get_cursor_page
+)
+from .search import SearchResults
+from .stats import stats_for
+from .timeline import timeline_for
+from .uploads import image_uploads
 
 User = get_user_model()
 
+COMMENTS_PER_PAGE = 50
+SEARCH_PER_PAGE = 10
+
 
+@replica_reads
+@cached_feed(lambda: [(feed_cache.INDEX,)])
 def index(request):
-    post_list = Post.objects.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = Post.objects.for_feed()
+    page = get_cursor_page(request, post_list, 10)
     return render(request, "index.html", {"page": page, })
 
 
+@replica_reads
+def search(request):
+    query = request.GET.get("q", "").strip()
+    page = None
+    if query:
+        page = get_cursor_page(
+            request, SearchResults(query), SEARCH_PER_PAGE, RankedPaginator
+        )
+    context = {
+        "query": query,
+        "page": page,
+        "page_params": urlencode({"q": query}) + "&",
+    }
+    return render(request, "search.html", context)
+
+
 @login_required
+@image_uploads
 def new_post(request):
     form = PostForm(request.POST or None, files=request.FILES or None)
     if form.is_valid():
         new_form = form.save(commit=False)
         new_form.author = request.user
-        new_form.save()
+        with transaction.atomic():
+            new_form.save()
+            thumbnails.enqueue(new_form)
         return redirect(reverse("posts:index"))
     return render(request, "new_post.html", {"form": form, "is_new": True})
 
 
+@replica_reads
+@cached_feed(lambda slug: [(feed_cache.GROUP, slug)])
 def group_post(request, slug):
     group = get_object_or_404(Group, slug=slug)
-    post_list = group.group_posts.all()
-    paginator = Paginator(post_list, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    post_list = group.group_posts.for_feed()
+    page = get_cursor_page(request, post_list, 10)
     return render(
         request,
         "group.html",
@@ -42,43 +77,60 @@ def group_post(request, slug):
     )
 
 
+@replica_reads
+@cached_feed(lambda username: [(feed_cache.AUTHOR, username)])
 def profile(request, username):
     author = get_object_or_404(User, username=username)
-    signed = Follow.objects.filter(user=author).count()
-    subs = Follow.objects.filter(author=author).count()
-    following = False
-    if request.user.is_authenticated:
-        user = get_object_or_404(User, user=request.user.username)
-        if Follow.objects.filter(user=user, author=author).exists():
-            following = True
-    post_list = author.posts.all()
-    post_count = post_list.count()
-    paginator = Paginator(post_list, 5)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    user = request.user if request.user.is_authenticated else None
+    stats, following, page = gather(
+        lambda: stats_for(author),
+        lambda: user is not None and Follow.objects.filter(
+            user=user, author=author
+        ).exists(),
+        lambda: get_cursor_page(request, author.posts.for_feed(), 5),
+    )
     context = {
         "page": page,
         "author": author,
-        "post_count": post_count,
+        "post_count": stats.post_count,
         "following": following,
-        "signed": signed,
-        "subs": subs
+        "signed": stats.following_count,
+        "subs": stats.follower_count
     }
     return render(request, "profile.html", context)
 
 
+@replica_reads
+@cached_feed(lambda username, post_id: [
+    (feed_cache.POST, post_id), (feed_cache.AUTHOR, username)
+])
 def post_view(request, username, post_id):
     author = get_object_or_404(User, username=username)
-    post = get_object_or_404(Post, id=post_id, author=author)
-    post_count = author.posts.all().count()
+    comment_paginator = CommentPaginator(
+        Comment.objects.filter(post_id=post_id).select_related(
+            "author"
+        ).only(
+            "id", "text", "created", "post",
+            "author__id", "author__username"
+        ),
+        COMMENTS_PER_PAGE
+    )
+    # комментарии грузятся в пуле вместе с постом
+    post, post_count, (comments, comments_next) = gather(
+        lambda: get_object_or_404(
+            Post.objects.for_feed(), id=post_id, author=author
+        ),
+        lambda: stats_for(author).post_count,
+        lambda: comment_paginator.window_page(request.GET.get("comments")),
+    )
     form = CommentForm()
-    comments = post.comments.all()
     context = {
         "post": post,
         "author": author,
         "post_count": post_count,
         "form": form,
-        "comments": comments
+        "comments": comments,
+        "comments_next": comments_next,
     }
     return render(
         request,
@@ -88,6 +140,7 @@ def post_view(request, username, post_id):
 
 
 @login_required
+@image_uploads
 def post_edit(request, username, post_id):
     author = get_object_or_404(User, username=username)
     if request.user == author:
@@ -98,7 +151,13 @@ def post_edit(request, username, post_id):
             instance=edit_post
         )
         if form.is_valid():
-            form.save()
+            image_changed = "image" in form.changed_data
+            if image_changed:
+                edit_post.image_variants = ""
+            with transaction.atomic():
+                form.save()
+                if image_changed:
+                    thumbnails.enqueue(edit_post)
             return redirect("posts:post", username=username, post_id=post_id)
         context = {
             "form": form,
@@ -137,7 +196,8 @@ def add_comment(request, username, post_id):
         new_comment = form.save(commit=False)
         new_comment.author = user
         new_comment.post = post
-        new_comment.save()
+        with transaction.atomic():
+            new_comment.save()
         return redirect(
             reverse(
                 "posts:post",
@@ -152,12 +212,11 @@ def add_comment(request, username, post_id):
     )
 
 
+@replica_reads
 @login_required
 def follow_index(request):
-    following_posts = Post.objects.filter(author__following__user=request.user)
-    paginator = Paginator(following_posts, 10)
-    page_number = request.GET.get("page")
-    page = paginator.get_page(page_number)
+    entries = timeline_for(request.user)
+    page = get_cursor_page(request, entries, 10, TimelinePaginator)
     context = {
         "page": page,
         "follow": True,
@@ -170,7 +229,8 @@ def profile_follow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if (user != author):
-        Follow.objects.get_or_create(user=user, author=author)
+        with transaction.atomic():
+            Follow.objects.get_or_create(user=user, author=author)
     return redirect(reverse("posts:profile", kwargs={"username": username}))
 
 
@@ -179,5 +239,6 @@ def profile_unfollow(request, username):
     user = request.user
     author = get_object_or_404(User, username=username)
     if (user != author):
-        Follow.objects.filter(user=user, author=author).delete()
+        with transaction.atomic():
+            Follow.objects.filter(user=user, author=author).delete()
     return redirect(reverse("posts:profile", kwargs={"username": username}))
@@ -1,5 +1,7 @@
+from django import forms
 from django.contrib.auth.forms import UserCreationForm
 from django.contrib.auth import get_user_model
+from django.urls import Resolver404, resolve
 
 User = get_user_model()
 
@@ -8,3 +10,14 @@ class CreationForm(UserCreationForm):
     class Meta(UserCreationForm.Meta):
         model = User
         fields = ['first_name', 'last_name', 'username', 'email']
+
+    def clean_username(self):
+        username = self.cleaned_data["username"]
+        # /<username>/ должен вести в профиль, а не в search/, new/ и т.п.
+        try:
+            match = resolve("/{}/".format(username))
+        except Resolver404:
+            return username
+        if match.view_name != "posts:profile":
+            raise forms.ValidationError("Это имя занято адресом сайта")
+        return username
@@ -0,0 +1,31 @@
+from django.contrib.auth import get_user_model
+from django.test import TestCase
+from django.urls import reverse
+
+from .forms import CreationForm
+
+User = get_user_model()
+
+
+class CreationFormTests(TestCase):
+    def form(self, username):
+        return CreationForm({
+            "username": username,
+            "email": "user@example.com",
+            "password1": "Xq7-long-pass",
+            "password2": "Xq7-long-pass",
+        })
+
+    def test_site_paths_are_reserved(self):
+        for username in ("search", "new", "follow", "admin"):
+            with self.subTest(username=username):
+                form = self.form(username)
+                self.assertFalse(form.is_valid())
+                self.assertIn("username", form.errors)
+
+    def test_profile_of_new_user_resolves(self):
+        self.assertTrue(self.form("reader").is_valid())
+        user = self.form("reader").save()
+        response = self.client.get(reverse("posts:profile",
+                                           args=[user.username]))
+        self.assertEqual(response.context["author"], user)
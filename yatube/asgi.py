@@ -0,0 +1,153 @@
+"""
+ASGI config for yatube project.
+
+    uvicorn yatube.asgi:application --workers 2
+
+Django 2.2 не умеет ASGI (он появился в 3.0), поэтому здесь небольшой
+мост: событийный цикл сервера держит соединения, читает тело запроса
+и отдаёт ответ, а сам Django работает в пуле из ASGI_THREADS потоков.
+Медленный клиент занимает только сокет в цикле, а не рабочий поток,
+как у синхронного WSGI-сервера. На Django 3.0+ используется родной
+обработчик.
+"""
+
+import asyncio
+import os
+import sys
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'yatube.settings')
+
+# тело больше этого уходит из памяти во временный файл
+SPOOL_BYTES = 1024 * 1024
+
+
+def _environ(scope, body):
+    server = scope.get("server") or ("localhost", 80)
+    client = scope.get("client") or ("", 0)
+    environ = {
+        "REQUEST_METHOD": scope["method"],
+        "SCRIPT_NAME": scope.get("root_path", ""),
+        # WSGI хранит путь байтами, раскрытыми как latin-1
+        "PATH_INFO": scope["path"].encode("utf-8").decode("latin-1"),
+        "QUERY_STRING": scope.get("query_string", b"").decode("latin-1"),
+        "SERVER_NAME": server[0],
+        "SERVER_PORT": str(server[1]),
+        "REMOTE_ADDR": client[0],
+        "SERVER_PROTOCOL": "HTTP/" + scope.get("http_version", "1.1"),
+        "wsgi.version": (1, 0),
+        "wsgi.url_scheme": scope.get("scheme", "http"),
+        "wsgi.input": body,
+        "wsgi.errors": sys.stderr,
+        "wsgi.multithread": True,
+        "wsgi.multiprocess": True,
+        "wsgi.run_once": False,
+    }
+    for raw_name, raw_value in scope.get("headers", []):
+        name = raw_name.decode("latin-1").upper().replace("-", "_")
+        value = raw_value.decode("latin-1")
+        if name not in ("CONTENT_TYPE", "CONTENT_LENGTH"):
+            name = "HTTP_" + name
+        if name in environ:
+            value = environ[name] + "," + value
+        environ[name] = value
+    return environ
+
+
+class WsgiBridge:
+    """ASGI-приложение поверх WSGI-приложения и пула потоков."""
+
+    def __init__(self, wsgi_application, threads):
+        self.wsgi_application = wsgi_application
+        self.executor = ThreadPoolExecutor(
+            max_workers=threads, thread_name_prefix="yatube-asgi"
+        )
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "lifespan":
+            await self._lifespan(receive, send)
+            return
+        if scope["type"] != "http":
+            raise ValueError("Поддерживается только HTTP: " + scope["type"])
+        body = await self._read_body(receive)
+        loop = asyncio.get_running_loop()
+        try:
+            status, headers, chunks = await loop.run_in_executor(
+                self.executor, self._call_wsgi, _environ(scope, body)
+            )
+        finally:
+            body.close()
+        await send({
+            "type": "http.response.start",
+            "status": status,
+            "headers": headers,
+        })
+        for chunk in chunks:
+            await send({
+                "type": "http.response.body",
+                "body": chunk,
+                "more_body": True,
+            })
+        await send({"type": "http.response.body", "body": b""})
+
+    async def _lifespan(self, receive, send):
+        while True:
+            message = await receive()
+            if message["type"] == "lifespan.startup":
+                await send({"type": "lifespan.startup.complete"})
+            elif message["type"] == "lifespan.shutdown":
+                self.executor.shutdown(wait=False)
+                await send({"type": "lifespan.shutdown.complete"})
+                return
+
+    async def _read_body(self, receive):
+        body = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES)
+        while True:
+            message = await receive()
+            if message["type"] == "http.disconnect":
+                break
+            body.write(message.get("body", b""))
+            if not message.get("more_body", False):
+                break
+        body.seek(0)
+        return body
+
+    def _call_wsgi(self, environ):
+        """Выполняется в потоке пула; ответ собирается целиком."""
+        response = {}
+
+        def start_response(status, headers, exc_info=None):
+            response["status"] = int(status.split(" ", 1)[0])
+            response["headers"] = [
+                (name.lower().encode("latin-1"), value.encode("latin-1"))
+                for name, value in headers
+            ]
+
+        result = self.wsgi_application(environ, start_response)
+        try:
+            chunks = [chunk for chunk in result if chunk]
+        finally:
+            if hasattr(result, "close"):
+                result.close()
+        return response["status"], response["headers"], chunks
+
+
+def get_application():
+    from yatube.templating import warm_up_on_start
+
+    try:
+        from django.core.asgi import get_asgi_application
+    except ImportError:
+        from django.conf import settings
+        from django.core.wsgi import get_wsgi_application
+        application = WsgiBridge(
+            get_wsgi_application(), settings.ASGI_THREADS
+        )
+    else:
+        application = get_asgi_application()
+    warm_up_on_start()
+    return application
+
+
+application = get_application()
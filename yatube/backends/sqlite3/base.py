@@ -0,0 +1,32 @@
+"""SQLite с настройкой каждого соединения.
+
+Стандартный бэкенд django.db.backends.sqlite3 плюс два ключа OPTIONS:
+
+* pragmas — словарь PRAGMA, которые выполняются на каждом новом
+  соединении (journal_mode, synchronous, mmap_size, ...);
+* transaction_mode — режим BEGIN для atomic(). IMMEDIATE сразу берёт
+  блокировку записи, и конкурирующий писатель ждёт busy_timeout,
+  а не получает «database is locked» при попытке повысить блокировку
+  посреди транзакции.
+"""
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+    def get_connection_params(self):
+        params = super().get_connection_params()
+        self.pragmas = params.pop("pragmas", {})
+        self.transaction_mode = params.pop("transaction_mode", None)
+        return params
+
+    def get_new_connection(self, conn_params):
+        conn = super().get_new_connection(conn_params)
+        for name, value in self.pragmas.items():
+            conn.execute("PRAGMA {} = {}".format(name, value))
+        return conn
+
+    def _start_transaction_under_autocommit(self):
+        if self.transaction_mode:
+            self.cursor().execute("BEGIN " + self.transaction_mode)
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,243 @@
+"""Счётчики каждого запроса: SQL, время базы и шаблонов, кэш лент.
+
+RequestMetricsMiddleware собирает их в RequestMetrics текущего запроса
+(через ContextVar, поэтому учитываются и запросы из потоков
+posts/parallel.py), отдаёт в заголовке Server-Timing и складывает
+в сводку по имени view: она доступна персоналу на /debug/metrics/.
+
+Запрос, который превысил METRICS_QUERY_LIMIT запросов к базе, повторил
+один и тот же SQL METRICS_REPEAT_LIMIT раз (типичный N+1) или шёл
+дольше METRICS_SLOW_MS, пишется в лог yatube.metrics с WARNING.
+Сводка живёт в памяти процесса, у каждого воркера своя.
+"""
+import logging
+import threading
+import time
+from collections import Counter
+from contextvars import ContextVar
+
+from django.conf import settings
+from django.contrib.admin.views.decorators import staff_member_required
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import JsonResponse
+from django.template import TemplateDoesNotExist
+from django.template.backends.django import (
+    DjangoTemplates, Template, reraise
+)
+
+logger = logging.getLogger(__name__)
+
+# показываем в Server-Timing только события кэша лент
+CACHE_EVENTS = ("hit", "stale", "miss")
+
+_current = ContextVar("request_metrics", default=None)
+_summary = {}
+_summary_lock = threading.Lock()
+
+
+class RequestMetrics:
+    def __init__(self):
+        self.queries = 0
+        self.db = 0.0
+        self.templates = 0.0
+        self.counters = Counter()
+        self.statements = Counter()
+        self.lock = threading.Lock()
+
+    def repeated(self):
+        """Самый частый SQL запроса и сколько раз он выполнялся."""
+        if not self.statements:
+            return "", 0
+        return self.statements.most_common(1)[0]
+
+
+def count(name, amount=1):
+    """Увеличивает счётчик текущего запроса, если запрос измеряется."""
+    metrics = _current.get()
+    if metrics is not None:
+        with metrics.lock:
+            metrics.counters[name] += amount
+
+
+def _execute(execute, sql, params, many, context):
+    metrics = _current.get()
+    if metrics is None:
+        return execute(sql, params, many, context)
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        elapsed = time.perf_counter() - started
+        with metrics.lock:
+            metrics.queries += 1
+            metrics.db += elapsed
+            metrics.statements[sql] += 1
+
+
+def _install(connection, **kwargs):
+    if _execute not in connection.execute_wrappers:
+        connection.execute_wrappers.append(_execute)
+
+
+# новые соединения, в том числе в потоках пула
+connection_created.connect(_install, dispatch_uid="yatube.metrics")
+
+
+class TimedTemplate(Template):
+    """Шаблон, время отрисовки которого идёт в метрики запроса.
+
+    Считается только шаблон верхнего уровня; include и extends
+    отрисовываются внутри него. Запросы из ленивых QuerySet
+    в шаблоне попадают и во время шаблона, и во время базы.
+    """
+
+    def render(self, context=None, request=None):
+        metrics = _current.get()
+        if metrics is None:
+            return super().render(context, request)
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            elapsed = time.perf_counter() - started
+            with metrics.lock:
+                metrics.templates += elapsed
+
+
+class TimedTemplates(DjangoTemplates):
+    """Бэкенд DjangoTemplates с замером времени отрисовки."""
+
+    def from_string(self, template_code):
+        return TimedTemplate(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return TimedTemplate(
+                self.engine.get_template(template_name), self
+            )
+        except TemplateDoesNotExist as exc:
+            reraise(exc, self)
+
+
+def _view_name(request):
+    match = getattr(request, "resolver_match", None)
+    return match.view_name if match else "<unresolved>"
+
+
+def _server_timing(metrics, total):
+    parts = [
+        'db;dur={:.1f};desc="{} queries"'.format(
+            metrics.db * 1000, metrics.queries
+        ),
+        "tpl;dur={:.1f}".format(metrics.templates * 1000),
+    ]
+    for event in CACHE_EVENTS:
+        if metrics.counters["cache_" + event]:
+            parts.append('cache;desc="{}"'.format(event))
+    parts.append("total;dur={:.1f}".format(total * 1000))
+    return ", ".join(parts)
+
+
+def _problems(metrics, total):
+    problems = []
+    if metrics.queries > settings.METRICS_QUERY_LIMIT:
+        problems.append("{} запросов к базе".format(metrics.queries))
+    sql, times = metrics.repeated()
+    if times >= settings.METRICS_REPEAT_LIMIT:
+        problems.append("SQL повторён {} раз: {}".format(times, sql[:200]))
+    if total * 1000 > settings.METRICS_SLOW_MS:
+        problems.append("{:.0f} мс".format(total * 1000))
+    return problems
+
+
+def _record(view_name, metrics, total, flagged):
+    with _summary_lock:
+        row = _summary.setdefault(view_name, {
+            "requests": 0, "queries": 0, "max_queries": 0, "db_ms": 0.0,
+            "template_ms": 0.0, "total_ms": 0.0, "max_total_ms": 0.0,
+            "flagged": 0, "cache": Counter(),
+        })
+        row["requests"] += 1
+        row["queries"] += metrics.queries
+        row["max_queries"] = max(row["max_queries"], metrics.queries)
+        row["db_ms"] += metrics.db * 1000
+        row["template_ms"] += metrics.templates * 1000
+        row["total_ms"] += total * 1000
+        row["max_total_ms"] = max(row["max_total_ms"], total * 1000)
+        row["flagged"] += bool(flagged)
+        for event in CACHE_EVENTS:
+            row["cache"][event] += metrics.counters["cache_" + event]
+
+
+def summary():
+    """Сводка по view: число запросов, средние и максимумы."""
+    with _summary_lock:
+        rows = {name: dict(row, cache=dict(row["cache"]))
+                for name, row in _summary.items()}
+    result = {}
+    for name, row in sorted(rows.items()):
+        requests = row["requests"]
+        result[name] = {
+            "requests": requests,
+            "avg_queries": round(row["queries"] / requests, 2),
+            "max_queries": row["max_queries"],
+            "avg_db_ms": round(row["db_ms"] / requests, 2),
+            "avg_template_ms": round(row["template_ms"] / requests, 2),
+            "avg_total_ms": round(row["total_ms"] / requests, 2),
+            "max_total_ms": round(row["max_total_ms"], 2),
+            "flagged": row["flagged"],
+            "cache": row["cache"],
+        }
+    return result
+
+
+def reset():
+    with _summary_lock:
+        _summary.clear()
+
+
+def _is_staff(request):
+    # user появляется в AuthenticationMiddleware, глубже этого middleware
+    user = getattr(request, "user", None)
+    return bool(user and user.is_staff)
+
+
+class RequestMetricsMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        # соединения, открытые до подключения сигнала
+        for connection in connections.all():
+            _install(connection)
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            _current.reset(token)
+        total = time.perf_counter() - started
+        view_name = _view_name(request)
+        problems = _problems(metrics, total)
+        _record(view_name, metrics, total, problems)
+        if problems:
+            logger.warning(
+                "%s %s (%s): %s", request.method, request.path, view_name,
+                "; ".join(problems),
+            )
+        else:
+            logger.debug(
+                "%s %s (%s): %d запросов, база %.1f мс, всего %.1f мс",
+                request.method, request.path, view_name, metrics.queries,
+                metrics.db * 1000, total * 1000,
+            )
+        if settings.METRICS_SERVER_TIMING or _is_staff(request):
+            response["Server-Timing"] = _server_timing(metrics, total)
+        return response
+
+
+@staff_member_required
+def metrics_view(request):
+    return JsonResponse(summary(), json_dumps_params={"ensure_ascii": False})
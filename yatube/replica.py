@@ -0,0 +1,109 @@
+"""Чтение лент с реплики базы.
+
+Views с декоратором replica_reads читают модели REPLICA_APPS с алиаса
+settings.REPLICA_DATABASE; все записи идут в default. Чтобы автор
+сразу видел свой пост или комментарий, ReplicaMiddleware после
+запроса, который что-то записал, ставит cookie, и следующие
+REPLICA_STICKY_SECONDS секунд этот браузер читает с основной базы.
+
+Без REPLICA_DATABASE (по умолчанию) всё работает с default.
+Для локальной проверки две SQLite-базы синхронизирует replicate():
+копия через backup API вместо настоящей репликации, см. команду
+sync_replica.
+"""
+import time
+from contextvars import ContextVar
+from functools import wraps
+
+from django.conf import settings
+from django.db import DEFAULT_DB_ALIAS, connections
+
+REPLICA_APPS = {"posts", "auth"}
+STICKY_COOKIE = "primary_until"
+SAFE_METHODS = ("GET", "HEAD")
+
+# состояние текущего запроса: {"replica": bool, "wrote": bool}
+_state = ContextVar("replica_state", default=None)
+
+
+def _replica_alias():
+    return getattr(settings, "REPLICA_DATABASE", None)
+
+
+def _sticky_seconds():
+    return getattr(settings, "REPLICA_STICKY_SECONDS", 10)
+
+
+def _pinned(request):
+    try:
+        return float(request.COOKIES.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def reading():
+    """Идёт ли сейчас чтение с реплики."""
+    state = _state.get()
+    return bool(state and state["replica"])
+
+
+class ReplicaRouter:
+    def db_for_read(self, model, **hints):
+        if reading() and model._meta.app_label in REPLICA_APPS:
+            return _replica_alias()
+        return None
+
+    def db_for_write(self, model, **hints):
+        # явно default: иначе Django пишет в базу, из которой прочитан объект
+        state = _state.get()
+        if state is not None and model._meta.app_label in REPLICA_APPS:
+            state["wrote"] = True
+        return DEFAULT_DB_ALIAS
+
+    def allow_relation(self, obj1, obj2, **hints):
+        # на реплике те же данные, что и в default
+        return True
+
+
+def replica_reads(view):
+    """Читает с реплики, если запрос безопасный и браузер не закреплён."""
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        state = _state.get()
+        if (state is None or not _replica_alias()
+                or request.method not in SAFE_METHODS or _pinned(request)):
+            return view(request, *args, **kwargs)
+        state["replica"] = True
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            state["replica"] = False
+    return wrapper
+
+
+class ReplicaMiddleware:
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        state = {"replica": False, "wrote": False}
+        token = _state.set(state)
+        try:
+            response = self.get_response(request)
+        finally:
+            _state.reset(token)
+        if state["wrote"] and _replica_alias():
+            seconds = _sticky_seconds()
+            response.set_cookie(
+                STICKY_COOKIE, str(time.time() + seconds),
+                max_age=seconds, httponly=True, samesite="Lax",
+            )
+        return response
+
+
+def replicate(source=DEFAULT_DB_ALIAS, target=None):
+    """Копирует SQLite-базу source в target целиком (заглушка репликации)."""
+    target = target or _replica_alias()
+    for alias in (source, target):
+        connections[alias].ensure_connection()
+    connections[source].connection.backup(connections[target].connection)
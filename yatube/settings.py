@@ -23,7 +23,11 @@ BASE_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
 SECRET_KEY = '4hmgr0-&*5nh2kv*2@@^v@r(li)to_$c077y0ey0vo0tf8_)q6'
 
 # SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
+# Профиль шаблонов production выключает отладку, YATUBE_DEBUG=1|0
+# задаёт её явно.
+DEBUG = os.environ.get("YATUBE_DEBUG", (
+    "0" if os.environ.get("YATUBE_TEMPLATES") == "production" else "1"
+)) == "1"
 
 ALLOWED_HOSTS = [
     "localhost",
@@ -49,7 +53,9 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    'yatube.metrics.RequestMetricsMiddleware',
     'django.middleware.security.SecurityMiddleware',
+    'yatube.replica.ReplicaMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -62,35 +68,106 @@ ROOT_URLCONF = 'yatube.urls'
 
 TEMPLATES_DIR = os.path.join(BASE_DIR, "templates")
 
+TEMPLATE_LOADERS = [
+    "django.template.loaders.filesystem.Loader",
+    "django.template.loaders.app_directories.Loader",
+]
+
+# default — шаблоны ищутся и разбираются заново при каждом обращении,
+# правки видны без перезапуска. production (YATUBE_TEMPLATES=production)
+# — cached.Loader держит скомпилированные шаблоны в памяти процесса,
+# отладочные данные шаблонов выключены, а при старте WSGI/ASGI все
+# шаблоны компилируются заранее (yatube/templating.py).
+TEMPLATE_PROFILE = os.environ.get("YATUBE_TEMPLATES", "default")
+TEMPLATE_WARM_UP = TEMPLATE_PROFILE == "production"
+
+TEMPLATE_OPTIONS = {
+    'context_processors': [
+        'django.template.context_processors.debug',
+        'django.template.context_processors.request',
+        'django.contrib.auth.context_processors.auth',
+        'django.contrib.messages.context_processors.messages',
+    ],
+}
+if TEMPLATE_PROFILE == "production":
+    TEMPLATE_OPTIONS.update({
+        "debug": False,
+        "loaders": [
+            ("django.template.loaders.cached.Loader", TEMPLATE_LOADERS),
+        ],
+    })
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [TEMPLATES_DIR, "about/templates/about", "posts/templates/posts"],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
+        # DjangoTemplates с замером времени отрисовки, см. yatube/metrics.py
+        'BACKEND': 'yatube.metrics.TimedTemplates',
+        # от BASE_DIR, а не от текущего каталога процесса
+        'DIRS': [
+            TEMPLATES_DIR,
+            os.path.join(BASE_DIR, "about", "templates", "about"),
+            os.path.join(BASE_DIR, "posts", "templates", "posts"),
+        ],
+        # с явным списком loaders каталоги приложений ищет app_directories
+        'APP_DIRS': "loaders" not in TEMPLATE_OPTIONS,
+        'OPTIONS': TEMPLATE_OPTIONS,
     },
 ]
 
 WSGI_APPLICATION = 'yatube.wsgi.application'
+ASGI_APPLICATION = 'yatube.asgi.application'
 
 
 # Database
 # https://docs.djangoproject.com/en/2.2/ref/settings/#databases
 
+# default — SQLite с настройками по умолчанию. production
+# (YATUBE_DB=production) — WAL, чтобы читатели не ждали писателей,
+# ожидание блокировки вместо «database is locked» и постоянные
+# соединения; см. yatube/backends/sqlite3.
+DATABASE_PROFILES = {
+    "default": {
+        "ENGINE": "django.db.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+    },
+    "production": {
+        "ENGINE": "yatube.backends.sqlite3",
+        "NAME": os.path.join(BASE_DIR, "db.sqlite3"),
+        "CONN_MAX_AGE": 600,
+        "OPTIONS": {
+            # секунды ожидания блокировки в модуле sqlite3
+            "timeout": 20,
+            "transaction_mode": "IMMEDIATE",
+            "pragmas": {
+                "journal_mode": "WAL",
+                "synchronous": "NORMAL",
+                "busy_timeout": 20000,
+                "mmap_size": 256 * 1024 * 1024,
+                # отрицательное значение — размер в КиБ
+                "cache_size": -64000,
+                "temp_store": "MEMORY",
+            },
+        },
+    },
+}
+
 DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
-    }
+    'default': DATABASE_PROFILES[os.environ.get("YATUBE_DB", "default")],
 }
 
+# Реплика для чтения лент (yatube/replica.py). Алиас есть всегда,
+# но используется, только если задан YATUBE_REPLICA — путь к копии,
+# которую обновляет python manage.py sync_replica.
+DATABASES["replica"] = dict(
+    DATABASES["default"],
+    NAME=os.environ.get(
+        "YATUBE_REPLICA", os.path.join(BASE_DIR, "db-replica.sqlite3")
+    ),
+)
+REPLICA_DATABASE = "replica" if os.environ.get("YATUBE_REPLICA") else None
+# сколько секунд после записи браузер читает с основной базы
+REPLICA_STICKY_SECONDS = 10
+DATABASE_ROUTERS = ["yatube.replica.ReplicaRouter"]
+
 
 # Password validation
 # https://docs.djangoproject.com/en/2.2/ref/settings/#auth-password-validators
@@ -141,8 +218,75 @@ LOGOUT_REDIRECT_URL = "/"
 EMAIL_BACKEND = "django.core.mail.backends.filebased.EmailBackend"
 EMAIL_FILE_PATH = os.path.join(BASE_DIR, "sent_emails")
 
+# locmem — свой кэш в каждом процессе. Для нескольких воркеров
+# gunicorn выберите общий: YATUBE_CACHE=file | db | memcached
+# (для db сначала выполните python manage.py createcachetable).
+CACHE_PROFILES = {
+    "locmem": {
+        "BACKEND": "django.core.cache.backends.locmem.LocMemCache",
+    },
+    "file": {
+        "BACKEND": "django.core.cache.backends.filebased.FileBasedCache",
+        "LOCATION": os.environ.get(
+            "YATUBE_CACHE_LOCATION", os.path.join(BASE_DIR, "cache")
+        ),
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+    "db": {
+        "BACKEND": "django.core.cache.backends.db.DatabaseCache",
+        "LOCATION": "yatube_cache",
+        "OPTIONS": {"MAX_ENTRIES": 50000},
+    },
+    "memcached": {
+        "BACKEND": "django.core.cache.backends.memcached.MemcachedCache",
+        "LOCATION": os.environ.get("YATUBE_CACHE_LOCATION", "127.0.0.1:11211"),
+    },
+}
+CACHE_PROFILE = os.environ.get("YATUBE_CACHE", "locmem")
+
 CACHES = {
-    'default': {
-        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
-    }
+    'default': CACHE_PROFILES[CACHE_PROFILE],
 }
+
+if CACHE_PROFILE != "locmem":
+    # сессии читаются из общего кэша, база остаётся источником истины
+    SESSION_ENGINE = "django.contrib.sessions.backends.cached_db"
+
+# хранилище ключей sorl.thumbnail живёт в том же кэше
+THUMBNAIL_CACHE = "default"
+
+# Картинки постов принимаются потоково и проверяются до декодирования
+# (posts.uploads.image_uploads на new_post и post_edit)
+POST_IMAGE_MAX_BYTES = 10 * 1024 * 1024
+POST_IMAGE_MAX_SIDE = 8000
+POST_IMAGE_MAX_PIXELS = 40 * 1000 * 1000
+
+# Процессы фоновой генерации миниатюр, 0 — делать сразу в запросе
+THUMBNAIL_WORKERS = int(os.environ.get("YATUBE_THUMBNAIL_WORKERS", 2))
+
+# Потоки для независимых запросов страницы (posts/parallel.py),
+# 0 — выполнять их по очереди
+QUERY_WORKERS = int(os.environ.get("YATUBE_QUERY_WORKERS", 4))
+
+# Массовая модерация в админке (posts/moderation.py): фоновые потоки,
+# 0 — выполнять сразу в запросе, и размер пачки id на один DELETE/UPDATE
+MODERATION_WORKERS = int(os.environ.get("YATUBE_MODERATION_WORKERS", 1))
+MODERATION_CHUNK_SIZE = 500
+
+# Потоки, в которых ASGI-сервер выполняет Django (yatube/asgi.py)
+ASGI_THREADS = int(os.environ.get("YATUBE_ASGI_THREADS", 16))
+
+# Метрики запросов (yatube/metrics.py): заголовок Server-Timing и пороги,
+# после которых запрос попадает в лог yatube.metrics как подозрительный.
+# Без DEBUG заголовок получает только персонал: тайминги выдают устройство
+# сайта и помогают подбирать тяжёлые запросы.
+METRICS_SERVER_TIMING = DEBUG
+METRICS_QUERY_LIMIT = 20
+METRICS_REPEAT_LIMIT = 5
+METRICS_SLOW_MS = 500
+
+# Кэш страниц лент для анонимов, см. posts/feed_cache.py
+FEED_CACHE_ALIAS = "default"
+FEED_CACHE_TIMEOUT = 300
+# ETag и 304 строятся из поколений в кэше — только при общем кэше
+FEED_CONDITIONAL_GET = CACHE_PROFILE != "locmem"
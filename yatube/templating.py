@@ -0,0 +1,66 @@
+"""Компиляция всех шаблонов при старте процесса.
+
+В профиле шаблонов production (YATUBE_TEMPLATES=production) шаблоны
+грузит cached.Loader: файл читается и разбирается один раз, дальше
+Template берётся из памяти. warm_up() делает это до первого запроса:
+первые посетители каждой страницы не платят за поиск по каталогам и
+разбор, а синтаксическая ошибка в шаблоне видна в логе сразу после
+запуска. Вызывается из yatube/wsgi.py и yatube/asgi.py, если включён
+TEMPLATE_WARM_UP.
+"""
+import logging
+import os
+import time
+
+from django.conf import settings
+from django.template import TemplateSyntaxError, engines
+
+logger = logging.getLogger(__name__)
+
+
+def _loaders(engine):
+    for loader in engine.template_loaders:
+        # cached.Loader оборачивает настоящие загрузчики
+        yield from getattr(loader, "loaders", [loader])
+
+
+def template_names(engine):
+    """Имена всех файлов в каталогах, где ищут загрузчики движка."""
+    names = set()
+    for loader in _loaders(engine):
+        for directory in loader.get_dirs():
+            for root, _, files in os.walk(directory):
+                names.update(
+                    os.path.relpath(os.path.join(root, name), directory)
+                    .replace(os.sep, "/")
+                    for name in files
+                    if not name.startswith(".")
+                )
+    return sorted(names)
+
+
+def warm_up():
+    """Компилирует шаблоны всех движков Django, возвращает их число."""
+    started = time.perf_counter()
+    compiled = 0
+    for backend in engines.all():
+        engine = getattr(backend, "engine", None)
+        if engine is None:
+            continue
+        for name in template_names(engine):
+            try:
+                engine.get_template(name)
+            except (TemplateSyntaxError, UnicodeDecodeError):
+                logger.exception("Шаблон %s не компилируется", name)
+            else:
+                compiled += 1
+    logger.info(
+        "Скомпилировано шаблонов: %s за %.0f мс",
+        compiled, (time.perf_counter() - started) * 1000,
+    )
+    return compiled
+
+
+def warm_up_on_start():
+    if settings.TEMPLATE_WARM_UP:
+        warm_up()